@@ -0,0 +1,388 @@
+from array import array
+
+from linked_list import LinkedList, _mutating
+
+
+class NodePool:
+    """Пул узлов, хранящий ссылки списка в параллельных массивах.
+
+    Узел пула — это просто номер ячейки: данные лежат в обычном списке,
+    а номера следующего и предыдущего узлов — в массивах array('l').
+    Освобождённые ячейки попадают в список свободных и используются повторно.
+
+    Атрибуты:
+        data (list): Данные узлов.
+        next (array): Номера следующих узлов.
+        prev (array): Номера предыдущих узлов.
+        _free (array): Номера свободных ячеек.
+    """
+
+    def __init__(self):
+        """
+        Инициализирует пустой пул.
+        """
+        self.data = []
+        self.next = array('l')
+        self.prev = array('l')
+        self._free = array('l')
+
+    def allocate(self, data):
+        """
+        Выделяет ячейку под новый узел.
+
+        Аргументы:
+            data (любой тип): Данные узла.
+
+        Возвращает:
+            int: Номер ячейки.
+        """
+        if self._free:
+            index = self._free.pop()
+            self.data[index] = data
+            self.next[index] = -1
+            self.prev[index] = -1
+            return index
+        self.data.append(data)
+        self.next.append(-1)
+        self.prev.append(-1)
+        return len(self.data) - 1
+
+    def release(self, index):
+        """
+        Возвращает ячейку в список свободных.
+
+        Аргументы:
+            index (int): Номер ячейки.
+        """
+        self.data[index] = None
+        self._free.append(index)
+
+    def __len__(self):
+        """
+        Возвращает количество занятых ячеек.
+
+        Возвращает:
+            int: Количество узлов в пуле.
+        """
+        return len(self.data) - len(self._free)
+
+
+class ArrayListItem:
+    """Ссылка на узел списка, хранящегося в пуле NodePool.
+
+    Повторяет интерфейс LinkedListItem, но сама ничего не хранит, кроме
+    пула и номера ячейки, поэтому создаётся по требованию. Две ссылки на
+    одну ячейку равны. После удаления узла из списка ссылка становится
+    недействительной: ячейка может быть занята другим узлом.
+
+    Атрибуты:
+        _pool (NodePool): Пул, в котором хранится узел.
+        _index (int): Номер ячейки пула.
+    """
+
+    __slots__ = ('_pool', '_index')
+
+    def __init__(self, pool, index):
+        """
+        Инициализирует ссылку на узел.
+
+        Аргументы:
+            pool (NodePool): Пул узлов.
+            index (int): Номер ячейки пула.
+        """
+        self._pool = pool
+        self._index = index
+
+    def _handle(self, index):
+        """
+        Возвращает ссылку на другую ячейку того же пула.
+
+        Аргументы:
+            index (int): Номер ячейки или -1.
+
+        Возвращает:
+            ArrayListItem: Ссылка на узел или None для -1.
+        """
+        if index < 0:
+            return None
+        return ArrayListItem(self._pool, index)
+
+    @property
+    def data(self):
+        """
+        Возвращает данные узла.
+
+        Возвращает:
+            data (любой тип): Данные узла.
+        """
+        return self._pool.data[self._index]
+
+    @property
+    def next_item(self):
+        """
+        Возвращает ссылку на следующий узел.
+
+        Возвращает:
+            ArrayListItem: Следующий узел списка.
+        """
+        return self._handle(self._pool.next[self._index])
+
+    @next_item.setter
+    def next_item(self, value):
+        """
+        Устанавливает ссылку на следующий узел.
+
+        Аргументы:
+            value (ArrayListItem): Новый узел, на который будет указывать текущий.
+        """
+        if value is None:
+            self._pool.next[self._index] = -1
+            return
+        self._pool.next[self._index] = value._index
+        self._pool.prev[value._index] = self._index
+
+    @property
+    def previous_item(self):
+        """
+        Возвращает ссылку на предыдущий узел.
+
+        Возвращает:
+            ArrayListItem: Предыдущий узел списка.
+        """
+        return self._handle(self._pool.prev[self._index])
+
+    @previous_item.setter
+    def previous_item(self, value):
+        """
+        Устанавливает ссылку на предыдущий узел.
+
+        Аргументы:
+            value (ArrayListItem): Новый узел, который будет предыдущим по отношению к текущему.
+        """
+        if value is None:
+            self._pool.prev[self._index] = -1
+            return
+        self._pool.prev[self._index] = value._index
+        self._pool.next[value._index] = self._index
+
+    # Внутренний код LinkedList читает ссылки напрямую через эти имена
+    _next_item = next_item
+    _previous_item = previous_item
+
+    def __eq__(self, other):
+        """
+        Сравнивает ссылки на узлы.
+
+        Аргументы:
+            other (любой тип): Объект для сравнения.
+
+        Возвращает:
+            bool: True, если обе ссылки указывают на одну ячейку одного пула.
+        """
+        if not isinstance(other, ArrayListItem):
+            return NotImplemented
+        return self._index == other._index and self._pool is other._pool
+
+    def __hash__(self):
+        """
+        Возвращает хеш ссылки.
+
+        Возвращает:
+            int: Хеш номера ячейки.
+        """
+        return hash(self._index)
+
+    def __repr__(self):
+        """
+        Возвращает строковое представление узла списка.
+
+        Возвращает:
+            str: Строковое представление узла в формате ArrayListItem(data).
+        """
+        return f"ArrayListItem({self.data})"
+
+
+class ArrayLinkedList(LinkedList):
+    """Двусвязный кольцевой список, хранящий узлы в массивах пула NodePool.
+
+    Публичный интерфейс совпадает с LinkedList, а узлами служат ссылки
+    ArrayListItem. На узел уходит три машинных слова вместо отдельного
+    объекта, поэтому такой список экономнее на миллионах элементов.
+
+    Снимки работают так же, как у LinkedList: прежние ссылки изменённых
+    ячеек сохраняются в истории. Пока жив хотя бы один снимок, ячейки
+    удалённых узлов не возвращаются в пул, чтобы снимок не увидел в них
+    чужие данные.
+
+    Атрибуты:
+        _pool (NodePool): Пул узлов списка.
+        _retired (set): Номера ячеек удалённых узлов, ждущих освобождения,
+            пока живы снимки.
+    """
+
+    def __init__(self, first_item=None, indexed=False, thread_safe=False):
+        """
+        Инициализирует новый список.
+
+        Если передан первый узел готового кольца, данные кольца копируются в пул.
+
+        Аргументы:
+            first_item (LinkedListItem, опционально): Первый узел кольца для копирования.
+            indexed (bool, опционально): Включает индекс позиций. По умолчанию False.
+            thread_safe (bool, опционально): Защищает операции блокировкой. По умолчанию False.
+        """
+        self._pool = NodePool()
+        self._retired = set()
+        super().__init__(None, indexed, thread_safe)
+        if first_item is not None:
+            current = first_item
+            while True:
+                self.append(current.data)
+                current = current.next_item
+                if current is None or current == first_item:
+                    break
+
+    def _new_node(self, data):
+        """
+        Выделяет в пуле ячейку под новый узел.
+
+        Аргументы:
+            data (любой тип): Данные узла.
+
+        Возвращает:
+            ArrayListItem: Ссылка на новый узел.
+        """
+        return ArrayListItem(self._pool, self._pool.allocate(data))
+
+    def _link(self, left, right):
+        """
+        Связывает два узла так, чтобы right стоял сразу после left.
+
+        Аргументы:
+            left (ArrayListItem): Предыдущий узел.
+            right (ArrayListItem): Следующий узел.
+        """
+        if self._snapshots:
+            self._remember_next(left)
+        self._links += 1
+        self._pool.next[left._index] = right._index
+        self._pool.prev[right._index] = left._index
+
+    def _release(self, node):
+        """
+        Возвращает ячейку удалённого узла в пул, а пока живы снимки —
+        откладывает это до удаления последнего снимка.
+
+        Аргументы:
+            node (ArrayListItem): Удалённый узел.
+        """
+        if self._snapshots:
+            self._retired.add(node._index)
+        else:
+            self._pool.release(node._index)
+
+    def _release_snapshot(self, version):
+        """
+        Забывает удалённый снимок; после последнего снимка освобождает
+        отложенные ячейки.
+
+        Аргументы:
+            version (int): Версия удалённого снимка.
+        """
+        super()._release_snapshot(version)
+        with self._lock:
+            if not self._snapshots:
+                for index in self._retired:
+                    self._pool.release(index)
+                self._retired.clear()
+
+    def _can_adopt(self, other):
+        """
+        Проверяет, можно ли встроить узлы другого списка без копирования.
+
+        У каждого списка свой пул, поэтому узлы другого списка всегда копируются.
+
+        Аргументы:
+            other (LinkedList): Другой список.
+
+        Возвращает:
+            bool: Всегда False.
+        """
+        return False
+
+    @_mutating
+    def restore(self, snapshot):
+        """
+        Возвращает список к состоянию снимка.
+
+        Ячейки узлов, которых нет в снимке, освобождаются, а узлы, которые
+        снимок вернул в список, больше не ждут освобождения.
+
+        Аргументы:
+            snapshot (ListSnapshot): Снимок этого списка.
+
+        Выбрасывает:
+            ValueError: Если снимок сделан с другого списка.
+        """
+        old = {node._index for node in self}
+        super().restore(snapshot)
+        new = {node._index for node in self}
+        self._retired -= new
+        for index in old - new:
+            self._release(ArrayListItem(self._pool, index))
+
+    @_mutating
+    def clear(self):
+        """
+        Удаляет из списка все узлы и освобождает пул.
+
+        Пока живы снимки, пул сохраняется, а ячейки узлов ждут освобождения.
+        """
+        if self._snapshots:
+            self._retired.update(node._index for node in self)
+            super().clear()
+            return
+        super().clear()
+        self._pool = NodePool()
+
+    def __iter__(self):
+        """
+        Итерация по элементам списка.
+
+        Возвращает:
+            generator: Генератор для итерации по узлам списка.
+        """
+        if self.first_item is None:
+            return
+        version = self._version
+        pool = self._pool
+        following = pool.next
+        start = index = self.first_item._index
+        while True:
+            yield ArrayListItem(pool, index)
+            if self._version != version:
+                raise RuntimeError("LinkedList changed during iteration")
+            index = following[index]
+            if index == start:
+                break
+
+    def __reversed__(self):
+        """
+        Итерация по элементам списка в обратном порядке.
+
+        Возвращает:
+            generator: Генератор для обратной итерации по данным списка.
+        """
+        if self.first_item is None:
+            return
+        version = self._version
+        data = self._pool.data
+        preceding = self._pool.prev
+        start = index = preceding[self.first_item._index]
+        while True:
+            yield data[index]
+            if self._version != version:
+                raise RuntimeError("LinkedList changed during iteration")
+            index = preceding[index]
+            if index == start:
+                break
@@ -0,0 +1,228 @@
+"""Кэш декодированного звука в памяти.
+
+Недавно сыгранные и следующие по плейлисту треки декодируются в фоне и
+хранятся в памяти в виде WAV. Возврат к такому треку не читает файл с диска:
+бэкенд получает готовые данные. Кэш ограничен бюджетом в байтах и вытесняет
+давно не использованные треки.
+"""
+
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+
+class AudioCache:
+    """
+    LRU-кэш декодированного звука с бюджетом по байтам.
+
+    Запись привязана к времени изменения и размеру файла: если файл
+    изменился, запись считается устаревшей и удаляется при следующем
+    обращении. Декодирование выполняет отдельный фоновый поток, чтобы
+    не задерживать начало воспроизведения.
+
+    Атрибуты:
+        budget (int): Максимальный суммарный размер данных в байтах.
+        used (int): Текущий суммарный размер данных в байтах.
+        hits (int): Количество попаданий.
+        misses (int): Количество промахов.
+        decoded (callable): Функция decoded(path), которую фоновый поток
+            вызывает после того, как положил файл в кэш, или None.
+        _decode (callable): Функция декодирования пути в байты.
+        _entries (OrderedDict): Записи path -> (mtime_ns, size, data),
+            от давно использованных к недавним.
+        _pending (set): Пути, ожидающие декодирования.
+        _tasks (queue.SimpleQueue): Очередь путей для фонового потока.
+        _worker (threading.Thread): Фоновый поток декодирования или None.
+        _lock (threading.Lock): Блокировка записей.
+    """
+
+    def __init__(self, decode, budget=256 * 2 ** 20, decoded=None):
+        """
+        Инициализирует пустой кэш.
+
+        Аргументы:
+            decode (callable): Функция, возвращающая декодированные данные файла
+                и выбрасывающая AudioError, если файл не декодируется.
+            budget (int, опционально): Бюджет в байтах. По умолчанию 256 МиБ.
+            decoded (callable, опционально): Функция decoded(path), вызываемая
+                после декодирования файла.
+        """
+        self.budget = budget
+        self.decoded = decoded
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._decode = decode
+        self._entries = OrderedDict()
+        self._pending = set()
+        self._tasks = queue.SimpleQueue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path):
+        """
+        Возвращает признаки версии файла.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Возвращает:
+            tuple: (mtime_ns, size) или None, если файла нет.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path):
+        """
+        Возвращает декодированные данные файла, если они есть и не устарели.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Возвращает:
+            bytes: Данные или None при промахе.
+        """
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] != signature:
+                self._discard(path)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, path, data, signature=None):
+        """
+        Кладёт данные в кэш, вытесняя давно не использованные записи.
+
+        Данные больше всего бюджета не кэшируются.
+
+        Аргументы:
+            path (str): Путь к файлу.
+            data (bytes): Декодированные данные.
+            signature (tuple, опционально): (mtime_ns, size) файла на момент
+                декодирования. По умолчанию берётся текущий.
+        """
+        if signature is None:
+            signature = self._signature(path)
+        if signature is None or len(data) > self.budget:
+            return
+        with self._lock:
+            self._discard(path)
+            self._entries[path] = (signature[0], signature[1], data)
+            self.used += len(data)
+            while self.used > self.budget:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, path):
+        """
+        Удаляет запись без блокировки.
+
+        Аргументы:
+            path (str): Путь к файлу.
+        """
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.used -= len(entry[2])
+
+    def invalidate(self, path):
+        """
+        Удаляет запись о файле.
+
+        Аргументы:
+            path (str): Путь к файлу.
+        """
+        with self._lock:
+            self._discard(path)
+
+    def clear(self):
+        """
+        Удаляет все записи.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.used = 0
+
+    def prefetch(self, path):
+        """
+        Ставит файл в очередь фонового декодирования, если его ещё нет в кэше.
+
+        Аргументы:
+            path (str): Путь к файлу.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if path in self._pending or (
+                    entry is not None and entry[:2] == self._signature(path)):
+                return
+            self._pending.add(path)
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name='audio-cache', daemon=True)
+                self._worker.start()
+        self._tasks.put(path)
+
+    def wait(self):
+        """
+        Ждёт, пока фоновый поток декодирует все поставленные файлы.
+        """
+        with self._lock:
+            if self._worker is None:
+                return
+        done = threading.Event()
+        self._tasks.put(done)
+        done.wait()
+
+    def _run(self):
+        """
+        Цикл фонового потока: декодирует файлы из очереди.
+        """
+        while True:
+            path = self._tasks.get()
+            if isinstance(path, threading.Event):
+                path.set()
+                continue
+            signature = self._signature(path)
+            try:
+                data = self._decode(path)
+            except Exception as error:  # Файл не декодируется: он будет читаться с диска
+                print(f"Не удалось декодировать {path}: {error}")
+                data = None
+            if data is not None:
+                self.put(path, data, signature)
+            with self._lock:
+                self._pending.discard(path)
+            if data is not None and self.decoded is not None:
+                self.decoded(path)
+
+    def __contains__(self, path):
+        """
+        Проверяет наличие актуальной записи, не меняя порядок и счётчики.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Возвращает:
+            bool: True, если данные файла есть в кэше и не устарели.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            return entry is not None and entry[:2] == self._signature(path)
+
+    def __len__(self):
+        """
+        Возвращает количество записей.
+
+        Возвращает:
+            int: Количество закэшированных файлов.
+        """
+        return len(self._entries)
@@ -0,0 +1,1092 @@
+"""Общий для процесса звуковой движок.
+
+Движок создаётся один раз на процесс функцией get_engine() и ничего не
+инициализирует, пока не понадобится воспроизведение: микшер pygame
+открывается при первом обращении к backend, поток воспроизведения —
+при первом обращении к player. Поэтому плейлисты можно создавать,
+загружать и тестировать без звукового устройства, а с бэкендом 'null'
+воспроизведение работает вовсе без pygame. Если задан бюджет кэша
+(cache_budget), недавние и следующие треки движок держит декодированными
+в кэше AudioCache; каждый трек декодируется в кэш один раз. По умолчанию
+кэш отключён, чтобы не занимать память там, где он не нужен, а окно
+плеера (interface.py) включает его с ограниченным бюджетом.
+"""
+
+import io
+import os
+import queue
+import threading
+import time
+import wave
+
+from audio_cache import AudioCache
+from transcode_cache import TranscodeCache
+
+# События, которые возвращает backend.wait()
+END = 'end'
+WAKE = 'wake'
+
+
+class AudioError(Exception):
+    """Ошибка звукового бэкенда: файл не открылся или операция не поддерживается."""
+
+
+class PygameBackend:
+    """
+    Бэкенд на pygame.mixer.music.
+
+    Видеоподсистема и очередь событий SDL не используются: их можно
+    инициализировать и обрабатывать только в главном потоке, где работает Qt.
+    Пробуждение передаётся через собственную очередь бэкенда, а конец трека
+    поток воспроизведения узнаёт по длительности трека: wait спит до
+    расчётного конца текущего трека и только тогда проверяет микшер.
+    Длительность WAV (в том числе данных из кэшей) читается из заголовка,
+    для остальных файлов её передаёт вызывающий. Начало трека из очереди
+    микшера видно по сбросу позиции get_pos: она отстаёт от времени,
+    прошедшего с прошлой проверки, больше чем на tolerance. Если трек ещё
+    играет, хотя его расчётный конец прошёл, следующая проверка
+    откладывается тем дальше, чем сильнее он опоздал. Трек неизвестной
+    длины проверяется раз в unknown_interval. Остановленный или
+    поставленный на паузу бэкенд ждёт пробуждения без таймаута.
+
+    Каждая загрузка и остановка начинает новое поколение, и события END
+    прежнего поколения, ещё лежащие в очереди, wait отбрасывает.
+
+    Атрибуты:
+        margin (float): Запас после расчётного конца трека в секундах.
+        unknown_interval (float): Период проверки трека неизвестной длины в секундах.
+        tolerance (float): Допустимое отставание get_pos от часов в секундах.
+        _pygame (module): Модуль pygame, импортируется при создании бэкенда.
+        _events (queue.SimpleQueue): События для wait: WAKE или (END, поколение).
+        _generation (int): Номер поколения загруженного трека.
+        _active (bool): Флаг того, что трек играет и не стоит на паузе.
+        _queued (bool): Флаг трека в очереди микшера.
+        _ended (bool): Флаг того, что микшер доиграл все треки и остановился.
+        _position (int): Позиция get_pos при последней проверке в миллисекундах.
+        _checked (float): Время последней проверки по time.monotonic.
+        _length (float): Длительность текущего трека в секундах или None.
+        _queued_length (float): Длительность трека в очереди в секундах или None.
+        _offset (float): Сдвиг позиции текущего трека после перемотки в секундах.
+    """
+
+    margin = 0.01
+    unknown_interval = 1.0
+    tolerance = 0.02
+
+    def __init__(self):
+        """
+        Импортирует pygame. Устройство открывается методом init.
+        """
+        import pygame
+
+        self._pygame = pygame
+        self._events = queue.SimpleQueue()
+        self._generation = 0
+        self._active = False
+        self._queued = False
+        self._ended = False
+        self._position = 0
+        self._checked = 0.0
+        self._length = None
+        self._queued_length = None
+        self._offset = 0.0
+
+    def init(self, frequency, buffer):
+        """
+        Открывает микшер.
+
+        Аргументы:
+            frequency (int): Частота дискретизации в герцах.
+            buffer (int): Размер буфера микшера в сэмплах.
+        """
+        self._pygame.mixer.init(frequency=frequency, buffer=buffer)
+
+    def quit(self):
+        """
+        Закрывает микшер.
+        """
+        self._pygame.mixer.quit()
+
+    def _call(self, function, *args):
+        """
+        Вызывает функцию pygame, превращая pygame.error в AudioError.
+
+        Аргументы:
+            function (callable): Функция pygame.mixer.music.
+            *args: Аргументы функции.
+
+        Выбрасывает:
+            AudioError: Если pygame сообщил об ошибке.
+        """
+        try:
+            function(*args)
+        except self._pygame.error as error:
+            raise AudioError(str(error)) from error
+
+    @staticmethod
+    def _stream(source):
+        """
+        Превращает источник звука в аргументы pygame.mixer.music.load.
+
+        Аргументы:
+            source (str или bytes): Путь к файлу или декодированные данные WAV.
+
+        Возвращает:
+            tuple: Аргументы для load и queue.
+        """
+        if isinstance(source, bytes):
+            return io.BytesIO(source), 'wav'
+        return (source,)
+
+    def decode(self, path):
+        """
+        Декодирует файл целиком в WAV в формате микшера.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Возвращает:
+            bytes: Данные WAV.
+
+        Выбрасывает:
+            AudioError: Если файл не декодируется или формат микшера не 16-битный.
+        """
+        frequency, size, channels = self._pygame.mixer.get_init()
+        if size != -16:
+            raise AudioError(f"Формат микшера {size} не поддерживается кэшем")
+        try:
+            sound = self._pygame.mixer.Sound(path)
+        except self._pygame.error as error:
+            raise AudioError(str(error)) from error
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as file:
+            file.setnchannels(channels)
+            file.setsampwidth(2)
+            file.setframerate(frequency)
+            file.writeframes(sound.get_raw())
+        return buffer.getvalue()
+
+    @staticmethod
+    def _measure(source, length):
+        """
+        Определяет длительность трека.
+
+        Аргументы:
+            source (str или bytes): Путь к файлу или декодированные данные WAV.
+            length (float): Длительность, известная вызывающему, или None.
+
+        Возвращает:
+            float: Длительность в секундах или None, если она неизвестна.
+        """
+        if isinstance(source, str) and not source.lower().endswith('.wav'):
+            return length
+        try:
+            with wave.open(io.BytesIO(source) if isinstance(source, bytes) else source) as file:
+                return file.getnframes() / file.getframerate()
+        except (OSError, EOFError, wave.Error, ZeroDivisionError):
+            return length
+
+    def load(self, source, length=None):
+        """
+        Загружает трек, прерывая текущий и очищая очередь.
+
+        Аргументы:
+            source (str или bytes): Путь к файлу или декодированные данные WAV.
+            length (float, опционально): Длительность трека в секундах, если
+                она известна. Для WAV читается из заголовка.
+
+        Выбрасывает:
+            AudioError: Если файл не открылся.
+        """
+        self._active = self._queued = self._ended = False
+        self._generation += 1
+        self._call(self._pygame.mixer.music.load, *self._stream(source))
+        self._length = self._measure(source, length)
+        self._queued_length = None
+
+    def play(self):
+        """
+        Начинает воспроизведение загруженного файла.
+        """
+        self._pygame.mixer.music.play()
+        self._active = True
+        self._queued = False
+        self._offset = 0.0
+
+    def queue(self, source, length=None):
+        """
+        Ставит трек в очередь: он начнётся сразу после текущего.
+
+        Аргументы:
+            source (str или bytes): Путь к файлу или декодированные данные WAV.
+            length (float, опционально): Длительность трека в секундах, если
+                она известна. Для WAV читается из заголовка.
+
+        Выбрасывает:
+            AudioError: Если файл не открылся или микшер уже доиграл все треки.
+        """
+        if self._ended:
+            raise AudioError("Микшер остановлен, трек нужно загрузить")
+        self._call(self._pygame.mixer.music.queue, *self._stream(source))
+        self._queued = True
+        self._queued_length = self._measure(source, length)
+
+    def pause(self):
+        """
+        Ставит воспроизведение на паузу.
+        """
+        self._pygame.mixer.music.pause()
+        self._active = False
+
+    def unpause(self):
+        """
+        Снимает воспроизведение с паузы.
+        """
+        self._pygame.mixer.music.unpause()
+        self._active = True
+
+    def stop(self):
+        """
+        Останавливает воспроизведение и очищает очередь.
+        """
+        self._active = self._queued = False
+        self._generation += 1
+        self._pygame.mixer.music.stop()
+
+    def set_pos(self, seconds):
+        """
+        Перематывает текущий трек.
+
+        Аргументы:
+            seconds (float): Позиция от начала трека в секундах.
+
+        Выбрасывает:
+            AudioError: Если формат файла не поддерживает перемотку.
+        """
+        self._call(self._pygame.mixer.music.set_pos, seconds)
+        # get_pos отсчитывает время воспроизведения и не учитывает перемотку
+        self._offset = seconds - self._pygame.mixer.music.get_pos() / 1000
+
+    def get_busy(self):
+        """
+        Проверяет, играет ли трек.
+
+        Возвращает:
+            bool: True, если трек играет и не стоит на паузе.
+        """
+        return self._pygame.mixer.music.get_busy()
+
+    def _timeout(self):
+        """
+        Вычисляет, сколько можно спать до следующей проверки микшера.
+
+        Возвращает:
+            float: Таймаут в секундах или None, если трек не играет.
+        """
+        if not self._active:
+            return None
+        self._position = self._pygame.mixer.music.get_pos()
+        self._checked = time.monotonic()
+        if self._length is None:
+            return self.unknown_interval
+        remaining = self._length - self._position / 1000 - self._offset
+        if remaining > 0:
+            return remaining + self.margin
+        # Длительность оказалась меньше настоящей: проверки редеют по мере опоздания
+        return min(max(-remaining, self.margin), self.unknown_interval)
+
+    def wait(self):
+        """
+        Ждёт конца трека или пробуждения.
+
+        Конец трека определяется по состоянию микшера, поэтому трек,
+        остановленный или заменённый методами stop и load, не даёт события END.
+
+        Возвращает:
+            str: END или WAKE.
+        """
+        music = self._pygame.mixer.music
+        while True:
+            try:
+                event = self._events.get(timeout=self._timeout())
+            except queue.Empty:
+                pass
+            else:
+                if event == WAKE:
+                    return WAKE
+                if event[1] == self._generation:
+                    return END
+                continue
+            if not self._active:
+                continue
+            if not music.get_busy():
+                if self._queued:
+                    self._events.put((END, self._generation))  # Трек из очереди тоже доиграл
+                self._active = self._queued = False
+                self._ended = True
+                return END
+            expected = self._position / 1000 + time.monotonic() - self._checked
+            if self._queued and music.get_pos() / 1000 < expected - self.tolerance:
+                # Микшер начал трек из очереди и отсчитывает позицию заново
+                self._queued = False
+                self._length, self._queued_length = self._queued_length, None
+                self._offset = 0.0
+                return END
+
+    def wake(self):
+        """
+        Будит поток, ожидающий в wait. Можно вызывать из любого потока.
+        """
+        self._events.put(WAKE)
+
+
+class NullBackend:
+    """
+    Бэкенд без звукового устройства.
+
+    Запоминает, что загружено и что стоит в очереди, но звука не выводит и
+    время не отсчитывает: трек заканчивается только по вызову finish.
+    Подходит для работы без звуковой карты, тестов и замеров.
+
+    Как и микшер pygame, сообщает о конце трека, прерванного загрузкой или
+    остановкой. Такие события END относятся к прежнему поколению и
+    отбрасываются в wait.
+
+    Атрибуты:
+        path (str или bytes): Загруженный трек (путь или данные) или None.
+        queued (str или bytes): Трек в очереди или None.
+        position (float): Позиция последней перемотки в секундах.
+        loads (int): Количество загрузок файлов.
+        _playing (bool): Флаг воспроизведения.
+        _paused (bool): Флаг паузы.
+        _generation (int): Номер поколения загруженного трека.
+        _events (queue.SimpleQueue): События для wait: WAKE или (END, поколение).
+    """
+
+    def __init__(self):
+        """
+        Инициализирует бэкенд без загруженного файла.
+        """
+        self.path = None
+        self.queued = None
+        self.position = 0.0
+        self.loads = 0
+        self._playing = False
+        self._paused = False
+        self._generation = 0
+        self._events = queue.SimpleQueue()
+
+    def init(self, frequency, buffer):
+        """
+        Ничего не делает: устройства нет.
+
+        Аргументы:
+            frequency (int): Частота дискретизации в герцах.
+            buffer (int): Размер буфера в сэмплах.
+        """
+
+    def quit(self):
+        """
+        Ничего не делает: устройства нет.
+        """
+
+    def decode(self, path):
+        """
+        Читает файл целиком вместо декодирования.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Возвращает:
+            bytes: Содержимое файла.
+
+        Выбрасывает:
+            AudioError: Если файл не читается.
+        """
+        try:
+            with open(path, 'rb') as file:
+                return file.read()
+        except OSError as error:
+            raise AudioError(str(error)) from error
+
+    def load(self, source, length=None):
+        """
+        Запоминает трек, прерывая текущий и очищая очередь.
+
+        Аргументы:
+            source (str или bytes): Путь к файлу или декодированные данные.
+            length (float, опционально): Длительность трека; не используется.
+        """
+        self._interrupt()
+        self.path = source
+        self.queued = None
+        self.loads += 1
+
+    def play(self):
+        """
+        Начинает воспроизведение загруженного файла.
+        """
+        self._playing = self.path is not None
+        self._paused = False
+        self.position = 0.0
+
+    def queue(self, source, length=None):
+        """
+        Ставит трек в очередь.
+
+        Аргументы:
+            source (str или bytes): Путь к файлу или декодированные данные.
+            length (float, опционально): Длительность трека; не используется.
+        """
+        self.queued = source
+
+    def pause(self):
+        """
+        Ставит воспроизведение на паузу.
+        """
+        self._paused = self._playing
+
+    def unpause(self):
+        """
+        Снимает воспроизведение с паузы.
+        """
+        self._paused = False
+
+    def stop(self):
+        """
+        Останавливает воспроизведение и очищает очередь.
+        """
+        self._interrupt()
+        self.queued = None
+
+    def _interrupt(self):
+        """
+        Прерывает текущий трек, сообщая о его конце, и начинает новое поколение.
+        """
+        if self._playing:
+            self._events.put((END, self._generation))
+        self._generation += 1
+        self._playing = False
+        self._paused = False
+
+    def set_pos(self, seconds):
+        """
+        Запоминает позицию перемотки.
+
+        Аргументы:
+            seconds (float): Позиция от начала трека в секундах.
+        """
+        self.position = seconds
+
+    def get_busy(self):
+        """
+        Проверяет, играет ли трек.
+
+        Возвращает:
+            bool: True, если трек играет и не стоит на паузе.
+        """
+        return self._playing and not self._paused
+
+    def finish(self):
+        """
+        Завершает текущий трек так, как это сделал бы микшер: начинает
+        трек из очереди, если он есть, и сообщает о конце трека.
+        """
+        if self.queued is not None:
+            self.path, self.queued = self.queued, None
+        else:
+            self._playing = False
+        self._events.put((END, self._generation))
+
+    def wait(self):
+        """
+        Ждёт конца трека или пробуждения, пропуская события прежних поколений.
+
+        Возвращает:
+            str: END или WAKE.
+        """
+        while True:
+            event = self._events.get()
+            if event == WAKE:
+                return WAKE
+            if event[1] == self._generation:
+                return END
+
+    def wake(self):
+        """
+        Будит поток, ожидающий в wait. Можно вызывать из любого потока.
+        """
+        self._events.put(WAKE)
+
+
+BACKENDS = {
+    'pygame': PygameBackend,
+    'null': NullBackend,
+}
+
+
+class MusicPlayerThread(threading.Thread):
+    """
+    Долгоживущий поток воспроизведения, управляемый очередью команд.
+
+    Поток создаётся звуковым движком, один на процесс. Он спит в
+    backend.wait() до события конца трека END или пробуждения WAKE,
+    которое отправляется вместе с каждой командой. Все команды,
+    накопившиеся к моменту пробуждения, выполняются пачкой: из подряд идущих
+    команд play загружается только последняя, поэтому десять быстрых нажатий
+    «следующий трек» приводят к одной загрузке файла.
+
+    Пока играет трек, следующий за ним трек плейлиста заранее передаётся
+    бэкенду через backend.queue, и бэкенд начинает его без паузы. Вместе с
+    треком передаётся его длительность, если она уже известна, чтобы бэкенд
+    спал до конца трека, а не опрашивал микшер.
+    При правке плейлиста поток получает команду preload и ставит в очередь
+    новый следующий трек.
+
+    Если движок передал кэш декодированного звука, треки загружаются из него.
+    Следующий трек при промахе ставится на фоновое декодирование и, когда
+    оно закончится, заново передаётся в очередь бэкенда уже из кэша. Трек,
+    который при промахе играет прямо с диска, одновременно не декодируется:
+    он ставится в кэш, когда перестаёт играть, чтобы возврат к нему тоже
+    обходился без диска.
+    Если есть кэш перекодирования, вместо сжатых файлов загружаются их
+    копии в WAV, а отсутствующие копии заказываются пулу процессов.
+
+    Атрибуты:
+        backend (PygameBackend или NullBackend): Звуковой бэкенд.
+        cache (AudioCache): Кэш декодированного звука или None.
+        transcoder (TranscodeCache): Кэш перекодирования или None.
+        playlist (PlayList): Плейлист, из которого играет трек, или None.
+        track_item (LinkedListItem): Загруженный трек или None, если
+            воспроизведение остановлено.
+        paused (bool): Флаг паузы.
+        queued (LinkedListItem): Трек, переданный бэкенду в очередь, или None.
+        _queued_decoded (bool): Флаг того, что трек из очереди передан из кэша.
+        _streamed (str): Путь трека, который играет с диска мимо кэша, или None.
+        _commands (queue.SimpleQueue): Очередь команд (имя, аргументы).
+    """
+
+    def __init__(self, backend, cache=None, transcoder=None):
+        """
+        Инициализирует поток воспроизведения.
+
+        Аргументы:
+            backend (PygameBackend или NullBackend): Инициализированный звуковой бэкенд.
+            cache (AudioCache, опционально): Кэш декодированного звука.
+            transcoder (TranscodeCache, опционально): Кэш перекодирования.
+        """
+        super().__init__(name='music-player', daemon=True)
+        self.backend = backend
+        self.cache = cache
+        self.transcoder = transcoder
+        self.playlist = None
+        self.track_item = None
+        self.paused = False
+        self.queued = None
+        self._queued_decoded = False
+        self._streamed = None
+        self._commands = queue.SimpleQueue()
+        if cache is not None:
+            cache.decoded = self._decoded
+
+    def send(self, command, *args):
+        """
+        Ставит команду в очередь и будит поток.
+
+        Аргументы:
+            command (str): Имя команды: play, preload, pause, resume, stop, seek или quit.
+            *args: Аргументы команды.
+        """
+        self._commands.put((command, args))
+        self.backend.wake()
+
+    def play(self, playlist, track_item):
+        """
+        Запускает воспроизведение трека плейлиста.
+
+        Аргументы:
+            playlist (PlayList): Плейлист с треком.
+            track_item (LinkedListItem): Узел плейлиста с треком.
+        """
+        self.send('play', playlist, track_item)
+
+    def preload(self):
+        """
+        Заново ставит в очередь микшера трек, следующий за текущим.
+        """
+        self.send('preload')
+
+    def pause(self):
+        """
+        Ставит воспроизведение на паузу.
+        """
+        self.send('pause')
+
+    def resume(self):
+        """
+        Снимает воспроизведение с паузы.
+        """
+        self.send('resume')
+
+    def stop(self):
+        """
+        Останавливает воспроизведение.
+        """
+        self.send('stop')
+
+    def seek(self, seconds):
+        """
+        Перематывает текущий трек.
+
+        Аргументы:
+            seconds (float): Позиция от начала трека в секундах.
+        """
+        self.send('seek', seconds)
+
+    def quit(self):
+        """
+        Останавливает воспроизведение и завершает поток.
+        """
+        self.send('quit')
+
+    def run(self):
+        """
+        Метод, запускаемый при старте потока.
+        Ждёт событий бэкенда и выполняет команды до команды quit.
+        """
+        while True:
+            event = self.backend.wait()
+            if event == END:
+                self._track_ended()
+            elif event == WAKE and not self._execute(self._drain()):
+                break
+
+    def _drain(self):
+        """
+        Забирает из очереди все накопившиеся команды.
+
+        Возвращает:
+            list: Команды в порядке поступления.
+        """
+        commands = []
+        while True:
+            try:
+                commands.append(self._commands.get_nowait())
+            except queue.Empty:
+                return commands
+
+    def _execute(self, commands):
+        """
+        Выполняет пачку команд, откладывая загрузку трека до последней команды
+        play, а постановку следующего трека в очередь — до конца пачки.
+
+        Аргументы:
+            commands (list): Команды (имя, аргументы).
+
+        Возвращает:
+            bool: False, если получена команда quit.
+        """
+        pending = None
+        preload = False
+        for command, args in commands:
+            if command == 'play':
+                pending = args
+                continue
+            if command == 'preload':
+                preload = True
+                continue
+            if command in ('stop', 'quit'):
+                pending = None
+            elif pending is not None:
+                self._load(*pending)
+                pending = None
+            getattr(self, '_on_' + command)(*args)
+            if command == 'quit':
+                return False
+        if pending is not None:
+            self._load(*pending)
+        elif preload:
+            self._queue_next()
+        return True
+
+    def _load(self, playlist, track_item):
+        """
+        Загружает трек в бэкенд и начинает воспроизведение.
+
+        Аргументы:
+            playlist (PlayList): Плейлист с треком.
+            track_item (LinkedListItem): Узел плейлиста с треком.
+        """
+        self._cache_streamed()
+        self.playlist = playlist
+        self.track_item = track_item
+        self.paused = False
+        self.queued = None
+        path = track_item.data.path
+        source = self._source(path, prefetch=False)
+        try:
+            self.backend.load(source, track_item.data.known_duration)
+        except AudioError as error:
+            print(f"Не удалось загрузить трек {track_item.data}: {error}")
+            self._on_stop()
+            return
+        if self.cache is not None and not isinstance(source, bytes):
+            self._streamed = path
+        self.backend.play()
+        self._queue_next()
+
+    def _source(self, path, prefetch=True):
+        """
+        Возвращает источник звука для бэкенда: данные из кэша, перекодированный
+        файл или исходный путь.
+
+        При промахе файл ставится на фоновое декодирование, чтобы следующая
+        загрузка этого трека обошлась без чтения диска, и на перекодирование.
+
+        Аргументы:
+            path (str): Путь к файлу.
+            prefetch (bool, опционально): Ставить ли файл на декодирование при
+                промахе. Трек, который сейчас начнёт играть с диска, не
+                декодируется, чтобы не читать и не декодировать его дважды.
+                По умолчанию True.
+
+        Возвращает:
+            str или bytes: Декодированные данные или путь.
+        """
+        if self.cache is not None:
+            data = self.cache.get(path)
+            if data is not None:
+                return data
+            if prefetch:
+                self.cache.prefetch(path)
+        if self.transcoder is not None:
+            transcoded = self.transcoder.lookup(path)
+            if transcoded is not None:
+                return transcoded
+            self.transcoder.submit(path)
+        return path
+
+    def _queue_next(self):
+        """
+        Передаёт бэкенду в очередь трек, следующий за текущим.
+
+        Очередь бэкенда нельзя очистить, только заменить, поэтому если
+        следующего трека нет, в очереди остаётся прежний, а _track_ended
+        исправит переход, когда он начнётся. Трек, поставленный в очередь
+        с диска, заменяется данными из кэша, когда они готовы.
+        """
+        if self.track_item is None:
+            return
+        following = self.playlist.following()
+        if following is None:
+            return
+        if following is self.queued and (
+                self._queued_decoded or self.cache is None
+                or following.data.path not in self.cache):
+            return
+        source = self._source(following.data.path)
+        try:
+            self.backend.queue(source, following.data.known_duration)
+        except AudioError:
+            return  # Файл не открылся: трек загрузится обычным образом
+        self.queued = following
+        self._queued_decoded = isinstance(source, bytes)
+
+    def _decoded(self, path):
+        """
+        Просит заново поставить в очередь следующий трек, когда кэш его декодировал.
+
+        Вызывается фоновым потоком кэша.
+
+        Аргументы:
+            path (str): Путь декодированного файла.
+        """
+        queued = self.queued
+        if queued is not None and queued.data.path == path:
+            self.preload()
+
+    def _cache_streamed(self):
+        """
+        Ставит на декодирование трек, который доиграл с диска мимо кэша.
+        """
+        if self._streamed is not None:
+            self.cache.prefetch(self._streamed)
+            self._streamed = None
+
+    def _on_pause(self):
+        """
+        Ставит воспроизведение на паузу.
+        """
+        if self.track_item is not None:
+            self.backend.pause()
+            self.paused = True
+
+    def _on_resume(self):
+        """
+        Снимает воспроизведение с паузы.
+        """
+        if self.track_item is not None:
+            self.backend.unpause()
+            self.paused = False
+
+    def _on_stop(self):
+        """
+        Останавливает воспроизведение.
+        """
+        self._cache_streamed()
+        self.playlist = None
+        self.track_item = None
+        self.paused = False
+        self.queued = None
+        self.backend.stop()
+
+    def _on_seek(self, seconds):
+        """
+        Перематывает загруженный трек.
+
+        Аргументы:
+            seconds (float): Позиция от начала трека в секундах.
+        """
+        if self.track_item is None:
+            return
+        try:
+            self.backend.set_pos(seconds)
+        except AudioError:
+            print(f"Перемотка не поддерживается для трека: {self.track_item.data}")
+
+    def _on_quit(self):
+        """
+        Останавливает воспроизведение перед завершением потока.
+        """
+        self._on_stop()
+
+    def _track_ended(self):
+        """
+        Переходит к следующему треку плейлиста, когда текущий доиграл.
+
+        Если бэкенд уже начал трек из очереди и это тот трек, что следует
+        по плейлисту, повторная загрузка не нужна. О конце остановленного
+        или заменённого трека бэкенд не сообщает.
+        """
+        playlist = self.playlist
+        if playlist is None or self.paused or playlist.is_stopped:
+            return
+        queued, self.queued = self.queued, None
+        try:
+            track_item = playlist.advance(1)
+        except ValueError:
+            self._on_stop()  # Плейлист опустел во время воспроизведения
+            return
+        print(f"Сейчас проигрывается трек: {track_item.data}")
+        if track_item is queued:
+            self._cache_streamed()
+            if not self._queued_decoded and self.cache is not None:
+                self._streamed = track_item.data.path
+            self.track_item = track_item
+            self._queue_next()
+        else:
+            self._load(playlist, track_item)
+
+
+class AudioEngine:
+    """
+    Звуковой движок: настройки, бэкенд и поток воспроизведения.
+
+    Бэкенд и поток создаются при первом обращении, до этого настройки
+    можно менять методом configure.
+
+    Атрибуты:
+        backend_name (str): Имя бэкенда из BACKENDS.
+        frequency (int): Частота дискретизации в герцах.
+        buffer (int): Размер буфера в сэмплах; меньший буфер снижает задержку.
+        cache_budget (int): Бюджет кэша декодированного звука в байтах, 0 отключает кэш.
+        transcode_dir (str): Каталог кэша перекодирования или None, если он отключён.
+        transcode_limit (int): Лимит размера кэша перекодирования в байтах.
+        _backend (PygameBackend или NullBackend): Бэкенд или None до первого обращения.
+        _player (MusicPlayerThread): Поток воспроизведения или None до первого обращения.
+        _cache (AudioCache): Кэш декодированного звука или None.
+        _transcoder (TranscodeCache): Кэш перекодирования или None.
+        _lock (threading.Lock): Блокировка ленивой инициализации.
+    """
+
+    def __init__(self, backend='pygame', frequency=44100, buffer=512,
+                 cache_budget=0, transcode_dir=None,
+                 transcode_limit=2 * 2 ** 30):
+        """
+        Инициализирует движок, не открывая звуковое устройство.
+
+        Аргументы:
+            backend (str, опционально): Имя бэкенда. По умолчанию 'pygame'.
+            frequency (int, опционально): Частота дискретизации. По умолчанию 44100.
+            buffer (int, опционально): Размер буфера в сэмплах. По умолчанию 512.
+            cache_budget (int, опционально): Бюджет кэша декодированного звука
+                в байтах. По умолчанию 0 — кэш отключён.
+            transcode_dir (str, опционально): Каталог кэша перекодирования.
+                По умолчанию None — перекодирование отключено.
+            transcode_limit (int, опционально): Лимит размера кэша
+                перекодирования в байтах. По умолчанию 2 ГиБ.
+        """
+        self.backend_name = backend
+        self.frequency = frequency
+        self.buffer = buffer
+        self.cache_budget = cache_budget
+        self.transcode_dir = transcode_dir
+        self.transcode_limit = transcode_limit
+        self._backend = None
+        self._player = None
+        self._cache = None
+        self._transcoder = None
+        self._lock = threading.Lock()
+
+    def configure(self, backend=None, frequency=None, buffer=None, cache_budget=None,
+                  transcode_dir=None, transcode_limit=None):
+        """
+        Меняет настройки движка до первого воспроизведения.
+
+        Аргументы:
+            backend (str, опционально): Имя бэкенда.
+            frequency (int, опционально): Частота дискретизации.
+            buffer (int, опционально): Размер буфера в сэмплах.
+            cache_budget (int, опционально): Бюджет кэша декодированного звука.
+            transcode_dir (str, опционально): Каталог кэша перекодирования.
+            transcode_limit (int, опционально): Лимит размера кэша перекодирования.
+
+        Выбрасывает:
+            ValueError: Если бэкенд с таким именем не существует.
+            RuntimeError: Если движок уже запущен.
+        """
+        with self._lock:
+            if self._backend is not None:
+                raise RuntimeError("Звуковой движок уже запущен, сначала вызовите shutdown().")
+            if backend is not None:
+                if backend not in BACKENDS:
+                    raise ValueError(f"Неизвестный звуковой бэкенд: {backend}")
+                self.backend_name = backend
+            if frequency is not None:
+                self.frequency = frequency
+            if buffer is not None:
+                self.buffer = buffer
+            if cache_budget is not None:
+                self.cache_budget = cache_budget
+            if transcode_dir is not None:
+                self.transcode_dir = transcode_dir
+            if transcode_limit is not None:
+                self.transcode_limit = transcode_limit
+
+    @property
+    def started(self):
+        """
+        Проверяет, запущен ли поток воспроизведения.
+
+        Возвращает:
+            bool: True, если поток воспроизведения создан.
+        """
+        return self._player is not None
+
+    @property
+    def backend(self):
+        """
+        Возвращает бэкенд, открывая звуковое устройство при первом обращении.
+
+        Возвращает:
+            PygameBackend или NullBackend: Бэкенд движка.
+        """
+        with self._lock:
+            if self._backend is None:
+                backend = BACKENDS[self.backend_name]()
+                backend.init(self.frequency, self.buffer)
+                self._backend = backend
+            return self._backend
+
+    @property
+    def cache(self):
+        """
+        Возвращает кэш декодированного звука, создавая его при первом обращении.
+
+        Возвращает:
+            AudioCache: Кэш или None, если бюджет кэша равен нулю.
+        """
+        backend = self.backend
+        with self._lock:
+            if self._cache is None and self.cache_budget > 0:
+                self._cache = AudioCache(backend.decode, self.cache_budget)
+            return self._cache
+
+    @property
+    def transcoder(self):
+        """
+        Возвращает кэш перекодирования, создавая его при первом обращении.
+
+        Возвращает:
+            TranscodeCache: Кэш или None, если каталог кэша не задан.
+        """
+        with self._lock:
+            if self._transcoder is None and self.transcode_dir is not None:
+                self._transcoder = TranscodeCache(
+                    self.transcode_dir, self.transcode_limit, self.frequency)
+            return self._transcoder
+
+    @property
+    def player(self):
+        """
+        Возвращает поток воспроизведения, запуская его при первом обращении.
+
+        Возвращает:
+            MusicPlayerThread: Поток воспроизведения.
+        """
+        backend = self.backend
+        cache = self.cache
+        transcoder = self.transcoder
+        with self._lock:
+            if self._player is None or not self._player.is_alive():
+                self._player = MusicPlayerThread(backend, cache, transcoder)
+                self._player.start()
+            return self._player
+
+    @property
+    def running_player(self):
+        """
+        Возвращает поток воспроизведения, не запуская его.
+
+        Возвращает:
+            MusicPlayerThread: Поток воспроизведения или None.
+        """
+        return self._player
+
+    def shutdown(self):
+        """
+        Останавливает поток воспроизведения и закрывает устройство.
+
+        После вызова движок можно перенастроить; следующее воспроизведение
+        запустит его заново.
+        """
+        with self._lock:
+            player, backend, transcoder = self._player, self._backend, self._transcoder
+            self._player = self._backend = self._cache = self._transcoder = None
+        if player is not None and player.is_alive():
+            player.quit()
+            player.join()
+        if transcoder is not None:
+            transcoder.shutdown()
+        if backend is not None:
+            backend.quit()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Возвращает звуковой движок процесса, создавая его при первом обращении.
+
+    Бэкенд по умолчанию можно задать переменной окружения AUDIO_BACKEND.
+
+    Возвращает:
+        AudioEngine: Звуковой движок.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AudioEngine(backend=os.environ.get('AUDIO_BACKEND', 'pygame'))
+        return _engine
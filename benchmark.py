@@ -0,0 +1,221 @@
+"""Замеры производительности структур данных плеера.
+
+Запуск: python benchmark.py [количество узлов]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import wave
+
+from array_list import ArrayLinkedList
+from linked_list import LinkedList, LinkedListItem
+
+
+class _DictItem(LinkedListItem):
+    """Узел с __dict__, как до перехода на __slots__ (для сравнения)."""
+
+
+class _DictLinkedList(LinkedList):
+    """Список на узлах с __dict__ (для сравнения)."""
+
+    def _new_node(self, data):
+        """
+        Создаёт узел с __dict__.
+
+        Аргументы:
+            data (любой тип): Данные узла.
+
+        Возвращает:
+            _DictItem: Новый узел.
+        """
+        return _DictItem(data)
+
+
+BACKENDS = [
+    ('dict nodes', _DictLinkedList),
+    ('slotted nodes', LinkedList),
+    ('array pool', ArrayLinkedList),
+]
+
+
+def bench_backends(count):
+    """
+    Сравнивает расход памяти на узел и скорость обхода для разных хранилищ.
+
+    Аргументы:
+        count (int): Количество узлов в списке.
+
+    Возвращает:
+        list: Строки таблицы (имя, байт на узел, мс на обход узлов,
+            мс на обратный обход данных).
+    """
+    rows = []
+    for name, backend in BACKENDS:
+        tracemalloc.start()
+        linked_list = backend()
+        for i in range(count):
+            linked_list.append(i)
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for node in linked_list:
+            node.data
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in reversed(linked_list):
+            pass
+        elapsed_reversed = time.perf_counter() - start
+        rows.append((name, used / count, elapsed * 1000, elapsed_reversed * 1000))
+        del linked_list
+    return rows
+
+
+def bench_playlists(count=500, tracks=20):
+    """
+    Измеряет создание плейлистов без звукового устройства.
+
+    Аргументы:
+        count (int, опционально): Количество плейлистов. По умолчанию 500.
+        tracks (int, опционально): Треков в плейлисте. По умолчанию 20.
+
+    Возвращает:
+        float: Миллисекунд на плейлист.
+    """
+    from playlist import Composition, PlayList
+
+    start = time.perf_counter()
+    for i in range(count):
+        PlayList.from_iterable(
+            (Composition(f'{i}-{j}', f'/music/{i}/{j}.mp3') for j in range(tracks)), str(i))
+    return (time.perf_counter() - start) / count * 1000
+
+
+def _write_silence(path, seconds, rate=22050):
+    """
+    Записывает WAV-файл с тишиной.
+
+    Аргументы:
+        path (str): Путь к файлу.
+        seconds (float): Длительность в секундах.
+        rate (int, опционально): Частота дискретизации. По умолчанию 22050.
+    """
+    with wave.open(path, 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(bytes(2 * int(rate * seconds)))
+
+
+class _CountingBackend:
+    """Примесь к PygameBackend, считающая проверки микшера (для замера)."""
+
+    checks = 0
+
+    def _timeout(self):
+        """
+        Считает ожидания с таймаутом, после которых wait проверяет микшер.
+
+        Возвращает:
+            float: Таймаут в секундах или None.
+        """
+        timeout = super()._timeout()
+        if timeout is not None:
+            self.checks += 1
+        return timeout
+
+
+def bench_track_gap(tracks=10, seconds=0.23):
+    """
+    Измеряет переход между треками при опросе микшера раз в 100 мс и в
+    потоке воспроизведения MusicPlayerThread с бэкендом PygameBackend.
+
+    Проигрывает подряд tracks коротких треков. Звуковой драйвер отдаёт звук
+    блоками, поэтому фактическая длительность трека отличается от записанной;
+    паузу каждого способа считаем относительно самого быстрого. Кроме
+    времени считается, сколько раз за трек поток просыпается проверить микшер.
+
+    Аргументы:
+        tracks (int, опционально): Количество треков. По умолчанию 10.
+        seconds (float, опционально): Длительность трека. По умолчанию 0.23.
+
+    Возвращает:
+        list: Строки таблицы (способ, мс на трек, пауза относительно
+            самого быстрого способа в мс, проверок микшера на трек).
+    """
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+
+    from audio_engine import MusicPlayerThread, PygameBackend
+    from linked_list import ListObserver
+    from playlist import Composition, PlayList
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'silence.wav')
+        _write_silence(path, seconds)
+
+        pygame.mixer.init()
+        checks = 0
+        start = time.perf_counter()
+        for _ in range(tracks):
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.play()
+            while pygame.mixer.music.get_busy():
+                checks += 1
+                time.sleep(0.1)
+        elapsed = time.perf_counter() - start
+        rows.append(('опрос 100 мс', elapsed / tracks * 1000, checks / tracks))
+        pygame.mixer.quit()
+
+        backend = type('CountingBackend', (_CountingBackend, PygameBackend), {})()
+        backend.init(44100, 512)
+        player = MusicPlayerThread(backend)
+        player.start()
+        playlist = PlayList.from_iterable(
+            (Composition(str(i), path) for i in range(tracks)), 'gap')
+        finished = threading.Event()
+        observer = ListObserver()
+        observer.current_changed = lambda node: node is playlist.first_item and finished.set()
+        playlist.set_current(playlist.first_item)
+        playlist.subscribe(observer)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            player.play(playlist, playlist.first_item)
+            # Плейлист закольцован: последний трек доиграл, когда текущим снова стал первый
+            finished.wait()
+            elapsed = time.perf_counter() - start
+            player.quit()
+            player.join()
+        backend.quit()
+        rows.append(('поток плеера', elapsed / tracks * 1000, backend.checks / tracks))
+    fastest = min(per_track for _, per_track, _ in rows)
+    return [(name, per_track, per_track - fastest, checks) for name, per_track, checks in rows]
+
+
+def main():
+    """
+    Печатает результаты замеров.
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"Узлов: {count}")
+    print(f"{'хранилище':<15}{'байт/узел':>12}{'обход, мс':>12}{'reversed, мс':>14}")
+    for name, per_node, elapsed, elapsed_reversed in bench_backends(count):
+        print(f"{name:<15}{per_node:>12.1f}{elapsed:>12.1f}{elapsed_reversed:>14.1f}")
+    print()
+    print(f"Создание плейлиста без звукового устройства: {bench_playlists():.2f} мс")
+    print()
+    print(f"{'переход между треками':<22}{'мс/трек':>10}{'пауза, мс':>12}{'проверок/трек':>15}")
+    for name, per_track, gap, checks in bench_track_gap():
+        print(f"{name:<22}{per_track:>10.1f}{gap:>12.1f}{checks:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
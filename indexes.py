@@ -0,0 +1,403 @@
+import random
+
+
+class HashIndex:
+    """Хеш-индекс, сопоставляющий ключ данных узла самим узлам списка.
+
+    Индекс поддерживается связным списком при каждом изменении, поэтому
+    проверка наличия, поиск и удаление по ключу выполняются в среднем за O(1).
+    Ключ данных не должен меняться, пока узел находится в списке.
+
+    Атрибуты:
+        key (callable или None): Функция, вычисляющая ключ по данным узла.
+            Если None, ключом служат сами данные.
+        _buckets (dict): Словарь ключ -> узлы с этим ключом в порядке добавления.
+    """
+
+    def __init__(self, key=None):
+        """
+        Инициализирует пустой индекс.
+
+        Аргументы:
+            key (callable, опционально): Функция вычисления ключа. По умолчанию None.
+        """
+        self.key = key
+        self._buckets = {}
+
+    def key_of(self, data):
+        """
+        Вычисляет ключ индекса для данных узла.
+
+        Аргументы:
+            data (любой тип): Данные узла.
+
+        Возвращает:
+            любой тип: Ключ индекса.
+        """
+        if self.key is None:
+            return data
+        return self.key(data)
+
+    def add(self, node):
+        """
+        Добавляет узел в индекс.
+
+        Аргументы:
+            node (LinkedListItem): Узел списка.
+        """
+        self._buckets.setdefault(self.key_of(node.data), {})[node] = None
+
+    def discard(self, node):
+        """
+        Удаляет узел из индекса, если он там есть.
+
+        Аргументы:
+            node (LinkedListItem): Узел списка.
+        """
+        key = self.key_of(node.data)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        bucket.pop(node, None)
+        if not bucket:
+            del self._buckets[key]
+
+    def nodes(self, value):
+        """
+        Возвращает узлы с заданным ключом в порядке их добавления в индекс.
+
+        Аргументы:
+            value (любой тип): Ключ.
+
+        Возвращает:
+            list: Список узлов (пустой, если ключ не найден).
+        """
+        return list(self._buckets.get(value, ()))
+
+    def count(self, value):
+        """
+        Возвращает количество узлов с заданным ключом.
+
+        Аргументы:
+            value (любой тип): Ключ.
+
+        Возвращает:
+            int: Количество узлов.
+        """
+        return len(self._buckets.get(value, ()))
+
+    def clear(self):
+        """
+        Очищает индекс.
+        """
+        self._buckets.clear()
+
+    def __contains__(self, value):
+        """
+        Проверяет, есть ли в индексе узлы с заданным ключом.
+
+        Аргументы:
+            value (любой тип): Ключ.
+
+        Возвращает:
+            bool: True, если ключ найден, иначе False.
+        """
+        return value in self._buckets
+
+    def __len__(self):
+        """
+        Возвращает количество различных ключей в индексе.
+
+        Возвращает:
+            int: Количество ключей.
+        """
+        return len(self._buckets)
+
+
+class _RankNode:
+    """Узел декартова дерева по неявному ключу (позиции в списке).
+
+    Атрибуты:
+        item (LinkedListItem): Узел связного списка.
+        priority (float): Случайный приоритет узла.
+        size (int): Количество узлов в поддереве.
+        left (_RankNode): Левое поддерево.
+        right (_RankNode): Правое поддерево.
+        parent (_RankNode): Родитель.
+    """
+
+    __slots__ = ('item', 'priority', 'size', 'left', 'right', 'parent')
+
+    def __init__(self, item):
+        """
+        Инициализирует лист дерева.
+
+        Аргументы:
+            item (LinkedListItem): Узел связного списка.
+        """
+        self.item = item
+        self.priority = random.random()
+        self.size = 1
+        self.left = None
+        self.right = None
+        self.parent = None
+
+
+def _size(tree):
+    """
+    Возвращает размер поддерева.
+
+    Аргументы:
+        tree (_RankNode или None): Поддерево.
+
+    Возвращает:
+        int: Количество узлов.
+    """
+    return tree.size if tree is not None else 0
+
+
+def _update(tree):
+    """
+    Пересчитывает размер узла и ссылки детей на родителя.
+
+    Аргументы:
+        tree (_RankNode): Узел дерева.
+    """
+    tree.size = 1
+    if tree.left is not None:
+        tree.size += tree.left.size
+        tree.left.parent = tree
+    if tree.right is not None:
+        tree.size += tree.right.size
+        tree.right.parent = tree
+
+
+def _split(tree, count):
+    """
+    Делит дерево на первые count узлов и остальные.
+
+    Аргументы:
+        tree (_RankNode или None): Дерево.
+        count (int): Количество узлов в левой части.
+
+    Возвращает:
+        tuple: Левое и правое деревья.
+    """
+    if tree is None:
+        return None, None
+    if _size(tree.left) >= count:
+        left, tree.left = _split(tree.left, count)
+        _update(tree)
+        if left is not None:
+            left.parent = None
+        return left, tree
+    tree.right, right = _split(tree.right, count - _size(tree.left) - 1)
+    _update(tree)
+    if right is not None:
+        right.parent = None
+    return tree, right
+
+
+def _merge(left, right):
+    """
+    Склеивает два дерева, сохраняя порядок: сначала left, затем right.
+
+    Аргументы:
+        left (_RankNode или None): Левое дерево.
+        right (_RankNode или None): Правое дерево.
+
+    Возвращает:
+        _RankNode или None: Корень склеенного дерева.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+class OrderIndex:
+    """Индекс позиций узлов списка на основе декартова дерева по неявному ключу.
+
+    Дерево хранит узлы списка в порядке обхода кольца от первого узла,
+    поэтому доступ по позиции, вычисление позиции узла, вставка и удаление
+    выполняются в среднем за O(log n).
+
+    Атрибуты:
+        _root (_RankNode): Корень дерева.
+        _nodes (dict): Словарь узел списка -> узел дерева.
+    """
+
+    def __init__(self, items=()):
+        """
+        Инициализирует индекс и строит его по последовательности узлов за O(n).
+
+        Аргументы:
+            items (iterable, опционально): Узлы списка в порядке следования.
+        """
+        self._root = None
+        self._nodes = {}
+        self.build(items)
+
+    def build(self, items):
+        """
+        Перестраивает индекс по последовательности узлов за O(n).
+
+        Аргументы:
+            items (iterable): Узлы списка в порядке следования.
+        """
+        self._nodes = {}
+        stack = []
+        for item in items:
+            node = _RankNode(item)
+            self._nodes[item] = node
+            last = None
+            while stack and stack[-1].priority < node.priority:
+                last = stack.pop()
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        self._root = stack[0] if stack else None
+        # Размеры поддеревьев считаются обратным обходом без рекурсии
+        order = []
+        pending = [self._root] if self._root is not None else []
+        while pending:
+            node = pending.pop()
+            order.append(node)
+            if node.left is not None:
+                pending.append(node.left)
+            if node.right is not None:
+                pending.append(node.right)
+        for node in reversed(order):
+            _update(node)
+        if self._root is not None:
+            self._root.parent = None
+
+    def insert(self, position, item):
+        """
+        Вставляет узел списка на позицию position.
+
+        Аргументы:
+            position (int): Позиция от 0 до len(self) включительно.
+            item (LinkedListItem): Узел списка.
+        """
+        node = _RankNode(item)
+        self._nodes[item] = node
+        left, right = _split(self._root, position)
+        self._root = _merge(_merge(left, node), right)
+        self._root.parent = None
+
+    def remove(self, item):
+        """
+        Удаляет узел списка из индекса.
+
+        Аргументы:
+            item (LinkedListItem): Узел списка.
+
+        Выбрасывает:
+            KeyError: Если узел отсутствует в индексе.
+        """
+        position = self.rank(item)
+        del self._nodes[item]
+        left, right = _split(self._root, position)
+        _, right = _split(right, 1)
+        self._root = _merge(left, right)
+        if self._root is not None:
+            self._root.parent = None
+
+    def rotate(self, count):
+        """
+        Переносит первые count узлов в конец индекса за O(log n).
+
+        Аргументы:
+            count (int): Количество узлов от 0 до len(self).
+        """
+        left, right = _split(self._root, count)
+        self._root = _merge(right, left)
+        if self._root is not None:
+            self._root.parent = None
+
+    def move_range(self, start, count, position):
+        """
+        Переносит count узлов, начиная с позиции start, на позицию position за O(log n).
+
+        Аргументы:
+            start (int): Позиция первого переносимого узла.
+            count (int): Количество переносимых узлов.
+            position (int): Позиция блока среди оставшихся узлов.
+        """
+        left, rest = _split(self._root, start)
+        block, right = _split(rest, count)
+        left, right = _split(_merge(left, right), position)
+        self._root = _merge(_merge(left, block), right)
+        self._root.parent = None
+
+    def rank(self, item):
+        """
+        Возвращает позицию узла списка.
+
+        Аргументы:
+            item (LinkedListItem): Узел списка.
+
+        Возвращает:
+            int: Позиция узла.
+
+        Выбрасывает:
+            KeyError: Если узел отсутствует в индексе.
+        """
+        node = self._nodes[item]
+        position = _size(node.left)
+        while node.parent is not None:
+            if node is node.parent.right:
+                position += _size(node.parent.left) + 1
+            node = node.parent
+        return position
+
+    def select(self, position):
+        """
+        Возвращает узел списка, стоящий на позиции position.
+
+        Аргументы:
+            position (int): Позиция от 0 до len(self) - 1.
+
+        Возвращает:
+            LinkedListItem: Узел списка.
+        """
+        node = self._root
+        while True:
+            left_size = _size(node.left)
+            if position < left_size:
+                node = node.left
+            elif position == left_size:
+                return node.item
+            else:
+                position -= left_size + 1
+                node = node.right
+
+    def __contains__(self, item):
+        """
+        Проверяет, есть ли узел списка в индексе.
+
+        Аргументы:
+            item (LinkedListItem): Узел списка.
+
+        Возвращает:
+            bool: True, если узел есть в индексе.
+        """
+        return item in self._nodes
+
+    def __len__(self):
+        """
+        Возвращает количество узлов в индексе.
+
+        Возвращает:
+            int: Количество узлов.
+        """
+        return len(self._nodes)
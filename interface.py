@@ -10,7 +10,65 @@
 
 from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtWidgets import QInputDialog, QMessageBox, QFileDialog
+import os
+from audio_engine import get_engine
+from library import LibraryImporter
 from playlist import *
+from playlist_model import PlaylistModel
+from storage import PlaylistRegistry, PlaylistStore, default_filename
+
+# Бюджет кэша декодированного звука: несколько недавних и следующих треков
+AUDIO_CACHE_BUDGET = 256 * 2 ** 20
+
+
+class ImportThread(QtCore.QThread):
+    """
+    Поток импорта каталога в плейлист, не блокирующий интерфейс.
+
+    Сигналы:
+        progress (int, int): Найдено файлов и добавлено треков после очередной пачки.
+    """
+
+    progress = QtCore.pyqtSignal(int, int)
+
+    def __init__(self, playlist, root):
+        """
+        Инициализирует поток импорта.
+
+        Аргументы:
+            playlist (PlayList): Плейлист, в который добавляются треки.
+            root (str): Корневой каталог.
+        """
+        super().__init__()
+        self.importer = LibraryImporter(playlist, root, progress=self.progress.emit)
+
+    def run(self):
+        """
+        Выполняет импорт.
+        """
+        self.importer.run()
+
+
+class MetadataThread(QtCore.QThread):
+    """
+    Поток чтения метаданных треков плейлиста, не блокирующий интерфейс.
+    """
+
+    def __init__(self, playlist):
+        """
+        Инициализирует поток чтения метаданных.
+
+        Аргументы:
+            playlist (PlayList): Плейлист, метаданные треков которого читаются.
+        """
+        super().__init__()
+        self.playlist = playlist
+
+    def run(self):
+        """
+        Читает метаданные треков, которые ещё не прочитаны.
+        """
+        self.playlist.scan_metadata()
 
 
 class Ui_MainWindow(object):
@@ -70,7 +128,7 @@ class Ui_MainWindow(object):
         self.tabWidget.addTab(self.tab_3, "")
         self.tab_2 = QtWidgets.QWidget()
         self.tab_2.setObjectName("tab_2")
-        self.listWidget_2 = QtWidgets.QListWidget(self.tab_2)
+        self.listWidget_2 = QtWidgets.QListView(self.tab_2)
         self.listWidget_2.setGeometry(QtCore.QRect(20, 50, 301, 351))
         self.listWidget_2.setObjectName("listWidget_2")
         self.verticalLayoutWidget_2 = QtWidgets.QWidget(self.tab_2)
@@ -85,6 +143,9 @@ class Ui_MainWindow(object):
         self.pushButton_8 = QtWidgets.QPushButton(self.verticalLayoutWidget_2)
         self.pushButton_8.setObjectName("pushButton_8")
         self.verticalLayout_2.addWidget(self.pushButton_8)
+        self.pushButton_16 = QtWidgets.QPushButton(self.verticalLayoutWidget_2)
+        self.pushButton_16.setObjectName("pushButton_16")
+        self.verticalLayout_2.addWidget(self.pushButton_16)
         self.pushButton_6 = QtWidgets.QPushButton(self.verticalLayoutWidget_2)
         self.pushButton_6.setObjectName("pushButton_6")
         self.verticalLayout_2.addWidget(self.pushButton_6)
@@ -139,9 +200,19 @@ class Ui_MainWindow(object):
         QtCore.QMetaObject.connectSlotsByName(MainWindow)
 
         self.tabWidget.setCurrentIndex(0)
-        self.list_of_playlists = []
-        self.listWidget.addItems(self.list_of_playlists)
+        self.listWidget_2.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.listWidget_2.setUniformItemSizes(True)
+        # Модель получает правки плейлиста и обновляет только затронутые строки
+        self.track_model = PlaylistModel()
+        self.listWidget_2.setModel(self.track_model)
+        # Названия плейлистов читаются сразу, треки — при первом открытии
+        self.store = PlaylistStore(default_filename(), journal=default_filename() + '.journal')
+        self.playlists = PlaylistRegistry(self.store)
+        self.listWidget.addItems(self.playlists.names())
         self.current_playlist = None
+        self.import_thread = None
+        self.metadata_thread = None
+        self.metadata_pending = None
         self.choiced_track = None
         # 1 окно
         self.pushButton.clicked.connect(self.create_playlist)
@@ -157,6 +228,7 @@ class Ui_MainWindow(object):
         self.pushButton_5.clicked.connect(self.to_play_music)
         self.pushButton_6.clicked.connect(self.delete_music)
         self.pushButton_8.clicked.connect(self.add_music_to_playlist)
+        self.pushButton_16.clicked.connect(self.import_folder)
         self.pushButton_7.clicked.connect(self.return_to_first_window_from_3)
         self.pushButton_4.clicked.connect(self.replace_track)
 
@@ -194,13 +266,14 @@ class Ui_MainWindow(object):
                     bool: True если плейлист успешно создан, False если возникли ошибки.
                 """
         user_input = self.get_user_input("Введите текст", "Введите название плейлиста:")
-        if user_input in [i.name for i in self.list_of_playlists]:
+        if user_input in self.playlists:
             self.show_error_message('Плейлист с таким названием существует')
             self.current_playlist = None
             self.listWidget_3.clear()
             return False
         if user_input:  # Если введён текст, добавляем его в список
             new_playlist = PlayList(user_input)
+            self.listWidget.insertItem(self.playlists.add(new_playlist), user_input)
             self.label_2.setText(f'Плейлист: {user_input}')
             self.tabWidget.setCurrentIndex(1)
             self.current_playlist = new_playlist
@@ -209,18 +282,19 @@ class Ui_MainWindow(object):
         else:
             self.show_error_message('Нельзя создать плейлист без названия')
 
-    def get_user_input(self, title, label):
+    def get_user_input(self, title, label, default=''):
         """
         Открывает диалоговое окно для ввода текста от пользователя.
 
         Аргументы:
             title (str): Заголовок окна диалога.
             label (str): Текстовое сообщение с запросом для пользователя.
+            default (str, опционально): Текст, которым заполнено поле ввода.
 
         Возвращает:
             str или bool: Введённый текст или False/None если ввод отменён.
         """
-        text, ok = QInputDialog.getText(MainWindow, title, label)
+        text, ok = QInputDialog.getText(MainWindow, title, label, text=default)
         if ok and text:  # Проверяем, нажал ли пользователь OK и ввёл ли текст
             return text
         elif not ok:
@@ -229,15 +303,18 @@ class Ui_MainWindow(object):
 
     def set_listwidget3_value(self):
         """
-        Очищает содержимое listWidget_3 и добавляет все треки текущего плейлиста.
+        Добавляет трек в текущий плейлист и строку с ним в listWidget_3.
+
+        Строка хранит ссылку на узел трека в роли UserRole.
 
         Возвращает:
             None
         """
         if self.add_to_playlist():
-            self.listWidget_3.clear()
-            for i in self.current_playlist:
-                self.listWidget_3.addItem(str(i.data))
+            node = self.current_playlist.last
+            item = QtWidgets.QListWidgetItem(str(node.data))
+            item.setData(QtCore.Qt.UserRole, node)
+            self.listWidget_3.addItem(item)
 
     def add_to_playlist(self):
         """
@@ -251,15 +328,14 @@ class Ui_MainWindow(object):
         """
         try:
             name, path = self.get_composition()
-            if len(self.current_playlist) > 0:
-                for i in self.current_playlist:
-                    if i.data.path == path:
-                        self.show_error_message('Выбранный файл добавлен в плейлист')
-                        return False
-                    elif i.data.title == name:
-                        self.show_error_message('Трек с таким названием уже есть в плейлисте')
-                        return False
+            if path in self.current_playlist.get_index('path'):
+                self.show_error_message('Выбранный файл добавлен в плейлист')
+                return False
+            if name in self.current_playlist.get_index('title'):
+                self.show_error_message('Трек с таким названием уже есть в плейлисте')
+                return False
             self.current_playlist.append(Composition(name, path))
+            self.scan_metadata(self.current_playlist)
             return True
         except:
             self.show_error_message('Трек не добавлен')
@@ -276,19 +352,15 @@ class Ui_MainWindow(object):
         selected_item = self.listWidget_3.currentItem()
 
         if selected_item:
-            for i in self.current_playlist:
-                if selected_item.text() == str(i.data):
-                    self.current_playlist.remove(i.data)
-                    break
-            self.listWidget_3.clear()
-            for i in self.current_playlist:
-                self.listWidget_3.addItem(str(i.data))
+            self.current_playlist.remove_node(selected_item.data(QtCore.Qt.UserRole))
+            self.listWidget_3.takeItem(self.listWidget_3.row(selected_item))
         else:
             self.show_error_message('Трек не выбран')
 
     def get_composition(self):
         """
         Открывает диалоговое окно для выбора MP3-файла и получения названия песни от пользователя.
+        Поле названия заполняется названием из тегов файла, если оно есть.
 
         Возвращает:
             tuple или None: Название трека и путь к файлу или None в случае ошибки.
@@ -304,8 +376,12 @@ class Ui_MainWindow(object):
 
         # Проверяем, был ли выбран файл
         if file_path:
-            # Получаем ввод пользователя для названия песни
-            song_name = self.get_user_input("Введите название песни", "Введите название песни:")
+            # Предлагаем название из тегов, если файл уже есть в кэше метаданных,
+            # иначе имя файла: теги читаются в фоне после добавления трека
+            info = get_scanner().lookup(file_path) or {}
+            default = info.get('title') or os.path.splitext(os.path.basename(file_path))[0]
+            song_name = self.get_user_input("Введите название песни", "Введите название песни:",
+                                            default)
 
             # Если введено название песни
             if song_name:
@@ -324,33 +400,26 @@ class Ui_MainWindow(object):
         """
         Возвращает интерфейс к списку плейлистов.
 
-        Очищает текущий плейлист и обновляет список всех плейлистов в listWidget.
+        Очищает текущий плейлист; созданный плейлист уже добавлен в listWidget.
 
         Возвращает:
             None
         """
-        self.list_of_playlists.append(self.current_playlist)
         self.current_playlist = None
-        self.listWidget.clear()
         self.listWidget_3.clear()
-        for i in self.list_of_playlists:
-            self.listWidget.addItem(i.name)
         self.tabWidget.setCurrentIndex(0)
 
     def return_to_first_window_from_3(self):
         """
         Возвращает интерфейс к списку плейлистов (аналогично return_to_first_window).
 
-        Очищает текущий плейлист и обновляет список всех плейлистов.
+        Очищает текущий плейлист.
 
         Возвращает:
             None
         """
         self.current_playlist = None
-        self.listWidget.clear()
         self.listWidget_3.clear()
-        for i in self.list_of_playlists:
-            self.listWidget.addItem(i.name)
         self.tabWidget.setCurrentIndex(0)
 
     def remove_playlist(self):
@@ -364,13 +433,8 @@ class Ui_MainWindow(object):
         """
         selected_item = self.listWidget.currentItem()
         if selected_item:
-            for i in self.list_of_playlists:
-                if selected_item.text() == i.name:
-                    self.list_of_playlists.remove(i)
-                    break
-            self.listWidget.clear()
-            for i in self.list_of_playlists:
-                self.listWidget.addItem(i.name)
+            self.playlists.remove(selected_item.text())
+            self.listWidget.takeItem(self.listWidget.row(selected_item))
         else:
             self.show_error_message('Плейлист не выбран')
 
@@ -378,24 +442,19 @@ class Ui_MainWindow(object):
         """
         Переключает интерфейс на работу с выбранным плейлистом.
 
-        Очищает содержимое listWidget_2 и добавляет треки выбранного плейлиста.
+        Показывает треки выбранного плейлиста в listWidget_2 через модель плейлиста.
 
         Возвращает:
             None
         """
         selected_item = self.listWidget.currentItem()
         if selected_item:
-            for i in self.list_of_playlists:
-                if selected_item.text() == i.name:
-                    self.current_playlist = i
-                    self.label.setText(f'Плейлист: {self.current_playlist.name}')
-                    self.tabWidget.setCurrentIndex(2)
-                    self.listWidget_2.clear()
-                    count = 0
-                    for j in self.current_playlist:
-                        count += 1
-                        self.listWidget_2.addItem(str(count) + ') ' + str(j.data))
-                    break
+            # Треки плейлиста загружаются из базы при первом открытии
+            self.current_playlist = self.playlists.open(selected_item.text())
+            self.label.setText(f'Плейлист: {self.current_playlist.name}')
+            self.tabWidget.setCurrentIndex(2)
+            self.track_model.set_playlist(self.current_playlist)
+            self.scan_metadata(self.current_playlist)
         else:
             self.show_error_message('Плейлист не выбран')
 
@@ -406,18 +465,14 @@ class Ui_MainWindow(object):
         Возвращает:
             None
         """
-        selected_item = self.listWidget_2.currentItem()
-
-        if selected_item:
-            for i in self.current_playlist:
-                if selected_item.text()[selected_item.text().index(' ') + 1:] == str(i.data):
-                    # self.choiced_track = i
-                    self.current_playlist._current = i
-                    self.tabWidget.setCurrentIndex(3)
-                    self.label_3.setText(f'Текущий трек: {str(self.current_playlist._current.data)}')
-                    self.current_playlist.is_stopped = False
-                    break
+        selected_item = self.listWidget_2.currentIndex()
 
+        if selected_item.isValid():
+            # Строка модели хранит сам узел трека, поэтому поиск по тексту не нужен
+            self.current_playlist.set_current(selected_item.data(PlaylistModel.NodeRole))
+            self.tabWidget.setCurrentIndex(3)
+            self.label_3.setText(f'Текущий трек: {str(self.current_playlist._current.data)}')
+            self.current_playlist.is_stopped = False
         else:
             self.show_error_message('Трек не выбран')
 
@@ -465,42 +520,102 @@ class Ui_MainWindow(object):
 
     def delete_music(self):
         """
-        Удаляет выбранный трек из текущего плейлиста.
+        Удаляет выбранные треки из текущего плейлиста.
 
+        Все выделенные треки удаляются одним пакетным вызовом.
         Если трек не выбран, показывается сообщение об ошибке.
 
         Возвращает:
             None
         """
-        selected_item = self.listWidget_2.currentItem()
-
-        if selected_item:
-            for i in self.current_playlist:
-                if selected_item.text()[selected_item.text().index(' ') + 1:] == str(i.data):
-                    self.current_playlist.remove(i.data)
-                    self.listWidget_2.clear()
-                    count = 0
-                    for j in self.current_playlist:
-                        count += 1
-                        self.listWidget_2.addItem(str(count) + ') ' + str(j.data))
-                    break
+        selected_items = self.listWidget_2.selectionModel().selectedRows()
 
+        if selected_items:
+            nodes = [index.data(PlaylistModel.NodeRole) for index in selected_items]
+            self.current_playlist.remove_many(nodes)
         else:
             self.show_error_message('Трек не выбран')
 
     def add_music_to_playlist(self):
         """
-        Добавляет выбранный трек в текущий плейлист и обновляет список треков.
+        Добавляет выбранный трек в текущий плейлист; модель сама добавит строку в список треков.
 
         Возвращает:
             None
         """
-        if self.add_to_playlist():
-            self.listWidget_2.clear()
-            count = 0
-            for j in self.current_playlist:
-                count += 1
-                self.listWidget_2.addItem(str(count) + ') ' + str(j.data))
+        self.add_to_playlist()
+
+    def import_folder(self):
+        """
+        Импортирует выбранный каталог в текущий плейлист в фоновом потоке.
+
+        Повторное нажатие во время импорта отменяет его.
+
+        Возвращает:
+            None
+        """
+        if self.import_thread is not None:
+            self.import_thread.importer.cancel()
+            return
+        root = QFileDialog.getExistingDirectory(None, "Выберите папку с музыкой")
+        if not root:
+            return
+        self.import_thread = ImportThread(self.current_playlist, root)
+        self.import_thread.progress.connect(self.show_import_progress)
+        self.import_thread.finished.connect(self.finish_import)
+        self.pushButton_16.setText('Отменить импорт')
+        self.import_thread.start()
+
+    def show_import_progress(self, found, added):
+        """
+        Показывает ход импорта в заголовке плейлиста.
+
+        Аргументы:
+            found (int): Найдено звуковых файлов.
+            added (int): Добавлено треков.
+        """
+        playlist = self.import_thread.importer.playlist
+        if playlist is self.current_playlist:
+            self.label.setText(f'Плейлист: {playlist.name} '
+                               f'(импорт: найдено {found}, добавлено {added})')
+
+    def finish_import(self):
+        """
+        Завершает импорт. Список треков обновляется моделью по ходу импорта.
+        """
+        importer = self.import_thread.importer
+        self.import_thread = None
+        self.pushButton_16.setText('Импортировать папку')
+        self.scan_metadata(importer.playlist)
+        if importer.playlist is self.current_playlist:
+            self.label.setText(f'Плейлист: {self.current_playlist.name}')
+        if importer.cancelled:
+            self.show_error_message(f'Импорт отменён, добавлено треков: {importer.added}')
+
+    def scan_metadata(self, playlist):
+        """
+        Читает метаданные треков плейлиста в фоновом потоке.
+
+        Если чтение уже идёт, плейлист сканируется после его завершения.
+
+        Аргументы:
+            playlist (PlayList): Плейлист.
+        """
+        if self.metadata_thread is not None:
+            self.metadata_pending = playlist
+            return
+        self.metadata_thread = MetadataThread(playlist)
+        self.metadata_thread.finished.connect(self.finish_metadata_scan)
+        self.metadata_thread.start()
+
+    def finish_metadata_scan(self):
+        """
+        Завершает чтение метаданных и запускает отложенное, если оно есть.
+        """
+        self.metadata_thread = None
+        playlist, self.metadata_pending = self.metadata_pending, None
+        if playlist is not None:
+            self.scan_metadata(playlist)
 
     def get_two_numbers(self, title, label1, label2):
         """
@@ -545,11 +660,16 @@ class Ui_MainWindow(object):
         Перемещает трек в плейлисте с одной позиции на другую.
 
         Запрашивает два числа: текущее и новое положение трека.
-        Если ввод корректен, трек перемещается.
+        Если ввод корректен, трек перемещается. Если выделено несколько
+        треков, они перемещаются одним блоком.
 
         Возвращает:
             None
         """
+        selected_rows = sorted(index.row() for index in self.listWidget_2.selectionModel().selectedRows())
+        if len(selected_rows) > 1:
+            self.replace_tracks_block(selected_rows)
+            return
         try:
             num1, num2 = self.get_two_numbers('Введите число', 'Порядковый номер трека, который вы хотите переместить',
                                               'Введите новый порядковый номер выбранного трека')
@@ -558,16 +678,31 @@ class Ui_MainWindow(object):
                 num1 -= 1
                 num2 -= 1
                 self.current_playlist.move(num1, num2)
-                self.listWidget_2.clear()
-                count = 0
-                for i in self.current_playlist:
-                    count += 1
-                    self.listWidget_2.addItem(str(count) + ') ' + str(i.data))
             else:
                 self.show_error_message('Неверный порядковый номер')
         except:
             self.show_error_message('Ошибка')
 
+    def replace_tracks_block(self, rows):
+        """
+        Перемещает блок подряд выделенных треков на новую позицию.
+
+        Аргументы:
+            rows (list): Отсортированные номера выделенных строк.
+
+        Возвращает:
+            None
+        """
+        if rows[-1] - rows[0] + 1 != len(rows):
+            self.show_error_message('Выделите подряд идущие треки')
+            return
+        new_number, ok = QInputDialog.getInt(MainWindow, 'Введите число',
+                                             'Новый порядковый номер первого выбранного трека',
+                                             rows[0] + 1, 1, len(self.current_playlist) - len(rows) + 1)
+        if not ok:
+            return
+        self.current_playlist.move_range(rows[0], rows[-1], new_number - 1)
+
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
         MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
@@ -582,6 +717,7 @@ class Ui_MainWindow(object):
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_3), _translate("MainWindow", "Tab 2"))
         self.pushButton_5.setText(_translate("MainWindow", "Воспроизвести все"))
         self.pushButton_8.setText(_translate("MainWindow", "Добавить трек"))
+        self.pushButton_16.setText(_translate("MainWindow", "Импортировать папку"))
         self.pushButton_6.setText(_translate("MainWindow", "Удалить трек"))
         self.pushButton_4.setText(_translate("MainWindow", "Изменить позицию трека"))
         self.pushButton_7.setText(_translate("MainWindow", "Перейти к плейлистам"))
@@ -599,7 +735,9 @@ if __name__ == "__main__":
     import sys
 
     app = QtWidgets.QApplication(sys.argv)
+    get_engine().configure(cache_budget=AUDIO_CACHE_BUDGET)
     MainWindow = QtWidgets.QMainWindow()
     ui = Ui_MainWindow(MainWindow)
+    app.aboutToQuit.connect(ui.store.close)
     MainWindow.show()
     sys.exit(app.exec_())
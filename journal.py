@@ -0,0 +1,338 @@
+"""Журнал предзаписи правок плейлистов.
+
+Каждая правка записывается в конец двоичного журнала отдельной записью:
+длина, CRC32 и содержимое. Записи копятся в памяти и сбрасываются на диск
+фоновым потоком с одним fsync на всё, что накопилось за окно группового
+коммита, поэтому серия из сотен правок стоит одного сброса на диск.
+При сбое теряются только записи последнего окна; оборванная запись в хвосте
+журнала отбрасывается при чтении по несовпадению длины или CRC.
+
+Одна запись журнала — одна транзакция базы (encode_transaction): её
+номер LSN и операции над строками. Операция — код, числовые поля и строки
+с префиксом длины (см. OPERATIONS). Номер последней применённой транзакции
+база хранит в той же транзакции, что и сами правки, поэтому при
+проигрывании журнала транзакции, уже попавшие в базу, пропускаются, а
+оборванная при сбое транзакция отбрасывается целиком.
+"""
+
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+
+CREATE, DROP, INSERT, DELETE, MOVE = range(1, 6)
+
+# Код операции -> (формат числовых полей, количество строк)
+OPERATIONS = {
+    CREATE: ('<q', 1),    # id плейлиста; название
+    DROP: ('<q', 0),      # id плейлиста
+    INSERT: ('<qqdd', 2),  # id трека, id плейлиста, позиция, длительность; название, путь
+    DELETE: ('<q', 0),    # id трека
+    MOVE: ('<qd', 0),     # id трека, позиция
+}
+
+_HEADER = struct.Struct('<II')
+_LENGTH = struct.Struct('<I')
+_LSN = struct.Struct('<Q')
+
+
+def encode(operation, *fields):
+    """
+    Кодирует операцию в содержимое записи журнала.
+
+    Аргументы:
+        operation (int): Код операции из OPERATIONS.
+        *fields: Числовые поля, затем строки операции. None в вещественном
+            поле кодируется как NaN.
+
+    Возвращает:
+        bytes: Содержимое записи.
+    """
+    layout, strings = OPERATIONS[operation]
+    numbers = len(fields) - strings
+    values = [math.nan if value is None else value for value in fields[:numbers]]
+    parts = [bytes((operation,)), struct.pack(layout, *values)]
+    for text in fields[numbers:]:
+        data = text.encode('utf-8')
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+def decode(payload):
+    """
+    Декодирует содержимое записи журнала.
+
+    Аргументы:
+        payload (bytes): Содержимое записи.
+
+    Возвращает:
+        tuple: Код операции и кортеж полей; NaN возвращается как None.
+    """
+    operation = payload[0]
+    layout, strings = OPERATIONS[operation]
+    offset = 1 + struct.calcsize(layout)
+    fields = [None if isinstance(value, float) and math.isnan(value) else value
+              for value in struct.unpack_from(layout, payload, 1)]
+    for _ in range(strings):
+        length, = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        fields.append(payload[offset:offset + length].decode('utf-8'))
+        offset += length
+    return operation, tuple(fields)
+
+
+def encode_transaction(lsn, operations):
+    """
+    Кодирует транзакцию в содержимое записи журнала.
+
+    Аргументы:
+        lsn (int): Номер транзакции.
+        operations (list): Содержимое операций, полученное от encode.
+
+    Возвращает:
+        bytes: Содержимое записи.
+    """
+    parts = [_LSN.pack(lsn)]
+    for operation in operations:
+        parts.append(_LENGTH.pack(len(operation)))
+        parts.append(operation)
+    return b''.join(parts)
+
+
+def decode_transaction(payload):
+    """
+    Декодирует содержимое записи журнала в транзакцию.
+
+    Аргументы:
+        payload (bytes): Содержимое записи.
+
+    Возвращает:
+        tuple: Номер транзакции и список операций, декодированных decode.
+    """
+    lsn, = _LSN.unpack_from(payload)
+    offset = _LSN.size
+    operations = []
+    while offset < len(payload):
+        length, = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        operations.append(decode(payload[offset:offset + length]))
+        offset += length
+    return lsn, operations
+
+
+class Journal:
+    """
+    Двоичный журнал только для дописывания с групповым коммитом.
+
+    Поток сброса запускается при первой записи. Получив записи, он ждёт
+    окно группового коммита, чтобы собрать следующие, записывает их одним
+    вызовом и делает один fsync. Когда журнал вырастает больше compact_size,
+    поток вызывает функцию контрольной точки, которая сохраняет состояние
+    и очищает журнал методом reset. Если запись, fsync или контрольная точка
+    завершились ошибкой, поток останавливается, а ошибка выбрасывается из
+    следующих вызовов append и sync.
+
+    Атрибуты:
+        filename (str): Файл журнала.
+        interval (float): Окно группового коммита в секундах.
+        compact_size (int): Размер журнала в байтах, после которого создаётся
+            контрольная точка.
+        flushes (int): Количество сбросов на диск.
+        _checkpoint (callable): Функция контрольной точки или None.
+        _file: Открытый файл журнала.
+        _buffer (list): Записи, ещё не записанные в файл.
+        _appended (int): Номер последней добавленной записи.
+        _durable (int): Номер последней записи, сброшенной на диск.
+        _waiters (int): Количество потоков, ждущих сброса в sync.
+        _closing (bool): Флаг закрытия журнала.
+        _condition (threading.Condition): Условие для буфера и номеров записей.
+        _file_lock (threading.Lock): Блокировка файла.
+        _thread (threading.Thread): Поток сброса или None до первой записи
+            и после его ошибки.
+        _error (Exception): Ошибка, остановившая поток сброса, или None.
+    """
+
+    def __init__(self, filename, interval=0.02, compact_size=2 ** 20, checkpoint=None):
+        """
+        Открывает журнал, создавая файл при необходимости.
+
+        Аргументы:
+            filename (str): Файл журнала.
+            interval (float, опционально): Окно группового коммита в секундах.
+                По умолчанию 0.02.
+            compact_size (int, опционально): Порог контрольной точки в байтах.
+                По умолчанию 1 МиБ.
+            checkpoint (callable, опционально): Функция без аргументов, которая
+                сохраняет состояние и вызывает reset.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.filename = filename
+        self.interval = interval
+        self.compact_size = compact_size
+        self.flushes = 0
+        self._checkpoint = checkpoint
+        self._file = open(filename, 'a+b')
+        self._buffer = []
+        self._appended = 0
+        self._durable = 0
+        self._waiters = 0
+        self._closing = False
+        self._condition = threading.Condition()
+        self._file_lock = threading.Lock()
+        self._thread = None
+        self._error = None
+
+    def records(self):
+        """
+        Читает записи журнала и отрезает оборванный хвост.
+
+        Возвращает:
+            list: Содержимое записей в порядке добавления.
+        """
+        records = []
+        with self._file_lock:
+            self._file.seek(0)
+            data = self._file.read()
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                length, checksum = _HEADER.unpack_from(data, offset)
+                payload = data[offset + _HEADER.size:offset + _HEADER.size + length]
+                if len(payload) != length or zlib.crc32(payload) != checksum:
+                    break
+                records.append(payload)
+                offset += _HEADER.size + length
+            if offset != len(data):
+                self._file.truncate(offset)
+                self._sync_file()
+        return records
+
+    def append(self, payload):
+        """
+        Добавляет запись в журнал, не дожидаясь сброса на диск.
+
+        Аргументы:
+            payload (bytes): Содержимое записи.
+
+        Выбрасывает:
+            ValueError: Если журнал закрыт.
+            OSError: Если поток сброса остановился из-за ошибки записи.
+        """
+        with self._condition:
+            if self._closing:
+                raise ValueError("Журнал закрыт")
+            if self._error is not None:
+                raise self._error
+            self._buffer.append(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._appended += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def sync(self):
+        """
+        Ждёт, пока все добавленные записи будут сброшены на диск.
+
+        Выбрасывает:
+            OSError: Если поток сброса остановился из-за ошибки записи,
+                не сбросив эти записи.
+        """
+        with self._condition:
+            target = self._appended
+            self._waiters += 1
+            self._condition.notify_all()
+            try:
+                while self._durable < target and self._thread is not None:
+                    self._condition.wait()
+            finally:
+                self._waiters -= 1
+            if self._durable < target and self._error is not None:
+                raise self._error
+
+    def size(self):
+        """
+        Возвращает размер файла журнала.
+
+        Возвращает:
+            int: Размер в байтах.
+        """
+        with self._file_lock:
+            return os.fstat(self._file.fileno()).st_size
+
+    def reset(self):
+        """
+        Очищает журнал после контрольной точки.
+
+        Записи, ещё не сброшенные на диск, тоже отбрасываются: к этому моменту
+        они должны быть сохранены контрольной точкой.
+        """
+        with self._condition:
+            self._buffer.clear()
+            self._durable = self._appended
+            self._condition.notify_all()
+        with self._file_lock:
+            self._file.truncate(0)
+            self._sync_file()
+
+    def close(self):
+        """
+        Сбрасывает оставшиеся записи, останавливает поток и закрывает файл.
+        """
+        with self._condition:
+            self._closing = True
+            thread = self._thread
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join()
+        with self._file_lock:
+            self._file.close()
+
+    def _sync_file(self):
+        """
+        Сбрасывает файл журнала на диск. Вызывается под блокировкой файла.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _run(self):
+        """
+        Поток сброса: выполняет цикл сброса и сообщает об ошибке, остановившей его.
+        """
+        try:
+            self._flush_loop()
+        except Exception as error:  # Ошибка записи выбрасывается из append и sync
+            with self._condition:
+                self._error = error
+                self._thread = None
+                self._condition.notify_all()
+
+    def _flush_loop(self):
+        """
+        Цикл сброса: собирает записи за окно коммита и пишет их с одним fsync.
+        """
+        while True:
+            with self._condition:
+                while not self._buffer and not self._closing:
+                    self._condition.wait()
+                if not self._buffer:
+                    return
+                hurry = self._closing or self._waiters
+            if not hurry:
+                time.sleep(self.interval)  # Окно группового коммита
+            with self._condition:
+                data = b''.join(self._buffer)
+                self._buffer.clear()
+                appended = self._appended
+            with self._file_lock:
+                self._file.write(data)
+                self._sync_file()
+                size = self._file.tell()
+            if self._checkpoint is not None and size >= self.compact_size:
+                self._checkpoint()
+            with self._condition:
+                self._durable = max(self._durable, appended)
+                self.flushes += 1
+                self._condition.notify_all()
@@ -0,0 +1,177 @@
+"""Импорт музыкальной библиотеки из дерева каталогов.
+
+Каталоги обходятся генератором, поэтому импорт начинается сразу и не
+держит в памяти список всех файлов. Звуковые файлы отбираются по
+расширению и сигнатуре в начале файла, композиции создаются пачками и
+добавляются в плейлист одним вызовом extend на пачку.
+"""
+
+import os
+import threading
+from itertools import islice
+
+from playlist import Composition
+
+AUDIO_EXTENSIONS = frozenset(('.mp3', '.wav', '.ogg', '.flac'))
+
+
+def has_audio_signature(path):
+    """
+    Проверяет сигнатуру звукового файла в его первых байтах.
+
+    Аргументы:
+        path (str): Путь к файлу.
+
+    Возвращает:
+        bool: True для MP3 (тег ID3 или кадр MPEG), WAV, OGG и FLAC.
+    """
+    try:
+        with open(path, 'rb') as file:
+            head = file.read(12)
+    except OSError:
+        return False
+    if head[:3] == b'ID3' or head[:4] in (b'OggS', b'fLaC'):
+        return True
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return True
+    return len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0
+
+
+def walk_audio_files(root, extensions=AUDIO_EXTENSIONS):
+    """
+    Обходит дерево каталогов и выдаёт пути к звуковым файлам.
+
+    Каталоги и файлы обходятся в порядке имён, чтобы результат не зависел
+    от файловой системы.
+
+    Аргументы:
+        root (str): Корневой каталог.
+        extensions (iterable, опционально): Допустимые расширения в нижнем регистре.
+
+    Возвращает:
+        generator: Генератор путей к файлам.
+    """
+    extensions = frozenset(extensions)
+    for directory, directories, files in os.walk(root):
+        directories.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() not in extensions:
+                continue
+            path = os.path.join(directory, name)
+            if has_audio_signature(path):
+                yield path
+
+
+def composition_from_path(path):
+    """
+    Создаёт композицию для файла, беря название из имени файла.
+
+    Аргументы:
+        path (str): Путь к файлу.
+
+    Возвращает:
+        Composition: Композиция.
+    """
+    return Composition(os.path.splitext(os.path.basename(path))[0], path)
+
+
+class LibraryImporter:
+    """
+    Импорт каталога в плейлист пачками с отчётом о ходе и отменой.
+
+    Файлы, пути которых уже есть в плейлисте, пропускаются. Метод run
+    можно выполнять в фоновом потоке: плейлист потокобезопасен, а отмена
+    проверяется между файлами.
+
+    Атрибуты:
+        playlist (PlayList): Плейлист, в который добавляются треки.
+        root (str): Корневой каталог.
+        batch_size (int): Треков в одной пачке.
+        progress (callable): Функция progress(found, added) или None.
+        found (int): Найдено звуковых файлов.
+        added (int): Добавлено треков.
+        _cancelled (threading.Event): Флаг отмены.
+    """
+
+    def __init__(self, playlist, root, batch_size=500, progress=None):
+        """
+        Инициализирует импорт.
+
+        Аргументы:
+            playlist (PlayList): Плейлист, в который добавляются треки.
+            root (str): Корневой каталог.
+            batch_size (int, опционально): Треков в пачке. По умолчанию 500.
+            progress (callable, опционально): Вызывается после каждой пачки
+                с числом найденных файлов и добавленных треков.
+        """
+        self.playlist = playlist
+        self.root = root
+        self.batch_size = batch_size
+        self.progress = progress
+        self.found = 0
+        self.added = 0
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Просит прервать импорт. Уже добавленные треки остаются в плейлисте.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """
+        Проверяет, был ли импорт отменён.
+
+        Возвращает:
+            bool: True, если вызван cancel.
+        """
+        return self._cancelled.is_set()
+
+    def _paths(self):
+        """
+        Выдаёт новые для плейлиста пути, пока импорт не отменён.
+
+        Возвращает:
+            generator: Генератор путей.
+        """
+        known = self.playlist.get_index('path')
+        for path in walk_audio_files(self.root):
+            if self.cancelled:
+                return
+            self.found += 1
+            if path not in known:
+                yield path
+
+    def run(self):
+        """
+        Выполняет импорт.
+
+        Возвращает:
+            int: Количество добавленных треков.
+        """
+        paths = self._paths()
+        while not self.cancelled:
+            batch = [composition_from_path(path) for path in islice(paths, self.batch_size)]
+            if not batch:
+                break
+            self.added += self.playlist.extend(batch)
+            if self.progress is not None:
+                self.progress(self.found, self.added)
+        return self.added
+
+
+def import_directory(playlist, root, batch_size=500, progress=None):
+    """
+    Импортирует каталог в плейлист в текущем потоке.
+
+    Аргументы:
+        playlist (PlayList): Плейлист.
+        root (str): Корневой каталог.
+        batch_size (int, опционально): Треков в пачке. По умолчанию 500.
+        progress (callable, опционально): Функция progress(found, added).
+
+    Возвращает:
+        int: Количество добавленных треков.
+    """
+    return LibraryImporter(playlist, root, batch_size, progress).run()
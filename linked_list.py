@@ -1,12 +1,153 @@
+import threading
+import weakref
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from indexes import HashIndex, OrderIndex
+
+
+def _mutating(method):
+    """
+    Декоратор методов, меняющих структуру списка.
+
+    Выполняет метод под блокировкой списка и увеличивает номер версии,
+    по которому итераторы обнаруживают изменения списка во время обхода.
+    Метод выполняется как пакет правок (см. LinkedList.batch), а после
+    изменения у списка вызывается метод _changed — только для наружной
+    операции: вложенные операции и операции внутри batch его не вызывают.
+    Если метод ничего не изменил, например выбросил исключение до правки
+    или оказался пустой операцией, номер версии возвращается к прежнему,
+    а _changed не вызывается.
+
+    Аргументы:
+        method (callable): Метод LinkedList.
+
+    Возвращает:
+        callable: Обёрнутый метод.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            state = self._state()
+            # Версия растёт до правки: по ней снимки отличают прежние ссылки узлов
+            self._version += 1
+            self._begin_batch()
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                self._end_batch()
+                changed = self._state() != state
+                if not changed:
+                    self._version -= 1
+            if changed and not self._batch_depth:
+                self._changed()
+            return result
+    return wrapper
+
+
+def _locked(method):
+    """
+    Декоратор методов, читающих список: выполняет метод под блокировкой списка.
+
+    Аргументы:
+        method (callable): Метод LinkedList.
+
+    Возвращает:
+        callable: Обёрнутый метод.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ListObserver:
+    """Наблюдатель за правками списка.
+
+    Подписывается методом LinkedList.subscribe. Список вызывает методы
+    наблюдателя под своей блокировкой в потоке, который его меняет.
+    Наследовать этот класс не обязательно: события, для которых у
+    наблюдателя нет метода, пропускаются.
+
+    Позиции в событиях одной операции верны, если применять события
+    к копии списка по очереди. Каждая операция списка (и каждый блок
+    LinkedList.batch) обрамляется событиями batch_begin и batch_end,
+    вложенные операции отдельных скобок не получают.
+    """
+
+    def batch_begin(self):
+        """
+        Начало пакета правок.
+        """
+
+    def batch_end(self):
+        """
+        Конец пакета правок: список снова в согласованном состоянии.
+        """
+
+    def inserted(self, node, position):
+        """
+        Узел добавлен в список.
+
+        Аргументы:
+            node (LinkedListItem): Добавленный узел.
+            position (int): Позиция узла.
+        """
+
+    def removed(self, node, position):
+        """
+        Узел удалён из списка.
+
+        Аргументы:
+            node (LinkedListItem): Удалённый узел.
+            position (int): Позиция узла до удаления.
+        """
+
+    def moved(self, node, source, target):
+        """
+        Узел перемещён.
+
+        Аргументы:
+            node (LinkedListItem): Перемещённый узел.
+            source (int): Позиция, с которой узел вынут.
+            target (int): Позиция, на которую узел вставлен.
+        """
+
+    def reordered(self):
+        """
+        Порядок и состав узлов изменились целиком (сортировка, разворот,
+        поворот, восстановление снимка); список нужно перечитать.
+        """
+
+    def cleared(self):
+        """
+        Из списка удалены все узлы.
+        """
+
+    def current_changed(self, node):
+        """
+        Сменился текущий трек плейлиста (событие PlayList).
+
+        Аргументы:
+            node (LinkedListItem): Новый текущий узел или None.
+        """
+
+
 class LinkedListItem:
     """Класс, представляющий узел двусвязного кольцевого списка.
 
+    Узел объявлен через __slots__ и не имеет __dict__, что заметно
+    уменьшает расход памяти на больших списках.
+
     Атрибуты:
         _data (любой тип): Данные, хранящиеся в узле.
         _next_item (LinkedListItem): Ссылка на следующий узел.
         _previous_item (LinkedListItem): Ссылка на предыдущий узел.
     """
 
+    __slots__ = ('_data', '_next_item', '_previous_item')
+
     def __init__(self, data=None):
         """
         Инициализирует узел связного списка с переданными данными.
@@ -87,225 +228,1397 @@ class LinkedList:
 
     Атрибуты:
         first_item (LinkedListItem): Ссылка на первый узел списка.
+        _size (int): Количество узлов в списке.
+        _indexes (dict): Хеш-индексы списка по их именам.
+        _order (OrderIndex): Индекс позиций узлов или None, если он выключен.
+        _lock: Блокировка списка (threading.RLock или пустой контекст).
+        _version (int): Номер версии, растущий при каждом изменении структуры.
+        _snapshots (dict): Версии живых снимков списка -> количество снимков.
+        _history (dict): Узел -> список пар (версия, прежний следующий узел);
+            пара означает, что до этой версии у узла был такой следующий узел.
+        _observers (list): Наблюдатели (ListObserver), которым сообщается о правках списка.
+        _batch_depth (int): Глубина вложенности пакетов правок.
+        _links (int): Количество перестановок ссылок; по нему _mutating
+            определяет, изменил ли метод список.
     """
 
-    def __init__(self, first_item=None):
+    def __init__(self, first_item=None, indexed=False, thread_safe=False):
         """
         Инициализирует новый связный список.
 
+        Если передан уже собранный кольцевой список, его длина
+        подсчитывается один раз при создании.
+
         Аргументы:
             first_item (LinkedListItem, опционально): Первый узел списка. По умолчанию None.
+            indexed (bool, опционально): Включает индекс позиций, с которым доступ
+                по индексу, index_of, insert_at и pop работают за O(log n).
+                По умолчанию False.
+            thread_safe (bool, опционально): Защищает операции со списком
+                блокировкой, чтобы его можно было менять из нескольких потоков.
+                По умолчанию False.
         """
+        self._lock = threading.RLock() if thread_safe else nullcontext()
+        self._version = 0
         self.first_item = first_item
+        self._size = self._count_items()
+        self._indexes = {}
+        self._order = OrderIndex(self) if indexed else None
+        self._snapshots = {}
+        self._history = {}
+        self._observers = []
+        self._batch_depth = 0
+        self._links = 0
+
+    def _count_items(self):
+        """
+        Подсчитывает количество узлов обходом кольца.
+
+        Возвращает:
+            int: Количество узлов в списке.
+        """
+        if not self.first_item:
+            return 0
+        count = 1
+        current = self.first_item
+        while current._next_item and current._next_item != self.first_item:
+            count += 1
+            current = current._next_item
+        return count
+
+    @property
+    def lock(self):
+        """
+        Возвращает блокировку списка.
+
+        Под ней можно выполнить несколько операций подряд так, чтобы другие
+        потоки не увидели промежуточного состояния, например получить
+        согласованную копию: with linked_list.lock: items = list(linked_list).
+
+        Возвращает:
+            threading.RLock или contextlib.nullcontext: Блокировка списка.
+        """
+        return self._lock
 
     @property
     def last(self):
         """
-        Возвращает последний узел списка.
+        Возвращает последний узел списка за O(1).
+
+        Последний узел кольца всегда находится перед первым.
 
         Возвращает:
             LinkedListItem: Последний узел списка или None, если список пуст.
         """
         if not self.first_item:
             return None
-        current = self.first_item
-        while current.next_item and current.next_item != self.first_item:
-            current = current.next_item
-        return current
+        return self.first_item._previous_item
 
-    def append_left(self, item):
+    def _state(self):
         """
-        Добавляет новый узел с данными item в начало списка.
+        Возвращает признаки состояния списка, по которым видно, изменил ли его метод.
+
+        Возвращает:
+            tuple: Первый узел, длина и количество перестановок ссылок.
+        """
+        return self.first_item, self._size, self._links
+
+    def _changed(self):
+        """
+        Вызывается после каждой наружной операции или пакета правок,
+        изменивших структуру списка.
+
+        В LinkedList ничего не делает; наследники переопределяют метод,
+        чтобы реагировать на правки.
+        """
+
+    def subscribe(self, observer):
+        """
+        Подписывает наблюдателя на правки списка.
 
         Аргументы:
-            item (любой тип): Данные, которые будут добавлены в узел.
+            observer (ListObserver): Наблюдатель.
         """
-        new_item = LinkedListItem(item)
-        if not self.first_item:
-            self.first_item = new_item
-            new_item.next_item = new_item
-            new_item.previous_item = new_item
-        else:
-            last = self.last
-            new_item.next_item = self.first_item
-            new_item.previous_item = last
-            last.next_item = new_item
-            self.first_item.previous_item = new_item
-            self.first_item = new_item
+        with self._lock:
+            self._observers.append(observer)
 
-    def append_right(self, item):
+    def unsubscribe(self, observer):
         """
-        Добавляет новый узел с данными item в конец списка.
+        Отписывает наблюдателя от правок списка.
 
         Аргументы:
-            item (любой тип): Данные, которые будут добавлены в узел.
+            observer (ListObserver): Наблюдатель.
+
+        Выбрасывает:
+            ValueError: Если наблюдатель не подписан.
         """
-        if not self.first_item:
-            self.append_left(item)
-        else:
-            new_item = LinkedListItem(item)
-            last = self.last
-            new_item.next_item = self.first_item
-            new_item.previous_item = last
-            last.next_item = new_item
-            self.first_item.previous_item = new_item
+        with self._lock:
+            self._observers.remove(observer)
 
-    def append(self, item):
+    @contextmanager
+    def batch(self):
         """
-        Добавляет новый узел с данными item в конец списка (alias для append_right).
+        Объединяет несколько операций в один пакет правок.
+
+        Наблюдатели получают одну пару событий batch_begin и batch_end на
+        весь блок with, а список остаётся заблокированным до его конца.
+        Если блок изменил список, _changed вызывается один раз в его конце.
+
+        Пример:
+            with playlist.batch():
+                playlist.remove_node(node)
+                playlist.append(track)
+        """
+        with self._lock:
+            version = self._version
+            self._begin_batch()
+            try:
+                yield self
+            finally:
+                self._end_batch()
+                if not self._batch_depth and self._version != version:
+                    self._changed()
+
+    def _begin_batch(self):
+        """
+        Открывает пакет правок; наружный пакет сообщается наблюдателям.
+        """
+        self._batch_depth += 1
+        if self._batch_depth == 1 and self._observers:
+            self._notify('batch_begin')
+
+    def _end_batch(self):
+        """
+        Закрывает пакет правок; наружный пакет сообщается наблюдателям.
+        """
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._observers:
+            self._notify('batch_end')
+
+    def _notify(self, event, *args):
+        """
+        Сообщает наблюдателям о правке списка.
+
+        Наблюдатель получает событие вызовом одноимённого метода (см. ListObserver);
+        события, для которых метода нет, пропускаются.
 
         Аргументы:
-            item (любой тип): Данные, которые будут добавлены в узел.
+            event (str): Имя события.
+            *args: Аргументы события.
         """
-        self.append_right(item)
+        for observer in self._observers:
+            handler = getattr(observer, event, None)
+            if handler is not None:
+                handler(*args)
 
-    def remove(self, item):
+    def _new_node(self, data):
         """
-        Удаляет первый узел с данными item из списка.
+        Создаёт новый узел для хранения данных в этом списке.
 
         Аргументы:
-            item (любой тип): Данные, которые нужно удалить.
+            data (любой тип): Данные узла.
 
-        Выбрасывает:
-            ValueError: Если элемент не найден.
+        Возвращает:
+            LinkedListItem: Новый узел, ещё не связанный с кольцом.
         """
-        if not self.first_item:
-            raise ValueError("Item not found")
-        current = self.first_item
-        found = False
-        while True:
-            if current.data == item:
-                found = True
-                break
-            current = current.next_item
-            if current == self.first_item:
-                break
-        if not found:
-            raise ValueError("Item not found")
+        return LinkedListItem(data)
 
-        if current == self.first_item and current.next_item == self.first_item:
-            self.first_item = None
-        else:
-            current.previous_item.next_item = current.next_item
-            current.next_item.previous_item = current.previous_item
-            if current == self.first_item:
-                self.first_item = current.next_item
+    def _link(self, left, right):
+        """
+        Связывает два узла так, чтобы right стоял сразу после left.
 
-    def insert(self, value, data):
+        Аргументы:
+            left (LinkedListItem): Предыдущий узел.
+            right (LinkedListItem): Следующий узел.
         """
-        Вставляет новый узел с данными data после узла со значением value.
+        if self._snapshots:
+            self._remember_next(left)
+        self._links += 1
+        left._next_item = right
+        right._previous_item = left
+
+    def _remember_next(self, node):
+        """
+        Сохраняет прежнюю ссылку узла на следующий, если её может увидеть живой снимок.
 
         Аргументы:
-            value (любой тип): Значение узла, после которого нужно вставить новый.
-            data (любой тип): Данные для нового узла.
+            node (LinkedListItem): Узел, ссылка которого сейчас изменится.
+        """
+        history = self._history.get(node)
+        since = history[-1][0] if history else 0
+        if since == self._version or node._next_item is None:
+            return
+        if max(self._snapshots) >= since:
+            self._history.setdefault(node, []).append((self._version, node._next_item))
 
-        Выбрасывает:
-            ValueError: Если элемент со значением value не найден.
+    def _release_snapshot(self, version):
         """
-        if self.first_item is None:
-            raise ValueError("Список пуст")
+        Забывает удалённый снимок и историю ссылок, которая больше никому не нужна.
 
-        current = self.first_item
-        found = False
+        Аргументы:
+            version (int): Версия удалённого снимка.
+        """
+        with self._lock:
+            self._snapshots[version] -= 1
+            if not self._snapshots[version]:
+                del self._snapshots[version]
+            if not self._snapshots:
+                self._history.clear()
+                return
+            oldest = min(self._snapshots)
+            for node in list(self._history):
+                history = [entry for entry in self._history[node] if entry[0] > oldest]
+                if history:
+                    self._history[node] = history
+                else:
+                    del self._history[node]
 
-        while True:
-            if current.data == value:
-                found = True
-                break
-            current = current.next_item
-            if current == self.first_item:
-                break
+    @_locked
+    def snapshot(self):
+        """
+        Возвращает неизменяемый снимок текущего состояния списка за O(1).
 
-        if not found:
-            raise ValueError(f"Элемент со значением {value} не найден в списке")
+        Снимок разделяет узлы с самим списком. Когда список меняется, он
+        сохраняет прежние ссылки изменённых узлов, поэтому снимок видит
+        порядок на момент создания, а лишняя память пропорциональна числу
+        изменений, а не длине списка.
 
-        new_node = LinkedListItem(data)
-        new_node.next_item = current.next_item
-        current.next_item = new_node
+        Возвращает:
+            ListSnapshot: Снимок списка.
+        """
+        snapshot = ListSnapshot(self, self._version, self.first_item, self._size)
+        self._snapshots[self._version] = self._snapshots.get(self._version, 0) + 1
+        weakref.finalize(snapshot, self._release_snapshot, self._version)
+        return snapshot
 
-    def __len__(self):
+    def _next_at(self, node, version):
         """
-        Возвращает длину списка (количество узлов).
+        Возвращает узел, следовавший за node в версии version.
+
+        Аргументы:
+            node (LinkedListItem): Узел списка.
+            version (int): Версия снимка.
 
         Возвращает:
-            int: Количество узлов в списке.
+            LinkedListItem: Следующий узел в этой версии.
+        """
+        # Текущая ссылка читается до истории: запись в историю всегда
+        # происходит раньше, чем меняется сама ссылка
+        following = node._next_item
+        for until, previous in self._history.get(node, ()):
+            if until > version:
+                return previous
+        return following
+
+    @_mutating
+    def restore(self, snapshot):
+        """
+        Возвращает список к состоянию снимка.
+
+        Узлы не копируются: переставляются только те ссылки, которые
+        отличаются от снимка, а индексы обновляются по разнице узлов.
+
+        Аргументы:
+            snapshot (ListSnapshot): Снимок этого списка.
+
+        Выбрасывает:
+            ValueError: Если снимок сделан с другого списка.
+        """
+        if snapshot._list is not self:
+            raise ValueError("Снимок сделан с другого списка")
+        nodes = list(snapshot.nodes())
+        old_nodes = set(self)
+        new_nodes = set(nodes)
+        for index in self._indexes.values():
+            for node in old_nodes - new_nodes:
+                index.discard(node)
+            for node in new_nodes - old_nodes:
+                index.add(node)
+        for left, right in zip(nodes, nodes[1:] + nodes[:1]):
+            if left._next_item != right or right._previous_item != left:
+                self._link(left, right)
+        self.first_item = nodes[0] if nodes else None
+        self._size = len(nodes)
+        if self._order is not None:
+            self._order.build(nodes)
+        self._notify('reordered')
+
+    def _release(self, node):
+        """
+        Освобождает узел после удаления из списка.
+
+        В списке на объектах узлы освобождает сборщик мусора, поэтому
+        метод ничего не делает; хранилища с пулом узлов возвращают узел в пул.
+
+        Аргументы:
+            node (LinkedListItem): Удалённый узел.
         """
+
+    def _link_in(self, node, after):
+        """
+        Встраивает отдельный узел в кольцо после узла after.
+
+        Меняются только ссылки и индекс позиций, хеш-индексы не затрагиваются.
+
+        Аргументы:
+            node (LinkedListItem): Узел, который нужно встроить.
+            after (LinkedListItem или None): Узел, после которого встраивается node.
+                Если None, node становится первым узлом списка.
+        """
+        if self._order is not None:
+            position = 0 if after is None else self._order.rank(after) + 1
+            self._order.insert(position, node)
         if not self.first_item:
-            return 0
-        count = 1
-        current = self.first_item
-        while current.next_item != self.first_item:
-            count += 1
-            current = current.next_item
-        return count
+            self._link(node, node)
+            self.first_item = node
+        elif after is None:
+            self._link(self.last, node)
+            self._link(node, self.first_item)
+            self.first_item = node
+        else:
+            self._link(node, after._next_item)
+            self._link(after, node)
 
-    def __iter__(self):
+    def _link_out(self, node):
         """
-        Итерация по элементам списка.
+        Вырезает узел из кольца.
+
+        Меняются только ссылки и индекс позиций, хеш-индексы не затрагиваются.
+
+        Аргументы:
+            node (LinkedListItem): Узел, который нужно вырезать.
+        """
+        if self._order is not None:
+            self._order.remove(node)
+        if node._next_item == node:
+            self.first_item = None
+        else:
+            self._link(node._previous_item, node._next_item)
+            if node == self.first_item:
+                self.first_item = node._next_item
+
+    def _attach(self, node, after, position=None):
+        """
+        Добавляет новый узел в список после узла after и обновляет индексы.
+
+        Аргументы:
+            node (LinkedListItem): Узел, который нужно добавить.
+            after (LinkedListItem или None): Узел, после которого добавляется node.
+                Если None, node становится первым узлом списка.
+            position (int, опционально): Позиция нового узла, если она известна;
+                нужна только для события inserted.
+        """
+        self._link_in(node, after)
+        self._size += 1
+        for index in self._indexes.values():
+            index.add(node)
+        if self._observers:
+            self._notify('inserted', node, self.index_of(node) if position is None else position)
+
+    def _detach(self, node, position=None):
+        """
+        Удаляет узел из списка и из индексов, после чего освобождает его.
+
+        Аргументы:
+            node (LinkedListItem): Узел, который нужно удалить.
+            position (int, опционально): Позиция узла, если она известна;
+                нужна только для события removed.
+        """
+        if self._observers and position is None:
+            position = self.index_of(node)
+        self._link_out(node)
+        self._size -= 1
+        for index in self._indexes.values():
+            index.discard(node)
+        if self._observers:
+            self._notify('removed', node, position)
+        self._release(node)
+
+    @_locked
+    def add_index(self, name, key=None):
+        """
+        Создаёт хеш-индекс по данным узлов и заполняет его за O(n).
+
+        Дальше индекс поддерживается при каждом изменении списка. Индекс
+        без функции key ускоряет оператор in, remove и insert.
+
+        Аргументы:
+            name (str): Имя индекса.
+            key (callable, опционально): Функция вычисления ключа по данным узла.
 
         Возвращает:
-            generator: Генератор для итерации по узлам списка.
+            HashIndex: Созданный индекс.
+
+        Выбрасывает:
+            ValueError: Если индекс с таким именем уже существует.
         """
-        current = self.first_item
-        if current:
-            while True:
-                yield current
-                current = current.next_item
-                if current == self.first_item:
-                    break
+        if name in self._indexes:
+            raise ValueError(f"Индекс {name} уже существует")
+        index = HashIndex(key)
+        for node in self:
+            index.add(node)
+        self._indexes[name] = index
+        return index
 
-    def __getitem__(self, index):
+    @_locked
+    def drop_index(self, name):
         """
-        Возвращает данные узла по его индексу.
+        Удаляет хеш-индекс.
 
         Аргументы:
-            index (int): Индекс узла.
+            name (str): Имя индекса.
+
+        Выбрасывает:
+            KeyError: Если индекс не найден.
+        """
+        del self._indexes[name]
+
+    def get_index(self, name):
+        """
+        Возвращает хеш-индекс по имени.
+
+        Аргументы:
+            name (str): Имя индекса.
 
         Возвращает:
-            любой тип: Данные узла.
+            HashIndex: Индекс.
 
         Выбрасывает:
-            IndexError: Если индекс выходит за пределы списка.
+            KeyError: Если индекс не найден.
         """
-        if not self.first_item:
-            raise IndexError("List index out of range")
-        if index < 0:
-            index += len(self)
-        if index < 0 or index >= len(self):
-            raise IndexError("List index out of range")
+        return self._indexes[name]
 
-        current = self.first_item
-        for _ in range(index):
-            current = current.next_item
-        return current.data
+    def _data_index(self):
+        """
+        Возвращает индекс, ключом которого служат сами данные узлов.
 
-    def __contains__(self, item):
+        Возвращает:
+            HashIndex или None: Индекс без функции key, если он есть.
         """
-        Проверяет, содержится ли элемент с данными item в списке.
+        for index in self._indexes.values():
+            if index.key is None:
+                return index
+        return None
+
+    def _first_in_order(self, candidates):
+        """
+        Выбирает из узлов тот, что стоит в списке раньше остальных.
 
         Аргументы:
-            item (любой тип): Данные для проверки.
+            candidates (list): Узлы этого списка.
 
         Возвращает:
-            bool: True, если элемент найден, иначе False.
+            LinkedListItem или None: Самый ранний узел.
         """
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        if self._order is not None:
+            return min(candidates, key=self._order.rank)
+        candidates = set(candidates)
         for node in self:
-            if node.data == item:
-                return True
-        return False
+            if node in candidates:
+                return node
+        return None
 
-    def __reversed__(self):
+    def _find(self, item):
         """
-        Итерация по элементам списка в обратном порядке.
+        Ищет первый узел с данными item.
+
+        Если у списка есть индекс по самим данным, поиск идёт через него.
+
+        Аргументы:
+            item (любой тип): Искомые данные.
 
         Возвращает:
-            generator: Генератор для обратной итерации по узлам списка.
+            LinkedListItem: Найденный узел или None, если элемент не найден.
         """
-        if self.first_item is None:
-            return
-        current = self.last
-        while True:
+        index = self._data_index()
+        if index is not None:
+            return self._first_in_order(index.nodes(item))
+        for node in self:
+            if node.data == item:
+                return node
+        return None
+
+    @_locked
+    def find(self, value, index=None):
+        """
+        Ищет первый узел, данные (или ключ индекса) которого равны value.
+
+        Аргументы:
+            value (любой тип): Искомое значение.
+            index (str, опционально): Имя хеш-индекса. Если не задано,
+                сравниваются сами данные узлов.
+
+        Возвращает:
+            LinkedListItem или None: Найденный узел.
+
+        Выбрасывает:
+            KeyError: Если индекс не найден.
+        """
+        if index is not None:
+            return self._first_in_order(self._indexes[index].nodes(value))
+        return self._find(value)
+
+    @_mutating
+    def append_left(self, item):
+        """
+        Добавляет новый узел с данными item в начало списка.
+
+        Аргументы:
+            item (любой тип): Данные, которые будут добавлены в узел.
+        """
+        self._attach(self._new_node(item), None, 0)
+
+    @_mutating
+    def append_right(self, item):
+        """
+        Добавляет новый узел с данными item в конец списка.
+
+        Аргументы:
+            item (любой тип): Данные, которые будут добавлены в узел.
+        """
+        self._attach(self._new_node(item), self.last, self._size)
+
+    def append(self, item):
+        """
+        Добавляет новый узел с данными item в конец списка (alias для append_right).
+
+        Аргументы:
+            item (любой тип): Данные, которые будут добавлены в узел.
+        """
+        self.append_right(item)
+
+    @_mutating
+    def insert_after(self, node, data):
+        """
+        Вставляет новый узел с данными data сразу после узла node за O(1).
+
+        Аргументы:
+            node (LinkedListItem): Узел этого списка.
+            data (любой тип): Данные для нового узла.
+
+        Возвращает:
+            LinkedListItem: Созданный узел.
+        """
+        new_node = self._new_node(data)
+        self._attach(new_node, node)
+        return new_node
+
+    @_mutating
+    def insert_before(self, node, data):
+        """
+        Вставляет новый узел с данными data сразу перед узлом node за O(1).
+
+        Если node является первым узлом, новый узел становится первым.
+
+        Аргументы:
+            node (LinkedListItem): Узел этого списка.
+            data (любой тип): Данные для нового узла.
+
+        Возвращает:
+            LinkedListItem: Созданный узел.
+        """
+        new_node = self._new_node(data)
+        self._attach(new_node, None if node == self.first_item else node._previous_item)
+        return new_node
+
+    @_mutating
+    def remove_node(self, node):
+        """
+        Удаляет узел node из списка за O(1).
+
+        Аргументы:
+            node (LinkedListItem): Узел этого списка.
+
+        Возвращает:
+            любой тип: Данные удалённого узла.
+        """
+        data = node.data
+        self._detach(node)
+        return data
+
+    @_mutating
+    def move_node(self, node, after=None):
+        """
+        Перемещает узел node так, чтобы он стоял сразу после узла after, за O(1).
+
+        Сам узел не пересоздаётся, поэтому ссылки на него остаются действительными.
+
+        Аргументы:
+            node (LinkedListItem): Перемещаемый узел этого списка.
+            after (LinkedListItem, опционально): Узел, после которого нужно поставить node.
+                Если None, node становится первым узлом списка.
+
+        Выбрасывает:
+            ValueError: Если node и after совпадают.
+        """
+        if after == node:
+            raise ValueError("Нельзя переместить узел после самого себя")
+        if after is None and node == self.first_item:
+            return
+        if after is not None and after._next_item == node and node != self.first_item:
+            return
+        source = self.index_of(node) if self._observers else None
+        self._link_out(node)
+        self._link_in(node, after)
+        if self._observers:
+            self._notify('moved', node, source, self.index_of(node))
+
+    @_mutating
+    def remove(self, item):
+        """
+        Удаляет первый узел с данными item из списка.
+
+        Аргументы:
+            item (любой тип): Данные, которые нужно удалить.
+
+        Выбрасывает:
+            ValueError: Если элемент не найден.
+        """
+        node = self._find(item)
+        if node is None:
+            raise ValueError("Item not found")
+        self.remove_node(node)
+
+    @_mutating
+    def insert(self, value, data):
+        """
+        Вставляет новый узел с данными data после узла со значением value.
+
+        Аргументы:
+            value (любой тип): Значение узла, после которого нужно вставить новый.
+            data (любой тип): Данные для нового узла.
+
+        Выбрасывает:
+            ValueError: Если элемент со значением value не найден.
+        """
+        if self.first_item is None:
+            raise ValueError("Список пуст")
+
+        node = self._find(value)
+        if node is None:
+            raise ValueError(f"Элемент со значением {value} не найден в списке")
+        self.insert_after(node, data)
+
+    @_mutating
+    def remove_many(self, nodes_or_predicate):
+        """
+        Удаляет из списка несколько узлов за один проход.
+
+        Если передана функция, за один обход кольца удаляются все узлы,
+        для данных которых она вернула True. Если передана коллекция узлов,
+        каждый из них удаляется напрямую за O(1). Повторы в коллекции
+        пропускаются, а до удаления проверяется, что все узлы принадлежат
+        списку: по индексу позиций, а без него — одним обходом списка.
+
+        Аргументы:
+            nodes_or_predicate (callable или iterable): Условие на данные узла
+                или узлы этого списка.
+
+        Возвращает:
+            int: Количество удалённых узлов.
+
+        Выбрасывает:
+            ValueError: Если какой-то из узлов не принадлежит списку; тогда
+                список не меняется.
+        """
+        old_size = self._size
+        if not callable(nodes_or_predicate):
+            nodes = list(dict.fromkeys(nodes_or_predicate))
+            owned = self._order
+            if owned is None:
+                owned = set(self) if nodes else set()
+            if any(node not in owned for node in nodes):
+                raise ValueError("Узел не принадлежит списку")
+            for node in nodes:
+                self._detach(node)
+            return old_size - self._size
+
+        # Индекс позиций перестраивается один раз после прохода
+        order, self._order = self._order, None
+        try:
+            node = self.first_item
+            position = 0
+            for _ in range(old_size):
+                following = node._next_item
+                if nodes_or_predicate(node.data):
+                    self._detach(node, position)
+                else:
+                    position += 1
+                node = following
+        finally:
+            self._order = order
+            if order is not None:
+                order.build(self)
+        return old_size - self._size
+
+    def keep_if(self, predicate):
+        """
+        Оставляет в списке только узлы, для данных которых predicate вернул True.
+
+        Аргументы:
+            predicate (callable): Условие на данные узла.
+
+        Возвращает:
+            int: Количество удалённых узлов.
+        """
+        return self.remove_many(lambda data: not predicate(data))
+
+    def _block_bounds(self, start, end):
+        """
+        Проверяет, что узлы от start до end идут подряд без перехода через начало списка.
+
+        Аргументы:
+            start (LinkedListItem): Первый узел блока.
+            end (LinkedListItem): Последний узел блока.
+
+        Возвращает:
+            tuple: Позиция первого узла (или None без индекса позиций),
+                количество узлов и множество узлов блока (пустое с индексом позиций).
+
+        Выбрасывает:
+            ValueError: Если блок переходит через начало списка.
+        """
+        if self._order is not None:
+            first, last = self._order.rank(start), self._order.rank(end)
+            if first > last:
+                raise ValueError("Блок не должен переходить через начало списка")
+            return first, last - first + 1, set()
+        block = {start}
+        current = start
+        while current != end:
+            current = current._next_item
+            if current == self.first_item:
+                raise ValueError("Блок не должен переходить через начало списка")
+            block.add(current)
+        return None, len(block), block
+
+    @_mutating
+    def move_block(self, start, end, after=None):
+        """
+        Вырезает подряд идущие узлы от start до end и ставит их сразу после after.
+
+        Сама перестановка ссылок выполняется за O(1). Проверка границ блока
+        занимает O(log n) с индексом позиций и O(k) без него.
+
+        Аргументы:
+            start (LinkedListItem): Первый узел блока.
+            end (LinkedListItem): Последний узел блока.
+            after (LinkedListItem, опционально): Узел вне блока, после которого
+                встаёт блок. Если None, блок становится началом списка.
+
+        Выбрасывает:
+            ValueError: Если блок переходит через начало списка или after лежит внутри блока.
+        """
+        first, count, block = self._block_bounds(start, end)
+        if self._order is not None and after is not None:
+            after_position = self._order.rank(after)
+            if first <= after_position < first + count:
+                raise ValueError("Нельзя переместить блок внутрь самого себя")
+            if after_position > first:
+                after_position -= count
+        elif after in block:
+            raise ValueError("Нельзя переместить блок внутрь самого себя")
+        if count == self._size:
+            return
+
+        if self._observers and first is None:
+            first = self.index_of(start)
+        previous, following = start._previous_item, end._next_item
+        self._link(previous, following)
+        if start == self.first_item:
+            self.first_item = following
+        if after is None:
+            self._link(self.last, start)
+            self._link(end, self.first_item)
+            self.first_item = start
+        else:
+            self._link(end, after._next_item)
+            self._link(after, start)
+
+        if self._order is not None:
+            self._order.move_range(first, count, 0 if after is None else after_position + 1)
+        if self._observers:
+            target = self.index_of(start)
+            block = [start]
+            while len(block) < count:
+                block.append(block[-1]._next_item)
+            # Блок, сдвинутый к концу, переносится с последнего узла, чтобы позиции
+            # событий оставались верными при их поочерёдном применении
+            offsets = range(count) if target < first else reversed(range(count))
+            for offset in offsets:
+                self._notify('moved', block[offset], first + offset, target + offset)
+
+    @classmethod
+    def from_iterable(cls, iterable, *args, **kwargs):
+        """
+        Создаёт список из последовательности данных за один линейный проход.
+
+        Аргументы:
+            iterable (iterable): Данные для узлов списка.
+            *args, **kwargs: Аргументы конструктора списка.
+
+        Возвращает:
+            LinkedList: Новый список.
+        """
+        linked_list = cls(*args, **kwargs)
+        linked_list.extend(iterable)
+        return linked_list
+
+    @_mutating
+    def extend(self, iterable):
+        """
+        Добавляет в конец списка узлы со всеми данными из iterable за один проход.
+
+        Индекс позиций на время добавления отключается: если новых узлов
+        больше, чем было в списке, он перестраивается целиком за O(n),
+        иначе узлы добавляются в него по одному.
+
+        Аргументы:
+            iterable (iterable): Данные для новых узлов.
+
+        Возвращает:
+            int: Количество добавленных узлов.
+        """
+        order, self._order = self._order, None
+        old_size = self._size
+        added = []
+        tail = self.last
+        try:
+            for data in iterable:
+                node = self._new_node(data)
+                self._attach(node, tail, self._size)
+                tail = node
+                if order is not None:
+                    added.append(node)
+        finally:
+            self._order = order
+            if order is not None:
+                if len(added) > old_size:
+                    order.build(self)
+                else:
+                    for position, node in enumerate(added, old_size):
+                        order.insert(position, node)
+        return self._size - old_size
+
+    def _can_adopt(self, other):
+        """
+        Проверяет, можно ли встроить узлы другого списка без копирования.
+
+        Аргументы:
+            other (LinkedList): Другой список.
+
+        Возвращает:
+            bool: True, если узлы other совместимы с этим списком.
+        """
+        return isinstance(other.first_item, LinkedListItem)
+
+    @_mutating
+    def clear(self):
+        """
+        Удаляет из списка все узлы.
+        """
+        self.first_item = None
+        self._size = 0
+        for index in self._indexes.values():
+            index.clear()
+        if self._order is not None:
+            self._order.build(())
+        self._notify('cleared')
+
+    @_mutating
+    def splice(self, other, after=None):
+        """
+        Встраивает все узлы списка other сразу после узла after.
+
+        Узлы не копируются: кольцо other вшивается в это кольцо за O(1)
+        (плюс O(k) на обновление индексов, если они включены), после чего
+        other становится пустым. Узлы несовместимого хранилища копируются.
+
+        Аргументы:
+            other (LinkedList): Встраиваемый список.
+            after (LinkedListItem, опционально): Узел этого списка, после которого
+                встраиваются узлы. Если None, они встают в начало списка.
+
+        Выбрасывает:
+            ValueError: Если other совпадает с этим списком.
+        """
+        if other is self:
+            raise ValueError("Нельзя встроить список в самого себя")
+        if not other.first_item:
+            return
+        if not self._can_adopt(other):
+            for data in [node.data for node in other]:
+                node = self._new_node(data)
+                self._attach(node, after)
+                after = node
+            other.clear()
+            return
+
+        head, tail, count = other.first_item, other.last, len(other)
+        nodes = list(other) if self._indexes or self._order is not None or self._observers else ()
+        other.clear()
+        position = 0 if after is None else None
+        if self._order is not None and after is not None:
+            position = self._order.rank(after) + 1
+
+        if not self.first_item:
+            self._link(tail, head)
+            self.first_item = head
+        else:
+            following = self.first_item if after is None else after._next_item
+            self._link(self.last if after is None else after, head)
+            self._link(tail, following)
+            if after is None:
+                self.first_item = head
+        self._size += count
+
+        for index in self._indexes.values():
+            for node in nodes:
+                index.add(node)
+        if self._order is not None:
+            if count > self._size - count:
+                self._order.build(self)
+            else:
+                for offset, node in enumerate(nodes):
+                    self._order.insert(position + offset, node)
+        if self._observers:
+            position = self.index_of(head)
+            for offset, node in enumerate(nodes):
+                self._notify('inserted', node, position + offset)
+
+    def _normalize_index(self, index):
+        """
+        Приводит индекс к неотрицательному и проверяет его границы.
+
+        Аргументы:
+            index (int): Индекс узла, допускаются отрицательные значения.
+
+        Возвращает:
+            int: Неотрицательный индекс.
+
+        Выбрасывает:
+            IndexError: Если индекс выходит за пределы списка.
+        """
+        if index < 0:
+            index += self._size
+        if index < 0 or index >= self._size:
+            raise IndexError("List index out of range")
+        return index
+
+    @_locked
+    def node_at(self, index):
+        """
+        Возвращает узел по его индексу.
+
+        С индексом позиций работает за O(log n), без него идёт по кольцу
+        с ближайшей стороны.
+
+        Аргументы:
+            index (int): Индекс узла, допускаются отрицательные значения.
+
+        Возвращает:
+            LinkedListItem: Узел списка.
+
+        Выбрасывает:
+            IndexError: Если индекс выходит за пределы списка.
+        """
+        index = self._normalize_index(index)
+        if self._order is not None:
+            return self._order.select(index)
+
+        # Идём по кольцу с той стороны, которая ближе к индексу
+        current = self.first_item
+        if index <= self._size // 2:
+            for _ in range(index):
+                current = current._next_item
+        else:
+            for _ in range(self._size - index):
+                current = current._previous_item
+        return current
+
+    @_locked
+    def index_of(self, node):
+        """
+        Возвращает позицию узла в списке.
+
+        С индексом позиций работает за O(log n), без него — за O(n).
+
+        Аргументы:
+            node (LinkedListItem): Узел этого списка.
+
+        Возвращает:
+            int: Позиция узла.
+
+        Выбрасывает:
+            ValueError: Если узел не принадлежит списку.
+        """
+        if self._order is not None:
+            if node not in self._order:
+                raise ValueError("Узел не принадлежит списку")
+            return self._order.rank(node)
+        for position, current in enumerate(self):
+            if current == node:
+                return position
+        raise ValueError("Узел не принадлежит списку")
+
+    @_mutating
+    def insert_at(self, index, data):
+        """
+        Вставляет новый узел с данными data так, чтобы он оказался на позиции index.
+
+        Аргументы:
+            index (int): Позиция от 0 до len(self) включительно,
+                отрицательные значения отсчитываются от конца как в list.insert.
+            data (любой тип): Данные для нового узла.
+
+        Возвращает:
+            LinkedListItem: Созданный узел.
+        """
+        if index < 0:
+            index = max(index + self._size, 0)
+        index = min(index, self._size)
+        new_node = self._new_node(data)
+        self._attach(new_node, None if index == 0 else self.node_at(index - 1), index)
+        return new_node
+
+    @_mutating
+    def pop(self, index=-1):
+        """
+        Удаляет узел на позиции index и возвращает его данные.
+
+        Аргументы:
+            index (int, опционально): Индекс узла. По умолчанию последний.
+
+        Возвращает:
+            любой тип: Данные удалённого узла.
+
+        Выбрасывает:
+            IndexError: Если индекс выходит за пределы списка.
+        """
+        return self.remove_node(self.node_at(index))
+
+    def __delitem__(self, index):
+        """
+        Удаляет узел по его индексу.
+
+        Аргументы:
+            index (int): Индекс узла.
+
+        Выбрасывает:
+            IndexError: Если индекс выходит за пределы списка.
+        """
+        self.pop(index)
+
+    def __len__(self):
+        """
+        Возвращает длину списка (количество узлов) за O(1).
+
+        Возвращает:
+            int: Количество узлов в списке.
+        """
+        return self._size
+
+    def __iter__(self):
+        """
+        Итерация по элементам списка.
+
+        Если список изменился во время обхода, следующий шаг итерации
+        выбрасывает RuntimeError.
+
+        Возвращает:
+            generator: Генератор для итерации по узлам списка.
+        """
+        version = self._version
+        current = self.first_item
+        if current:
+            while True:
+                yield current
+                if self._version != version:
+                    raise RuntimeError("LinkedList changed during iteration")
+                current = current._next_item
+                if current == self.first_item:
+                    break
+
+    def __getitem__(self, index):
+        """
+        Возвращает данные узла по его индексу.
+
+        Аргументы:
+            index (int): Индекс узла.
+
+        Возвращает:
+            любой тип: Данные узла.
+
+        Выбрасывает:
+            IndexError: Если индекс выходит за пределы списка.
+        """
+        return self.node_at(index).data
+
+    @_locked
+    def __contains__(self, item):
+        """
+        Проверяет, содержится ли элемент с данными item в списке.
+
+        Аргументы:
+            item (любой тип): Данные для проверки.
+
+        Возвращает:
+            bool: True, если элемент найден, иначе False.
+        """
+        index = self._data_index()
+        if index is not None:
+            return item in index
+        for node in self:
+            if node.data == item:
+                return True
+        return False
+
+    def __reversed__(self):
+        """
+        Итерация по элементам списка в обратном порядке за один проход.
+
+        Возвращает:
+            generator: Генератор для обратной итерации по данным списка.
+        """
+        if self.first_item is None:
+            return
+        version = self._version
+        last = self.last
+        current = last
+        while True:
             yield current.data
-            current = current.previous_item
-            if current == self.last:
+            if self._version != version:
+                raise RuntimeError("LinkedList changed during iteration")
+            current = current._previous_item
+            if current == last:
                 break
+
+    @_mutating
+    def reverse(self):
+        """
+        Разворачивает список на месте за O(n), переставляя ссылки узлов.
+
+        Узлы не пересоздаются, бывший последний узел становится первым.
+        """
+        if self._size < 2:
+            return
+        node = self.first_item
+        following = node._next_item
+        for _ in range(self._size):
+            after_following = following._next_item
+            self._link(following, node)
+            node, following = following, after_following
+        self.first_item = self.first_item._next_item
+        if self._order is not None:
+            self._order.build(self)
+        self._notify('reordered')
+
+    @_mutating
+    def sort(self, key=None, reverse=False):
+        """
+        Устойчиво сортирует список на месте восходящей сортировкой слиянием.
+
+        Узлы не пересоздаются и не копируются, меняются только ссылки,
+        поэтому сохранённые ссылки на узлы остаются действительными.
+        Работает за O(n log n) и O(1) дополнительной памяти; ключ
+        вычисляется заново на каждом проходе слияния.
+
+        Аргументы:
+            key (callable, опционально): Функция вычисления ключа по данным узла.
+            reverse (bool, опционально): Сортировать по убыванию. По умолчанию False.
+        """
+        if self._size < 2:
+            return
+        if key is None:
+            def key(data):
+                return data
+
+        head = self.first_item
+        width = 1
+        while width < self._size:
+            left = head
+            head = tail = None
+            remaining = self._size
+            while remaining > 0:
+                left_size = min(width, remaining)
+                right = left
+                for _ in range(left_size):
+                    right = right._next_item
+                right_size = min(width, remaining - left_size)
+                remaining -= left_size + right_size
+
+                left_key = key(left.data)
+                right_key = key(right.data) if right_size else None
+                while left_size or right_size:
+                    # При равных ключах берётся узел левой серии, это сохраняет устойчивость
+                    if left_size and (not right_size or not (
+                            left_key < right_key if reverse else right_key < left_key)):
+                        node, left = left, left._next_item
+                        left_size -= 1
+                        if left_size:
+                            left_key = key(left.data)
+                    else:
+                        node, right = right, right._next_item
+                        right_size -= 1
+                        if right_size:
+                            right_key = key(right.data)
+                    if tail is None:
+                        head = node
+                    else:
+                        self._link(tail, node)
+                    tail = node
+                left = right
+            self._link(tail, head)
+            width *= 2
+
+        self.first_item = head
+        if self._order is not None:
+            self._order.build(self)
+        self._notify('reordered')
+
+    @_mutating
+    def rotate(self, steps=1):
+        """
+        Поворачивает кольцо на steps шагов вправо, как collections.deque.rotate.
+
+        Меняется только первый узел: при положительном steps первыми
+        становятся последние steps узлов. Обход идёт в ближайшую сторону,
+        а с индексом позиций новый первый узел находится за O(log n).
+
+        Аргументы:
+            steps (int, опционально): Количество шагов. По умолчанию 1.
+        """
+        if self._size < 2:
+            return
+        position = -steps % self._size
+        if position == 0:
+            return
+        if self._order is not None:
+            self.rotate_to(self._order.select(position))
+            return
+        current = self.first_item
+        if position <= self._size // 2:
+            for _ in range(position):
+                current = current._next_item
+        else:
+            for _ in range(self._size - position):
+                current = current._previous_item
+        self.first_item = current
+        self._notify('reordered')
+
+    @_mutating
+    def rotate_to(self, node):
+        """
+        Делает узел node первым узлом списка, не меняя порядок кольца.
+
+        Аргументы:
+            node (LinkedListItem): Узел этого списка.
+        """
+        if self._order is not None:
+            self._order.rotate(self._order.rank(node))
+        self.first_item = node
+        self._notify('reordered')
+
+
+class ListSnapshot:
+    """Неизменяемый снимок двусвязного кольцевого списка.
+
+    Снимок создаётся методом LinkedList.snapshot и показывает порядок
+    узлов на момент создания, даже если список потом меняется.
+
+    Атрибуты:
+        _list (LinkedList): Список, с которого сделан снимок.
+        _version (int): Версия списка на момент снимка.
+        _first (LinkedListItem): Первый узел на момент снимка.
+        _size (int): Длина списка на момент снимка.
+    """
+
+    def __init__(self, linked_list, version, first, size):
+        """
+        Инициализирует снимок.
+
+        Аргументы:
+            linked_list (LinkedList): Список.
+            version (int): Версия списка.
+            first (LinkedListItem): Первый узел списка.
+            size (int): Длина списка.
+        """
+        self._list = linked_list
+        self._version = version
+        self._first = first
+        self._size = size
+
+    def nodes(self):
+        """
+        Итерация по узлам в порядке снимка.
+
+        Возвращает:
+            generator: Генератор узлов.
+        """
+        current = self._first
+        for _ in range(self._size):
+            yield current
+            current = self._list._next_at(current, self._version)
+
+    def __iter__(self):
+        """
+        Итерация по данным в порядке снимка.
+
+        Возвращает:
+            generator: Генератор данных узлов.
+        """
+        for node in self.nodes():
+            yield node.data
+
+    def __len__(self):
+        """
+        Возвращает длину списка на момент снимка.
+
+        Возвращает:
+            int: Количество узлов.
+        """
+        return self._size
+
+    def __getitem__(self, index):
+        """
+        Возвращает данные узла по его индексу в снимке за O(n).
+
+        Аргументы:
+            index (int): Индекс узла.
+
+        Возвращает:
+            любой тип: Данные узла.
+
+        Выбрасывает:
+            IndexError: Если индекс выходит за пределы снимка.
+        """
+        if index < 0:
+            index += self._size
+        if index < 0 or index >= self._size:
+            raise IndexError("List index out of range")
+        for position, data in enumerate(self):
+            if position == index:
+                return data
+
+    def __contains__(self, item):
+        """
+        Проверяет, есть ли элемент с данными item в снимке.
+
+        Аргументы:
+            item (любой тип): Данные для проверки.
+
+        Возвращает:
+            bool: True, если элемент найден, иначе False.
+        """
+        return any(data == item for data in self)
+
+    def __reversed__(self):
+        """
+        Итерация по данным снимка в обратном порядке.
+
+        Возвращает:
+            iterator: Итератор по данным.
+        """
+        return reversed(list(self))
@@ -0,0 +1,490 @@
+"""Метаданные звуковых файлов.
+
+Модуль читает теги ID3 (v1 и v2), длительность, битрейт и частоту
+дискретизации MP3 и WAV без сторонних библиотек. MetadataScanner сканирует
+большие наборы файлов в пуле процессов и сохраняет результаты в кэше SQLite
+с ключом (путь, время изменения, размер), поэтому повторное сканирование
+библиотеки читает только изменённые файлы.
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import struct
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+FIELDS = ('title', 'artist', 'album', 'duration', 'bitrate', 'sample_rate')
+
+# Битрейты MPEG в кбит/с: [MPEG-1 или MPEG-2/2.5][слой][индекс]
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),   # MPEG-2.5
+}
+_ID3_FRAMES = {
+    'TIT2': 'title', 'TPE1': 'artist', 'TALB': 'album',
+    'TT2': 'title', 'TP1': 'artist', 'TAL': 'album',
+}
+_ENCODINGS = ('latin-1', 'utf-16', 'utf-16-be', 'utf-8')
+
+
+def _empty():
+    """
+    Возвращает словарь метаданных без значений.
+
+    Возвращает:
+        dict: Поля FIELDS со значением None.
+    """
+    return dict.fromkeys(FIELDS)
+
+
+def _syncsafe(data):
+    """
+    Декодирует 28-битное число ID3v2, записанное по 7 бит в байте.
+
+    Аргументы:
+        data (bytes): Четыре байта.
+
+    Возвращает:
+        int: Число.
+    """
+    return data[0] << 21 | data[1] << 14 | data[2] << 7 | data[3]
+
+
+def _text(data):
+    """
+    Декодирует текстовый кадр ID3v2.
+
+    Аргументы:
+        data (bytes): Содержимое кадра: байт кодировки и текст.
+
+    Возвращает:
+        str: Текст или None, если он пуст.
+    """
+    if not data or data[0] >= len(_ENCODINGS):
+        return None
+    text = data[1:].decode(_ENCODINGS[data[0]], errors='replace')
+    return text.split('\x00')[0].strip() or None
+
+
+def _read_id3v2(file, info):
+    """
+    Читает тег ID3v2 в начале файла.
+
+    Аргументы:
+        file (file): Файл, открытый в двоичном режиме и стоящий в начале.
+        info (dict): Метаданные, дополняемые найденными полями.
+
+    Возвращает:
+        int: Смещение первого байта после тега (0, если тега нет).
+    """
+    header = file.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    version, flags = header[3], header[5]
+    end = 10 + _syncsafe(header[6:10]) + (10 if flags & 0x10 else 0)
+    body = file.read(end - 10)
+    position = 0
+    if flags & 0x40 and version >= 3:  # Расширенный заголовок
+        size = _syncsafe(body[:4]) if version == 4 else struct.unpack('>I', body[:4])[0] + 4
+        position = size
+    id_size, header_size = (3, 6) if version == 2 else (4, 10)
+    while position + header_size <= len(body):
+        frame_id = body[position:position + id_size]
+        if not frame_id.strip(b'\x00'):
+            break  # Началось заполнение нулями
+        raw_size = body[position + id_size:position + header_size - (0 if version == 2 else 2)]
+        if version == 2:
+            size = int.from_bytes(raw_size, 'big')
+        elif version == 4:
+            size = _syncsafe(raw_size)
+        else:
+            size = struct.unpack('>I', raw_size)[0]
+        start = position + header_size
+        field = _ID3_FRAMES.get(frame_id.decode('latin-1'))
+        if field is not None and info[field] is None:
+            info[field] = _text(body[start:start + size])
+        position = start + size
+    return end
+
+
+def _read_id3v1(file, info):
+    """
+    Дополняет метаданные тегом ID3v1 в конце файла.
+
+    Аргументы:
+        file (file): Файл, открытый в двоичном режиме.
+        info (dict): Метаданные, пустые поля которых заполняются.
+
+    Возвращает:
+        int: Размер тега (128 или 0, если тега нет).
+    """
+    try:
+        file.seek(-128, os.SEEK_END)
+    except OSError:
+        return 0
+    tag = file.read(128)
+    if tag[:3] != b'TAG':
+        return 0
+    for field, start in (('title', 3), ('artist', 33), ('album', 63)):
+        if info[field] is None:
+            info[field] = tag[start:start + 30].split(b'\x00')[0].decode('latin-1').strip() or None
+    return 128
+
+
+def _parse_frame_header(header):
+    """
+    Разбирает заголовок кадра MPEG.
+
+    Аргументы:
+        header (bytes): Четыре байта заголовка.
+
+    Возвращает:
+        tuple: (версия, слой, битрейт в кбит/с, частота, размер стороны, сэмплов в кадре)
+            или None, если это не заголовок кадра.
+    """
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version_bits = header[1] >> 3 & 3
+    layer = 4 - (header[1] >> 1 & 3)
+    bitrate_index = header[2] >> 4
+    rate_index = header[2] >> 2 & 3
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    version = 1 if version_bits == 3 else 2
+    bitrate = _BITRATES[version, layer][bitrate_index]
+    sample_rate = _SAMPLE_RATES[version_bits][rate_index]
+    mono = header[3] >> 6 == 3
+    if version == 1:
+        side = 17 if mono else 32
+    else:
+        side = 9 if mono else 17
+    if layer == 1:
+        samples = 384
+    elif layer == 3 and version == 2:
+        samples = 576
+    else:
+        samples = 1152
+    return version, layer, bitrate, sample_rate, side, samples
+
+
+def _read_mp3(file, info, size):
+    """
+    Читает длительность, битрейт и частоту MP3.
+
+    Для VBR-файлов количество кадров берётся из заголовка Xing/Info или VBRI,
+    для CBR длительность вычисляется по размеру звуковых данных.
+
+    Аргументы:
+        file (file): Файл, открытый в двоичном режиме.
+        info (dict): Метаданные, дополняемые найденными полями.
+        size (int): Размер файла.
+    """
+    audio_start = _read_id3v2(file, info)
+    audio_end = size - _read_id3v1(file, info)
+    file.seek(audio_start)
+    data = file.read(64 * 1024)
+    position = data.find(b'\xff')
+    frame = None
+    while position != -1 and position + 4 <= len(data):
+        frame = _parse_frame_header(data[position:position + 4])
+        if frame is not None:
+            break
+        position = data.find(b'\xff', position + 1)
+    if frame is None:
+        return
+    _, _, bitrate, sample_rate, side, samples = frame
+    info['sample_rate'] = sample_rate
+    audio_bytes = audio_end - audio_start - position
+    frames = None
+    xing = position + 4 + side
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        if flags & 1:
+            frames = struct.unpack('>I', data[xing + 8:xing + 12])[0]
+    elif data[position + 36:position + 40] == b'VBRI':
+        frames = struct.unpack('>I', data[position + 50:position + 54])[0]
+    if frames:
+        duration = frames * samples / sample_rate
+        info['duration'] = duration
+        info['bitrate'] = round(audio_bytes * 8 / duration / 1000) if duration else bitrate
+    else:
+        info['bitrate'] = bitrate
+        info['duration'] = audio_bytes * 8 / (bitrate * 1000)
+
+
+def _read_wav(path, info):
+    """
+    Читает длительность, битрейт и частоту WAV.
+
+    Аргументы:
+        path (str): Путь к файлу.
+        info (dict): Метаданные, дополняемые найденными полями.
+    """
+    with wave.open(path, 'rb') as file:
+        rate = file.getframerate()
+        info['sample_rate'] = rate
+        info['duration'] = file.getnframes() / rate if rate else None
+        info['bitrate'] = rate * file.getnchannels() * file.getsampwidth() * 8 // 1000
+
+
+def read_metadata(path):
+    """
+    Читает метаданные файла.
+
+    Неизвестные форматы и повреждённые файлы дают словарь с пустыми полями.
+
+    Аргументы:
+        path (str): Путь к файлу.
+
+    Возвращает:
+        dict: Поля title, artist, album, duration (с), bitrate (кбит/с), sample_rate (Гц).
+
+    Выбрасывает:
+        OSError: Если файл не открывается.
+    """
+    info = _empty()
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        magic = file.read(12)
+        file.seek(0)
+        try:
+            if magic[:4] == b'RIFF' and magic[8:12] == b'WAVE':
+                _read_wav(path, info)
+            else:
+                _read_mp3(file, info, size)
+        except (wave.Error, struct.error, EOFError, ZeroDivisionError):
+            pass  # Повреждённый файл: возвращаем то, что удалось прочитать
+    return info
+
+
+def _scan(path):
+    """
+    Читает метаданные в процессе пула.
+
+    Аргументы:
+        path (str): Путь к файлу.
+
+    Возвращает:
+        dict: Метаданные или None, если файл не открылся.
+    """
+    try:
+        return read_metadata(path)
+    except OSError:
+        return None
+
+
+class MetadataCache:
+    """
+    Постоянный кэш метаданных в базе SQLite.
+
+    Запись действительна, пока время изменения и размер файла совпадают
+    с сохранёнными. Соединение общее для потоков и защищено блокировкой.
+
+    Атрибуты:
+        filename (str): Файл базы или ':memory:'.
+        _connection (sqlite3.Connection): Соединение с базой.
+        _lock (threading.Lock): Блокировка соединения.
+    """
+
+    def __init__(self, filename=':memory:'):
+        """
+        Открывает кэш, создавая таблицу при необходимости.
+
+        Аргументы:
+            filename (str, опционально): Файл базы. По умолчанию ':memory:'.
+        """
+        if filename != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.filename = filename
+        self._connection = sqlite3.connect(filename, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS metadata ('
+                'path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, '
+                'title TEXT, artist TEXT, album TEXT, '
+                'duration REAL, bitrate INTEGER, sample_rate INTEGER)')
+
+    def get(self, path, signature):
+        """
+        Возвращает сохранённые метаданные, если файл не изменился.
+
+        Аргументы:
+            path (str): Путь к файлу.
+            signature (tuple): (mtime_ns, size) файла.
+
+        Возвращает:
+            dict: Метаданные или None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                f'SELECT {", ".join(FIELDS)} FROM metadata '
+                'WHERE path = ? AND mtime_ns = ? AND size = ?',
+                (path, *signature)).fetchone()
+        return None if row is None else dict(zip(FIELDS, row))
+
+    def put_many(self, rows):
+        """
+        Сохраняет метаданные нескольких файлов одной транзакцией.
+
+        Аргументы:
+            rows (iterable): Кортежи (path, (mtime_ns, size), info).
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f'INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, {", ".join("?" * len(FIELDS))})',
+                ((path, *signature, *(info[field] for field in FIELDS))
+                 for path, signature, info in rows))
+
+    def __len__(self):
+        """
+        Возвращает количество записей.
+
+        Возвращает:
+            int: Количество файлов в кэше.
+        """
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM metadata').fetchone()[0]
+
+    def close(self):
+        """
+        Закрывает соединение с базой.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+class MetadataScanner:
+    """
+    Сканер метаданных: берёт неизменённые файлы из кэша, остальные читает в пуле процессов.
+
+    Атрибуты:
+        cache (MetadataCache): Кэш метаданных.
+        workers (int): Количество процессов пула или None — по числу процессоров.
+        parallel_threshold (int): Меньше стольких изменённых файлов читаются
+            в текущем процессе без запуска пула.
+        scanned (int): Файлов, прочитанных при последнем сканировании.
+        cached (int): Файлов, взятых из кэша при последнем сканировании.
+    """
+
+    def __init__(self, cache=None, workers=None, parallel_threshold=32):
+        """
+        Инициализирует сканер.
+
+        Аргументы:
+            cache (MetadataCache, опционально): Кэш. По умолчанию кэш в памяти.
+            workers (int, опционально): Количество процессов пула.
+            parallel_threshold (int, опционально): Порог запуска пула. По умолчанию 32.
+        """
+        self.cache = cache if cache is not None else MetadataCache()
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+        self.scanned = 0
+        self.cached = 0
+
+    def scan(self, paths, chunksize=64):
+        """
+        Возвращает метаданные файлов.
+
+        Аргументы:
+            paths (iterable): Пути к файлам.
+            chunksize (int, опционально): Файлов в одном задании пула. По умолчанию 64.
+
+        Возвращает:
+            dict: path -> метаданные; отсутствующие файлы пропускаются.
+        """
+        result = {}
+        changed = []
+        for path in dict.fromkeys(paths):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            info = self.cache.get(path, signature)
+            if info is None:
+                changed.append((path, signature))
+            else:
+                result[path] = info
+        self.cached = len(result)
+        self.scanned = len(changed)
+
+        changed_paths = [path for path, _ in changed]
+        if len(changed) < self.parallel_threshold:
+            infos = map(_scan, changed_paths)
+        else:
+            # Процессы пула запускаются заново, а не копируют плеер с открытым
+            # микшером SDL и потоками Qt
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                infos = list(executor.map(_scan, changed_paths, chunksize=chunksize))
+        rows = []
+        for (path, signature), info in zip(changed, infos):
+            if info is not None:
+                result[path] = info
+                rows.append((path, signature, info))
+        self.cache.put_many(rows)
+        return result
+
+    def lookup(self, path):
+        """
+        Возвращает метаданные файла из кэша, не читая сам файл.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Возвращает:
+            dict: Метаданные или None, если файла нет в кэше, он изменился
+                или недоступен.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return self.cache.get(path, (stat.st_mtime_ns, stat.st_size))
+
+    def get(self, path):
+        """
+        Возвращает метаданные одного файла.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Возвращает:
+            dict: Метаданные или None, если файл не открывается.
+        """
+        return self.scan([path]).get(path)
+
+
+_scanner = None
+_scanner_lock = threading.Lock()
+
+
+def get_scanner():
+    """
+    Возвращает общий сканер процесса, открывая кэш при первом обращении.
+
+    Файл кэша задаётся переменной окружения METADATA_CACHE, по умолчанию
+    ~/.cache/playlist/metadata.sqlite3.
+
+    Возвращает:
+        MetadataScanner: Сканер метаданных.
+    """
+    global _scanner
+    with _scanner_lock:
+        if _scanner is None:
+            filename = os.environ.get('METADATA_CACHE') or os.path.join(
+                os.path.expanduser('~'), '.cache', 'playlist', 'metadata.sqlite3')
+            _scanner = MetadataScanner(MetadataCache(filename))
+        return _scanner
@@ -1,68 +1,172 @@
+from functools import wraps
+from operator import attrgetter
+
+from audio_engine import get_engine
 from linked_list import *
-import pygame
-from PyQt5.QtCore import QThread
+from linked_list import _mutating
+from metadata import FIELDS, get_scanner
 
 
-class MusicPlayerThread(QThread):
+def _undoable(method):
     """
-    Класс потока для воспроизведения музыкальных треков.
+    Декоратор правок плейлиста, которые можно отменить.
 
-    Атрибуты:
-        track_item (LinkedListItem): Узел списка с данными трека.
-        playlist (PlayList): Плейлист, содержащий текущий трек.
-    """
+    Перед правкой сохраняет снимок плейлиста в стек отмены и очищает стек
+    повтора. Вложенные вызовы (например, remove через remove_node)
+    записываются как одна правка.
 
-    def __init__(self, track_item, playlist):
-        """
-        Инициализирует поток для воспроизведения трека.
+    Аргументы:
+        method (callable): Метод PlayList.
 
-        Аргументы:
-            track_item (LinkedListItem): Узел списка с треком.
-            playlist (PlayList): Текущий плейлист.
-        """
-        super().__init__()
-        self.track_item = track_item
-        self.playlist = playlist
-
-    def run(self):
-        """
-        Метод, запускаемый при старте потока.
-        Воспроизводит трек и проверяет, завершилось ли воспроизведение.
-        """
-        track = self.track_item.data
-        pygame.mixer.music.load(track.path)
-        pygame.mixer.music.play()
-
-        # Ожидание завершения трека или команды остановки
-        while pygame.mixer.music.get_busy():
-            self.msleep(100)  # Проверка каждые 100 миллисекунд
-            if self.playlist.is_stopped:
-                break  # Прерываем воспроизведение, если был вызван stop
-
-        # Переходим к следующему треку, если воспроизведение не было остановлено
-        if not self.playlist.is_stopped:
-            self.playlist.next_track()
+    Возвращает:
+        callable: Обёрнутый метод.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            if self._recording:
+                return method(self, *args, **kwargs)
+            self._recording = True
+            try:
+                snapshot = self.snapshot()
+                result = method(self, *args, **kwargs)
+            finally:
+                self._recording = False
+            self._undo_stack.append(snapshot)
+            if len(self._undo_stack) > self.undo_limit:
+                del self._undo_stack[0]
+            self._redo_stack.clear()
+            return result
+    return wrapper
 
 
 class Composition:
     """
     Класс, представляющий музыкальную композицию.
 
+    Метаданные файла (исполнитель, альбом, длительность, битрейт, частота)
+    читаются при первом обращении через общий сканер metadata.get_scanner()
+    или задаются сразу пакетным сканированием PlayList.scan_metadata.
+
     Атрибуты:
         title (str): Название трека.
         path (str): Путь к файлу с треком.
+        _duration (float): Длительность, заданная явно, или None.
+        _metadata (dict): Метаданные файла или None, пока они не прочитаны.
     """
 
-    def __init__(self, title, path):
+    def __init__(self, title, path, duration=None):
         """
         Инициализирует музыкальную композицию.
 
         Аргументы:
             title (str): Название композиции.
             path (str): Путь к файлу с композицией.
+            duration (float, опционально): Длительность в секундах. По умолчанию
+                берётся из метаданных файла.
         """
         self.title = title
         self.path = path
+        self._duration = duration
+        self._metadata = None
+
+    @property
+    def metadata(self):
+        """
+        Возвращает метаданные файла, читая их при первом обращении.
+
+        Возвращает:
+            dict: Поля metadata.FIELDS; у недоступного файла все поля None.
+        """
+        if self._metadata is None:
+            info = get_scanner().get(self.path)
+            self._metadata = info if info is not None else dict.fromkeys(FIELDS)
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, info):
+        """
+        Задаёт метаданные файла.
+
+        Аргументы:
+            info (dict): Поля metadata.FIELDS.
+        """
+        self._metadata = info
+
+    @property
+    def duration(self):
+        """
+        Возвращает длительность трека.
+
+        Возвращает:
+            float: Длительность в секундах или None, если она неизвестна.
+        """
+        if self._duration is not None:
+            return self._duration
+        return self.metadata['duration']
+
+    @property
+    def known_duration(self):
+        """
+        Возвращает длительность трека, если она уже известна, не читая файл.
+
+        Возвращает:
+            float: Длительность в секундах или None, если она задана не явно
+                и метаданные ещё не прочитаны.
+        """
+        if self._duration is not None or self._metadata is None:
+            return self._duration
+        return self._metadata['duration']
+
+    @duration.setter
+    def duration(self, value):
+        """
+        Задаёт длительность трека.
+
+        Аргументы:
+            value (float): Длительность в секундах.
+        """
+        self._duration = value
+
+    @property
+    def artist(self):
+        """
+        Возвращает исполнителя из тегов файла.
+
+        Возвращает:
+            str: Исполнитель или None.
+        """
+        return self.metadata['artist']
+
+    @property
+    def album(self):
+        """
+        Возвращает альбом из тегов файла.
+
+        Возвращает:
+            str: Альбом или None.
+        """
+        return self.metadata['album']
+
+    @property
+    def bitrate(self):
+        """
+        Возвращает битрейт файла.
+
+        Возвращает:
+            int: Битрейт в кбит/с или None.
+        """
+        return self.metadata['bitrate']
+
+    @property
+    def sample_rate(self):
+        """
+        Возвращает частоту дискретизации файла.
+
+        Возвращает:
+            int: Частота в герцах или None.
+        """
+        return self.metadata['sample_rate']
 
     def __repr__(self):
         """
@@ -90,10 +194,29 @@ class PlayList(LinkedList):
     Атрибуты:
         name (str): Название плейлиста.
         _current (LinkedListItem): Текущий трек.
+        _current_detached (bool): Флаг того, что текущий трек был удалён и
+            _current уже указывает на следующий за ним.
         is_paused (bool): Флаг паузы.
         is_stopped (bool): Флаг остановки.
+        undo_limit (int): Максимальная глубина истории отмены.
+        _undo_stack (list): Снимки плейлиста до каждой правки.
+        _redo_stack (list): Снимки плейлиста до каждой отмены.
+
+    Плейлист поддерживает хеш-индексы 'path' и 'title' по соответствующим
+    полям композиций и индекс позиций для быстрого доступа по номеру трека.
+    Все операции выполняются под блокировкой, поэтому поток воспроизведения
+    и поток интерфейса могут работать с плейлистом одновременно.
+    Все правки (добавление, удаление, перемещение, сортировка, разворот,
+    поворот и очистка) можно отменять и повторять: история хранится в виде
+    снимков, разделяющих узлы с плейлистом.
+    Воспроизведением занимается общий звуковой движок (audio_engine), который
+    открывает звуковое устройство только при первом воспроизведении.
+    Наблюдатели (ListObserver) кроме правок списка получают событие
+    current_changed при смене текущего трека.
     """
 
+    undo_limit = 100
+
     def __init__(self, name):
         """
         Инициализирует плейлист с заданным именем.
@@ -101,12 +224,17 @@ class PlayList(LinkedList):
         Аргументы:
             name (str): Название плейлиста.
         """
-        super().__init__()
+        super().__init__(indexed=True, thread_safe=True)
         self.name = name
         self._current = None
+        self._current_detached = False
+        self._undo_stack = []
+        self._redo_stack = []
+        self._recording = False
         self.is_paused = False
         self.is_stopped = False
-        pygame.mixer.init()  # Инициализация Pygame микшера
+        self.add_index('path', key=attrgetter('path'))
+        self.add_index('title', key=attrgetter('title'))
 
     def __str__(self):
         """
@@ -125,7 +253,7 @@ class PlayList(LinkedList):
             item (LinkedListItem, optional): Узел списка с начальным треком.
         """
         if item is not None:
-            self._current = item
+            self.set_current(item)
 
         # Проверка, если трек доступен
         print(f"Начинаем проигрывать плейлист '{self.name}' с трека: {self._current.data}")
@@ -139,50 +267,124 @@ class PlayList(LinkedList):
             track_item (LinkedListItem): Узел списка с треком.
         """
         if self.is_paused:
-            pygame.mixer.music.unpause()
+            get_engine().player.resume()
             self.is_paused = False
             return
+        self._load_track(track_item)
 
-        # Запуск нового потока для воспроизведения трека
-        self.music_thread = MusicPlayerThread(track_item, self)
-        self.music_thread.start()
+    def _load_track(self, track_item):
+        """
+        Отправляет потоку воспроизведения команду загрузить трек.
+
+        Аргументы:
+            track_item (LinkedListItem): Узел списка с треком.
+        """
+        self.is_paused = False
+        self.is_stopped = False
+        get_engine().player.play(self, track_item)
+
+    def set_current(self, item):
+        """
+        Делает трек текущим.
+
+        Аргументы:
+            item (LinkedListItem): Узел плейлиста с треком.
+        """
+        with self.lock:
+            self._current_detached = False
+            if item is not self._current:
+                self._current = item
+                self._notify('current_changed', item)
+
+    def advance(self, steps=1):
+        """
+        Сдвигает текущий трек по кольцу, не запуская воспроизведение.
+
+        Если текущий трек был удалён, _current уже указывает на следующий
+        за ним трек, поэтому первый шаг вперёд не выполняется.
+
+        Аргументы:
+            steps (int, опционально): Количество шагов, отрицательное значение — назад.
+                По умолчанию 1.
+
+        Возвращает:
+            LinkedListItem: Новый текущий узел.
+
+        Выбрасывает:
+            ValueError: Если текущего трека нет.
+        """
+        with self.lock:
+            if not self._current:
+                raise ValueError("Нет текущего трека.")
+            if self._current_detached and steps > 0:
+                steps -= 1
+            self._current_detached = False
+            previous = self._current
+            for _ in range(abs(steps)):
+                self._current = self._current.next_item if steps > 0 else self._current.previous_item
+            if self._current is not previous:
+                self._notify('current_changed', self._current)
+            return self._current
+
+    def following(self):
+        """
+        Возвращает трек, который станет текущим после перехода вперёд.
+
+        Возвращает:
+            LinkedListItem: Следующий узел или None, если текущего трека нет.
+        """
+        with self.lock:
+            if self._current is None or self._current_detached:
+                return self._current
+            return self._current.next_item
 
     def next_track(self):
         """
         Переходит к следующему треку в плейлисте.
         """
-        if not self._current:
-            raise ValueError("Нет текущего трека.")
-        self._current = self._current.next_item
-        print(f"Сейчас проигрывается трек: {self._current.data}")
-        self._play_track(self._current)
+        track_item = self.advance(1)
+        print(f"Сейчас проигрывается трек: {track_item.data}")
+        self._load_track(track_item)
 
     def previous_track(self):
         """
         Переходит к предыдущему треку в плейлисте.
         """
-        if not self._current:
-            raise ValueError("Нет текущего трека.")
-        self._current = self._current.previous_item
-        print(f"Сейчас проигрывается трек: {self._current.data}")
-        self._play_track(self._current)
+        track_item = self.advance(-1)
+        print(f"Сейчас проигрывается трек: {track_item.data}")
+        self._load_track(track_item)
 
     def stop(self):
         """
         Останавливает текущее воспроизведение.
         """
-        pygame.mixer.music.stop()
         self.is_stopped = True
+        player = get_engine().running_player
+        if player is not None:
+            player.stop()
         print("Воспроизведение остановлено.")
 
     def pause(self):
         """
         Приостанавливает текущее воспроизведение.
         """
-        pygame.mixer.music.pause()
+        player = get_engine().running_player
+        if player is not None:
+            player.pause()
         self.is_paused = True
         print("Воспроизведение поставлено на паузу.")
 
+    def seek(self, seconds):
+        """
+        Перематывает текущий трек.
+
+        Аргументы:
+            seconds (float): Позиция от начала трека в секундах.
+        """
+        player = get_engine().running_player
+        if player is not None:
+            player.seek(seconds)
+
     @property
     def current(self):
         """
@@ -195,6 +397,346 @@ class PlayList(LinkedList):
             raise ValueError("Нет текущего трека.")
         return self._current.data
 
+    def sort_by_title(self, reverse=False):
+        """
+        Сортирует треки по названию на месте.
+
+        Аргументы:
+            reverse (bool, опционально): Сортировать по убыванию. По умолчанию False.
+        """
+        self.sort(key=attrgetter('title'), reverse=reverse)
+
+    def sort_by_path(self, reverse=False):
+        """
+        Сортирует треки по пути к файлу на месте.
+
+        Аргументы:
+            reverse (bool, опционально): Сортировать по убыванию. По умолчанию False.
+        """
+        self.sort(key=attrgetter('path'), reverse=reverse)
+
+    def sort_by_duration(self, reverse=False):
+        """
+        Сортирует треки по длительности на месте.
+
+        Сортировка не читает файлы: треки, длительность которых ещё не
+        известна, остаются в конце плейлиста в исходном порядке. Чтобы
+        учесть все треки, метаданные сначала читают методом scan_metadata
+        в фоновом потоке.
+
+        Аргументы:
+            reverse (bool, опционально): Сортировать по убыванию. По умолчанию False.
+        """
+        def key(track):
+            duration = track.known_duration
+            return duration is None, -(duration or 0) if reverse else duration or 0
+
+        self.sort(key=key)
+
+    def scan_metadata(self, scanner=None):
+        """
+        Читает метаданные треков плейлиста одним пакетным сканированием.
+
+        Треки, чьи метаданные уже прочитаны или длительность задана явно,
+        пропускаются. Файлы читаются без блокировки плейлиста.
+
+        Аргументы:
+            scanner (MetadataScanner, опционально): Сканер. По умолчанию общий сканер.
+
+        Возвращает:
+            int: Количество треков, для которых прочитаны метаданные.
+        """
+        with self.lock:
+            tracks = [node.data for node in self
+                      if node.data._metadata is None and node.data._duration is None]
+        if not tracks:
+            return 0
+        infos = (scanner or get_scanner()).scan(track.path for track in tracks)
+        for track in tracks:
+            track.metadata = infos.get(track.path) or dict.fromkeys(FIELDS)
+        return len(tracks)
+
+    @_undoable
+    def append_left(self, item):
+        """
+        Добавляет трек в начало плейлиста с возможностью отмены.
+
+        Аргументы:
+            item (Composition): Композиция.
+        """
+        super().append_left(item)
+
+    @_undoable
+    def append_right(self, item):
+        """
+        Добавляет трек в конец плейлиста с возможностью отмены.
+
+        Аргументы:
+            item (Composition): Композиция.
+        """
+        super().append_right(item)
+
+    @_undoable
+    def insert_after(self, node, data):
+        """
+        Вставляет трек после узла node с возможностью отмены.
+
+        Аргументы:
+            node (LinkedListItem): Узел плейлиста.
+            data (Composition): Композиция.
+
+        Возвращает:
+            LinkedListItem: Созданный узел.
+        """
+        return super().insert_after(node, data)
+
+    @_undoable
+    def insert_before(self, node, data):
+        """
+        Вставляет трек перед узлом node с возможностью отмены.
+
+        Аргументы:
+            node (LinkedListItem): Узел плейлиста.
+            data (Composition): Композиция.
+
+        Возвращает:
+            LinkedListItem: Созданный узел.
+        """
+        return super().insert_before(node, data)
+
+    @_undoable
+    def remove_node(self, node):
+        """
+        Удаляет узел из плейлиста с возможностью отмены.
+
+        Аргументы:
+            node (LinkedListItem): Узел плейлиста.
+
+        Возвращает:
+            Composition: Удалённая композиция.
+        """
+        return super().remove_node(node)
+
+    @_undoable
+    def remove_many(self, nodes_or_predicate):
+        """
+        Удаляет несколько треков одной правкой с возможностью отмены.
+
+        Аргументы:
+            nodes_or_predicate (callable или iterable): Условие на композицию
+                или узлы плейлиста.
+
+        Возвращает:
+            int: Количество удалённых треков.
+        """
+        return super().remove_many(nodes_or_predicate)
+
+    @_undoable
+    def sort(self, key=None, reverse=False):
+        """
+        Сортирует плейлист на месте с возможностью отмены.
+
+        Аргументы:
+            key (callable, опционально): Функция вычисления ключа по композиции.
+            reverse (bool, опционально): Сортировать по убыванию. По умолчанию False.
+        """
+        super().sort(key=key, reverse=reverse)
+
+    @_undoable
+    def move_node(self, node, after=None):
+        """
+        Перемещает узел плейлиста после узла after с возможностью отмены.
+
+        Аргументы:
+            node (LinkedListItem): Перемещаемый узел.
+            after (LinkedListItem, опционально): Узел, после которого встаёт node.
+        """
+        super().move_node(node, after)
+
+    @_undoable
+    def move_block(self, start, end, after=None):
+        """
+        Перемещает подряд идущие треки от start до end с возможностью отмены.
+
+        Аргументы:
+            start (LinkedListItem): Первый узел блока.
+            end (LinkedListItem): Последний узел блока.
+            after (LinkedListItem, опционально): Узел, после которого встаёт блок.
+        """
+        super().move_block(start, end, after)
+
+    @classmethod
+    def from_iterable(cls, iterable, *args, **kwargs):
+        """
+        Создаёт плейлист из композиций с пустой историей отмены.
+
+        Аргументы:
+            iterable (iterable): Композиции.
+            *args, **kwargs: Аргументы конструктора плейлиста.
+
+        Возвращает:
+            PlayList: Новый плейлист.
+        """
+        playlist = super().from_iterable(iterable, *args, **kwargs)
+        playlist.clear_history()
+        return playlist
+
+    @_undoable
+    def extend(self, iterable):
+        """
+        Добавляет треки в конец плейлиста одной правкой с возможностью отмены.
+
+        Аргументы:
+            iterable (iterable): Композиции.
+
+        Возвращает:
+            int: Количество добавленных треков.
+        """
+        return super().extend(iterable)
+
+    @_undoable
+    def splice(self, other, after=None):
+        """
+        Встраивает треки другого списка после узла after с возможностью отмены.
+
+        Отменяется только правка этого плейлиста: other остаётся пустым.
+
+        Аргументы:
+            other (LinkedList): Встраиваемый список.
+            after (LinkedListItem, опционально): Узел, после которого встают треки.
+        """
+        super().splice(other, after)
+
+    @_undoable
+    def insert_at(self, index, data):
+        """
+        Вставляет трек на позицию index с возможностью отмены.
+
+        Аргументы:
+            index (int): Позиция трека.
+            data (Composition): Композиция.
+
+        Возвращает:
+            LinkedListItem: Созданный узел.
+        """
+        return super().insert_at(index, data)
+
+    @_undoable
+    def reverse(self):
+        """
+        Разворачивает плейлист на месте с возможностью отмены.
+        """
+        super().reverse()
+
+    @_undoable
+    def rotate(self, steps=1):
+        """
+        Поворачивает плейлист на steps шагов с возможностью отмены.
+
+        Аргументы:
+            steps (int, опционально): Количество шагов. По умолчанию 1.
+        """
+        super().rotate(steps)
+
+    @_undoable
+    def rotate_to(self, node):
+        """
+        Делает узел node первым треком плейлиста с возможностью отмены.
+
+        Аргументы:
+            node (LinkedListItem): Узел плейлиста.
+        """
+        super().rotate_to(node)
+
+    def clear_history(self):
+        """
+        Очищает историю отмены и повтора.
+
+        Нужна после правок, которые не должны отменяться, например после
+        загрузки треков из базы: иначе отмена вернула бы плейлист к
+        состоянию, которого пользователь не видел.
+        """
+        with self.lock:
+            self._undo_stack.clear()
+            self._redo_stack.clear()
+
+    def _keep_current(self):
+        """
+        Сбрасывает текущий трек на первый, если его нет в плейлисте.
+        """
+        if self._current is None:
+            return
+        try:
+            self.index_of(self._current)
+        except ValueError:
+            self.set_current(self.first_item)
+
+    def undo(self):
+        """
+        Отменяет последнюю правку плейлиста.
+
+        Возвращает:
+            bool: True, если правка отменена, False, если отменять нечего.
+        """
+        with self.lock:
+            if not self._undo_stack:
+                return False
+            self._redo_stack.append(self.snapshot())
+            self.restore(self._undo_stack.pop())
+            self._keep_current()
+            return True
+
+    def redo(self):
+        """
+        Повторяет последнюю отменённую правку плейлиста.
+
+        Возвращает:
+            bool: True, если правка повторена, False, если повторять нечего.
+        """
+        with self.lock:
+            if not self._redo_stack:
+                return False
+            self._undo_stack.append(self.snapshot())
+            self.restore(self._redo_stack.pop())
+            self._keep_current()
+            return True
+
+    def _changed(self):
+        """
+        Просит поток воспроизведения заново выбрать следующий трек после правки плейлиста.
+        """
+        player = get_engine().running_player
+        if player is not None and player.playlist is self:
+            player.preload()
+
+    def _detach(self, node, position=None):
+        """
+        Удаляет узел из плейлиста, не оставляя _current висячей ссылкой.
+
+        Если удаляется текущий трек, текущим становится следующий за ним.
+
+        Аргументы:
+            node (LinkedListItem): Удаляемый узел.
+            position (int, опционально): Позиция узла, если она известна.
+        """
+        if node == self._current:
+            self._current = node.next_item if len(self) > 1 else None
+            self._current_detached = True
+            self._notify('current_changed', self._current)
+        super()._detach(node, position)
+
+    @_undoable
+    def clear(self):
+        """
+        Удаляет из плейлиста все треки и сбрасывает текущий трек с возможностью отмены.
+        """
+        with self.lock:
+            super().clear()
+            self._current_detached = False
+            if self._current is not None:
+                self._current = None
+                self._notify('current_changed', None)
+
     def __repr__(self):
         """
         Возвращает строковое представление плейлиста.
@@ -204,6 +746,8 @@ class PlayList(LinkedList):
         """
         return f"PlayList(name='{self.name}', tracks=[{', '.join(str(node.data) for node in self)}])"
 
+    @_undoable
+    @_mutating
     def move(self, old_index, new_index):
         """
         Перемещает трек с позиции old_index на позицию new_index.
@@ -230,22 +774,46 @@ class PlayList(LinkedList):
         if old_index < 0 or old_index >= length or new_index < 0 or new_index >= length:
             raise IndexError("Индекс вне диапазона")
 
-        # Шаг 1: Найти элемент по старой позиции
-        current = self.first_item
-        for _ in range(old_index):
-            current = current.next_item
+        if old_index == new_index:
+            return
+
+        # Перемещаем сам узел, не пересоздавая его и не ища по значению
+        node = self.node_at(old_index)
+        if new_index == 0:
+            after = None
+        elif new_index > old_index:
+            after = self.node_at(new_index)
+        else:
+            after = self.node_at(new_index - 1)
+        self.move_node(node, after)
+
+    @_undoable
+    @_mutating
+    def move_range(self, first_index, last_index, new_index):
+        """
+        Перемещает подряд идущие треки с позиций first_index..last_index так,
+        чтобы первый из них оказался на позиции new_index.
 
-        # Сохраняем данные для перемещаемого узла
-        data_to_move = current.data
+        Аргументы:
+            first_index (int): Индекс первого перемещаемого трека.
+            last_index (int): Индекс последнего перемещаемого трека.
+            new_index (int): Новый индекс первого трека блока.
 
-        # Шаг 2: Удалить элемент с его текущей позиции
-        self.remove(data_to_move)
+        Выбрасывает:
+            IndexError: Если индексы вне допустимого диапазона.
+        """
+        length = len(self)
+        count = last_index - first_index + 1
+        if not 0 <= first_index <= last_index < length or not 0 <= new_index <= length - count:
+            raise IndexError("Индекс вне диапазона")
+        if new_index == first_index:
+            return
 
-        # Шаг 3: Вставить элемент на новую позицию
+        start, end = self.node_at(first_index), self.node_at(last_index)
         if new_index == 0:
-            self.append_left(data_to_move)
+            after = None
+        elif new_index - 1 < first_index:
+            after = self.node_at(new_index - 1)
         else:
-            target = self.first_item
-            for _ in range(new_index - 1):
-                target = target.next_item
-            self.insert(target.data, data_to_move)
+            after = self.node_at(new_index - 1 + count)
+        self.move_block(start, end, after)
@@ -0,0 +1,343 @@
+"""Модель списка треков плейлиста для представлений Qt.
+
+Модель подписывается на правки плейлиста как его наблюдатель и сообщает
+представлению только о затронутых строках (rowsInserted, rowsRemoved,
+rowsMoved, dataChanged), поэтому правка большого плейлиста не пересоздаёт
+строки списка. Модель хранит копию порядка узлов и меняет её в потоке
+интерфейса: правки из других потоков (например, импорт каталога)
+передаются туда очередью событий. События одного пакета правок
+(batch_begin/batch_end) применяются вместе, а текущий трек выделяется
+жирным шрифтом.
+"""
+
+import threading
+
+from PyQt5 import QtCore, QtGui
+
+
+class PlaylistModel(QtCore.QAbstractListModel):
+    """
+    Модель Qt, показывающая треки плейлиста в виде "номер) название".
+
+    Строка хранит ссылку на узел плейлиста в роли NodeRole, поэтому по
+    выделенной строке узел находится за O(1) без разбора текста.
+
+    Атрибуты:
+        NodeRole (int): Роль данных, возвращающая узел плейлиста.
+        reset_threshold (int): Если за раз накопилось больше событий,
+            модель перечитывает плейлист целиком вместо поочерёдного применения.
+        _playlist (PlayList): Показываемый плейлист или None.
+        _nodes (list): Узлы плейлиста в порядке строк модели.
+        _bold (LinkedListItem): Узел, показанный жирным шрифтом, или None.
+        _events (list): События, ещё не применённые к модели.
+        _in_batch (bool): Флаг открытого пакета правок плейлиста.
+        _scheduled (bool): Флаг того, что обработка очереди уже запланирована
+            в потоке модели.
+        _lock (threading.Lock): Блокировка очереди событий.
+    """
+
+    NodeRole = QtCore.Qt.UserRole
+    reset_threshold = 1000
+
+    _pending = QtCore.pyqtSignal()
+
+    def __init__(self, playlist=None, parent=None):
+        """
+        Инициализирует модель.
+
+        Аргументы:
+            playlist (PlayList, опционально): Показываемый плейлист.
+            parent (QObject, опционально): Родительский объект Qt.
+        """
+        super().__init__(parent)
+        self._playlist = None
+        self._nodes = []
+        self._bold = None
+        self._events = []
+        self._in_batch = False
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self._pending.connect(self._apply_pending, QtCore.Qt.QueuedConnection)
+        self.set_playlist(playlist)
+
+    @property
+    def playlist(self):
+        """
+        Возвращает показываемый плейлист.
+
+        Возвращает:
+            PlayList: Плейлист или None.
+        """
+        return self._playlist
+
+    def set_playlist(self, playlist):
+        """
+        Показывает другой плейлист.
+
+        Аргументы:
+            playlist (PlayList): Плейлист или None.
+        """
+        if self._playlist is not None:
+            with self._playlist.lock:
+                self._playlist.unsubscribe(self)
+        self._playlist = playlist
+        if playlist is not None:
+            with playlist.lock:
+                playlist.subscribe(self)
+                self._reload()
+        else:
+            self.beginResetModel()
+            with self._lock:
+                self._events.clear()
+            self._nodes = []
+            self._bold = None
+            self.endResetModel()
+
+    def node(self, row):
+        """
+        Возвращает узел плейлиста в строке модели.
+
+        Аргументы:
+            row (int): Номер строки.
+
+        Возвращает:
+            LinkedListItem: Узел плейлиста.
+        """
+        return self._nodes[row]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """
+        Возвращает количество строк.
+
+        Аргументы:
+            parent (QModelIndex, опционально): Родительский индекс.
+
+        Возвращает:
+            int: Количество треков; у строк списка дочерних строк нет.
+        """
+        return 0 if parent.isValid() else len(self._nodes)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """
+        Возвращает данные строки.
+
+        Аргументы:
+            index (QModelIndex): Индекс строки.
+            role (int, опционально): Роль данных.
+
+        Возвращает:
+            str: "номер) название" для DisplayRole, путь к файлу для ToolTipRole;
+                LinkedListItem: узел плейлиста для NodeRole;
+                QFont: жирный шрифт текущего трека для FontRole; иначе None.
+        """
+        if not index.isValid():
+            return None
+        node = self._nodes[index.row()]
+        if role == self.NodeRole:
+            return node
+        if role == QtCore.Qt.DisplayRole:
+            return f'{index.row() + 1}) {node.data}'
+        if role == QtCore.Qt.ToolTipRole:
+            return node.data.path
+        if role == QtCore.Qt.FontRole and node is self._playlist._current:
+            font = QtGui.QFont()
+            font.setBold(True)
+            return font
+        return None
+
+    def batch_begin(self):
+        """
+        Принимает начало пакета правок: события копятся до его конца.
+        """
+        self._in_batch = True
+
+    def batch_end(self):
+        """
+        Принимает конец пакета правок и планирует применение накопленных событий.
+        """
+        self._in_batch = False
+        self._schedule()
+
+    def inserted(self, node, position):
+        """
+        Принимает событие плейлиста о добавленном узле.
+
+        Аргументы:
+            node (LinkedListItem): Узел.
+            position (int): Позиция узла.
+        """
+        self._post(('inserted', node, position))
+
+    def removed(self, node, position):
+        """
+        Принимает событие плейлиста об удалённом узле.
+
+        Аргументы:
+            node (LinkedListItem): Узел.
+            position (int): Позиция узла до удаления.
+        """
+        self._post(('removed', node, position))
+
+    def moved(self, node, source, target):
+        """
+        Принимает событие плейлиста о перемещённом узле.
+
+        Аргументы:
+            node (LinkedListItem): Узел.
+            source (int): Прежняя позиция.
+            target (int): Новая позиция.
+        """
+        self._post(('moved', node, source, target))
+
+    def reordered(self):
+        """
+        Принимает событие плейлиста о полной перестановке: модель перечитывает плейлист.
+        """
+        self._post(('reset',))
+
+    cleared = reordered
+
+    def current_changed(self, node):
+        """
+        Принимает событие плейлиста о смене текущего трека.
+
+        Аргументы:
+            node (LinkedListItem): Новый текущий узел или None.
+        """
+        self._post(('current',))
+
+    def _post(self, event):
+        """
+        Ставит событие в очередь; вне пакета правок сразу планирует её обработку.
+
+        Вызывается под блокировкой плейлиста в потоке правки.
+
+        Аргументы:
+            event (tuple): Имя события и его аргументы.
+        """
+        with self._lock:
+            self._events.append(event)
+        if not self._in_batch:
+            self._schedule()
+
+    def _schedule(self):
+        """
+        Планирует обработку очереди событий.
+
+        В потоке модели очередь обрабатывается сразу, из другого потока —
+        одним сигналом с отложенным соединением на любое число событий.
+        """
+        if QtCore.QThread.currentThread() == self.thread():
+            self._apply_pending()
+            return
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._pending.emit()
+
+    def _apply_pending(self):
+        """
+        Применяет накопленные события к строкам модели.
+
+        Подряд идущие вставки и удаления соседних строк объединяются в один
+        сигнал. После правок номера строк, сдвинутых правками, обновляются
+        одним сигналом dataChanged, а при смене текущего трека шрифт
+        обновляется только в строках прежнего и нового текущего трека.
+        """
+        with self._lock:
+            events, self._events = self._events, []
+            self._scheduled = False
+        if not events:
+            return
+        if len(events) > self.reset_threshold or any(event[0] == 'reset' for event in events):
+            with self._playlist.lock:
+                self._reload()
+            return
+        top = len(self._nodes)
+        current = False
+        i = 0
+        while i < len(events):
+            name, *arguments = events[i]
+            if name == 'current':
+                current = True
+                i += 1
+                continue
+            node, *positions = arguments
+            if name == 'moved':
+                source, target = positions
+                i += 1
+                if source == target:
+                    continue
+                self.beginMoveRows(QtCore.QModelIndex(), source, source, QtCore.QModelIndex(),
+                                   target if target < source else target + 1)
+                del self._nodes[source]
+                self._nodes.insert(target, node)
+                self.endMoveRows()
+                top = min(top, source, target)
+                continue
+            first = positions[0]
+            nodes = [node]
+            i += 1
+            while i < len(events) and events[i][0] == name:
+                following = events[i][2]
+                if following != (first + len(nodes) if name == 'inserted' else first):
+                    break
+                nodes.append(events[i][1])
+                i += 1
+            last = first + len(nodes) - 1
+            if name == 'inserted':
+                self.beginInsertRows(QtCore.QModelIndex(), first, last)
+                self._nodes[first:first] = nodes
+                self.endInsertRows()
+                top = min(top, last + 1)
+            else:
+                self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+                del self._nodes[first:last + 1]
+                self.endRemoveRows()
+                top = min(top, first)
+        if current:
+            previous, self._bold = self._bold, self._playlist._current
+            for node in {previous, self._bold} - {None}:
+                row = self._row(node)
+                if row is not None:
+                    self.dataChanged.emit(self.index(row), self.index(row), [QtCore.Qt.FontRole])
+        if top < len(self._nodes):
+            self.dataChanged.emit(self.index(top), self.index(len(self._nodes) - 1),
+                                  [QtCore.Qt.DisplayRole])
+
+    def _row(self, node):
+        """
+        Находит строку узла через индекс позиций плейлиста за O(log n).
+
+        Если модель ещё не применила часть правок и позиции расходятся,
+        строка ищется в копии порядка узлов.
+
+        Аргументы:
+            node (LinkedListItem): Узел плейлиста.
+
+        Возвращает:
+            int: Номер строки или None, если узла в модели нет.
+        """
+        with self._playlist.lock:
+            try:
+                row = self._playlist.index_of(node)
+            except ValueError:
+                row = None
+        if row is not None and row < len(self._nodes) and self._nodes[row] is node:
+            return row
+        try:
+            return self._nodes.index(node)
+        except ValueError:
+            return None
+
+    def _reload(self):
+        """
+        Перечитывает плейлист целиком. Вызывается под блокировкой плейлиста.
+        """
+        self.beginResetModel()
+        with self._lock:
+            self._events.clear()
+        self._nodes = list(self._playlist)
+        self._bold = self._playlist._current
+        self.endResetModel()
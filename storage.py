@@ -0,0 +1,737 @@
+"""Хранение плейлистов в базе SQLite.
+
+У каждого трека в базе есть вещественная позиция: порядок трека в плейлисте
+задаётся сортировкой по ней. Новый или перемещённый трек получает позицию
+между позициями соседей, поэтому добавление, удаление и перемещение
+записывают только затронутые строки. Если между соседями не остаётся места,
+позиции плейлиста пересчитываются целиком.
+
+Хранилище следит за правками плейлиста как его наблюдатель и записывает
+их одной транзакцией по завершении каждого пакета правок. Названия плейлистов
+читаются сразу, а треки — только при первом открытии плейлиста.
+
+С журналом предзаписи (модуль journal) каждая записанная правка ещё и
+дописывается в журнал, который сбрасывается на диск групповым коммитом,
+а база работает в режиме WAL без fsync на каждую транзакцию. Файл базы
+служит контрольной точкой: при открытии хвост журнала проигрывается
+поверх неё, после чего база сбрасывается на диск и журнал очищается.
+Каждая транзакция базы — одна запись журнала с номером LSN, а номер
+последней записанной транзакции хранится в самой базе (таблица
+journal_state). База может оказаться и впереди журнала, и позади него:
+при проигрывании применяются только транзакции с большим номером.
+
+Реестр плейлистов (PlaylistRegistry) находит плейлист по названию через
+словарь и держит названия в отсортированном списке, а плейлисты создаёт
+и загружает только при первом обращении к ним.
+"""
+
+import bisect
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from journal import (CREATE, DELETE, DROP, INSERT, MOVE, Journal, decode_transaction, encode,
+                     encode_transaction)
+from linked_list import ListObserver
+from playlist import Composition, PlayList
+
+
+def default_filename():
+    """
+    Возвращает файл базы плейлистов по умолчанию.
+
+    Файл задаётся переменной окружения PLAYLIST_DB, по умолчанию
+    ~/.local/share/playlist/playlists.sqlite3.
+
+    Возвращает:
+        str: Путь к файлу базы.
+    """
+    return os.environ.get('PLAYLIST_DB') or os.path.join(
+        os.path.expanduser('~'), '.local', 'share', 'playlist', 'playlists.sqlite3')
+
+
+class _Binding(ListObserver):
+    """
+    Наблюдатель плейлиста, записывающий его правки в базу.
+
+    Во время пакета правок копит удалённые строки и изменённые узлы, а по его
+    завершении (событие batch_end) раздаёт изменённым узлам позиции между
+    соседями и записывает всё одной транзакцией.
+
+    Атрибуты:
+        store (PlaylistStore): Хранилище.
+        playlist_id (int): Идентификатор плейлиста в базе.
+        playlist (PlayList): Плейлист.
+        rows (dict): Узел -> [идентификатор строки, позиция].
+        _dirty (dict): Добавленные и перемещённые узлы в порядке событий.
+        _deleted (list): Идентификаторы строк удалённых треков.
+        _renumber (bool): Флаг пересчёта позиций всего плейлиста.
+    """
+
+    def __init__(self, store, playlist_id, playlist, rows):
+        """
+        Инициализирует наблюдателя.
+
+        Аргументы:
+            store (PlaylistStore): Хранилище.
+            playlist_id (int): Идентификатор плейлиста в базе.
+            playlist (PlayList): Плейлист.
+            rows (dict): Узел -> [идентификатор строки, позиция] для треков,
+                уже записанных в базу.
+        """
+        self.store = store
+        self.playlist_id = playlist_id
+        self.playlist = playlist
+        self.rows = rows
+        self._dirty = {}
+        self._deleted = []
+        self._renumber = False
+
+    def inserted(self, node, position):
+        """
+        Отмечает добавленный узел.
+
+        Аргументы:
+            node (LinkedListItem): Узел.
+            position (int): Позиция узла.
+        """
+        self._dirty[node] = None
+
+    def moved(self, node, source, target):
+        """
+        Отмечает перемещённый узел.
+
+        Аргументы:
+            node (LinkedListItem): Узел.
+            source (int): Прежняя позиция.
+            target (int): Новая позиция.
+        """
+        self._dirty[node] = None
+
+    def removed(self, node, position):
+        """
+        Отмечает удалённый узел.
+
+        Аргументы:
+            node (LinkedListItem): Узел.
+            position (int): Позиция узла до удаления.
+        """
+        self._dirty.pop(node, None)
+        row = self.rows.pop(node, None)
+        if row is not None:
+            self._deleted.append(row[0])
+
+    def reordered(self):
+        """
+        Отмечает, что порядок и состав треков изменились целиком.
+        """
+        self._renumber = True
+
+    def cleared(self):
+        """
+        Отмечает удаление всех треков.
+        """
+        self._deleted.extend(row[0] for row in self.rows.values())
+        self.rows.clear()
+        self._dirty.clear()
+
+    def batch_end(self):
+        """
+        Записывает накопленные правки в базу.
+        """
+        if not (self._dirty or self._deleted or self._renumber):
+            return
+        if not self._renumber:
+            positions = self._positions()
+            self._renumber = positions is None
+        if self._renumber:
+            positions = [(node, float(position)) for position, node in enumerate(self.playlist, 1)]
+            current = {node for node, _ in positions}
+            for node in [node for node in self.rows if node not in current]:
+                self._deleted.append(self.rows.pop(node)[0])
+        self.store._write(self, positions, self._deleted)
+        self._dirty.clear()
+        self._deleted = []
+        self._renumber = False
+
+    def _positions(self):
+        """
+        Раздаёт изменённым узлам позиции между позициями соседей.
+
+        Подряд идущие изменённые узлы получают равномерно расставленные
+        позиции между ближайшими неизменёнными соседями.
+
+        Возвращает:
+            list: Пары (узел, позиция) или None, если между соседями
+                не хватает точности и плейлист нужно пересчитать целиком.
+        """
+        first = self.playlist.first_item
+        positions = []
+        done = set()
+        for node in self._dirty:
+            if node in done:
+                continue
+            start = node
+            while start is not first and start.previous_item in self._dirty:
+                start = start.previous_item
+            run = []
+            current = start
+            while True:
+                run.append(current)
+                current = current.next_item
+                if current is first or current not in self._dirty:
+                    break
+            done.update(run)
+            low = None if start is first else self.rows[start.previous_item][1]
+            high = None if current is first else self.rows[current][1]
+            if high is None:
+                low = 0.0 if low is None else low
+                step = 1.0
+            elif low is None:
+                low, step = high - len(run) - 1, 1.0
+            else:
+                step = (high - low) / (len(run) + 1)
+                if low + step <= low or low + step * len(run) >= high:
+                    return None
+            positions.extend((node, low + step * i) for i, node in enumerate(run, 1))
+        return positions
+
+
+class PlaylistStore:
+    """
+    Плейлисты и их треки в базе SQLite.
+
+    Открытые хранилищем плейлисты сохраняют свои правки сами: хранилище
+    подписывается на них как наблюдатель. Соединение общее для потоков
+    и защищено блокировкой, поэтому плейлист можно менять из фонового
+    потока (например, при импорте каталога).
+
+    Атрибуты:
+        filename (str): Файл базы или ':memory:'.
+        journal (Journal): Журнал предзаписи или None.
+        _connection (sqlite3.Connection): Соединение с базой.
+        _lock (threading.RLock): Блокировка соединения.
+        _ids (dict): Плейлист -> идентификатор в базе.
+        _bindings (dict): Плейлист с загруженными треками -> его наблюдатель.
+        _lsn (int): Номер последней транзакции, записанной в базу.
+        _operations (list): Операции открытой транзакции для журнала.
+    """
+
+    def __init__(self, filename=':memory:', journal=None):
+        """
+        Открывает хранилище, создавая таблицы при необходимости.
+
+        Если задан журнал, его записи, не попавшие в контрольную точку,
+        проигрываются поверх базы.
+
+        Аргументы:
+            filename (str, опционально): Файл базы. По умолчанию ':memory:'.
+            journal (str, опционально): Файл журнала предзаписи. По умолчанию
+                журнал не ведётся и каждая правка сбрасывается на диск самой базой.
+        """
+        if filename != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.filename = filename
+        self._connection = sqlite3.connect(filename, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._ids = {}
+        self._bindings = {}
+        self._operations = []
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS playlists ('
+                'id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS tracks ('
+                'id INTEGER PRIMARY KEY, playlist_id INTEGER NOT NULL, '
+                'position REAL NOT NULL, title TEXT, path TEXT, duration REAL)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS tracks_order ON tracks (playlist_id, position)')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS journal_state ('
+                'id INTEGER PRIMARY KEY CHECK (id = 0), lsn INTEGER NOT NULL)')
+            self._connection.execute(
+                'INSERT OR IGNORE INTO journal_state (id, lsn) VALUES (0, 0)')
+        self._lsn = self._connection.execute('SELECT lsn FROM journal_state').fetchone()[0]
+        self.journal = None
+        if journal is not None:
+            # Сохранность правок обеспечивает журнал, база сбрасывается на диск в контрольных точках
+            self._connection.execute('PRAGMA journal_mode = WAL')
+            self._connection.execute('PRAGMA synchronous = NORMAL')
+            self.journal = Journal(journal, checkpoint=self.checkpoint)
+            self._replay(self.journal.records())
+            self.checkpoint()
+
+    def names(self):
+        """
+        Возвращает названия сохранённых плейлистов, не читая их треки.
+
+        Возвращает:
+            list: Названия в порядке создания плейлистов.
+        """
+        with self._lock:
+            return [name for name, in self._connection.execute(
+                'SELECT name FROM playlists ORDER BY id')]
+
+    def playlists(self):
+        """
+        Возвращает сохранённые плейлисты без треков.
+
+        Треки плейлиста загружаются методом open при первом открытии.
+
+        Возвращает:
+            list: Пустые плейлисты в порядке создания.
+        """
+        result = []
+        with self._lock:
+            for playlist_id, name in self._connection.execute(
+                    'SELECT id, name FROM playlists ORDER BY id').fetchall():
+                playlist = PlayList(name)
+                self._ids[playlist] = playlist_id
+                result.append(playlist)
+        return result
+
+    def is_loaded(self, playlist):
+        """
+        Проверяет, загружены ли треки плейлиста и записываются ли его правки.
+
+        Аргументы:
+            playlist (PlayList): Плейлист.
+
+        Возвращает:
+            bool: True, если плейлист открыт или создан этим хранилищем.
+        """
+        return playlist in self._bindings
+
+    def open(self, playlist):
+        """
+        Загружает треки плейлиста, если они ещё не загружены.
+
+        Аргументы:
+            playlist (PlayList): Плейлист, полученный из playlists.
+
+        Возвращает:
+            PlayList: Тот же плейлист.
+
+        Выбрасывает:
+            KeyError: Если плейлист не получен из этого хранилища.
+            ValueError: Если треки не загружены, а в плейлисте уже есть треки:
+                строки базы нельзя сопоставить с его узлами.
+        """
+        # Блокировка плейлиста берётся раньше блокировки хранилища, как и при его правках
+        with playlist.lock, self._lock:
+            if playlist in self._bindings:
+                return playlist
+            playlist_id = self._ids[playlist]
+            if len(playlist):
+                raise ValueError(f"Плейлист {playlist.name} не пуст, треки из базы не загружены")
+            rows = self._connection.execute(
+                'SELECT id, position, title, path, duration FROM tracks '
+                'WHERE playlist_id = ? ORDER BY position', (playlist_id,)).fetchall()
+            playlist.extend(Composition(title, path, duration)
+                            for _, _, title, path, duration in rows)
+            playlist.clear_history()
+            nodes = {node: [row[0], row[1]] for node, row in zip(playlist, rows)}
+            self._bind(playlist, _Binding(self, playlist_id, playlist, nodes))
+        return playlist
+
+    def get(self, name):
+        """
+        Возвращает сохранённый плейлист по названию, не читая его треки.
+
+        Треки плейлиста загружаются методом open при первом открытии.
+
+        Аргументы:
+            name (str): Название плейлиста.
+
+        Возвращает:
+            PlayList: Пустой плейлист.
+
+        Выбрасывает:
+            KeyError: Если плейлиста с таким названием нет.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT id FROM playlists WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                raise KeyError(name)
+            playlist = PlayList(name)
+            self._ids[playlist] = row[0]
+            return playlist
+
+    def load(self, name):
+        """
+        Загружает плейлист с треками по названию.
+
+        Аргументы:
+            name (str): Название плейлиста.
+
+        Возвращает:
+            PlayList: Плейлист.
+
+        Выбрасывает:
+            KeyError: Если плейлиста с таким названием нет.
+        """
+        return self.open(self.get(name))
+
+    def create(self, playlist):
+        """
+        Сохраняет новый плейлист вместе с его треками.
+
+        Дальнейшие правки плейлиста записываются автоматически.
+
+        Аргументы:
+            playlist (PlayList): Плейлист.
+
+        Выбрасывает:
+            ValueError: Если плейлист с таким названием уже сохранён.
+        """
+        with playlist.lock, self._lock:
+            try:
+                with self._transaction():
+                    cursor = self._connection.execute(
+                        'INSERT INTO playlists (name) VALUES (?)', (playlist.name,))
+                    self._log(CREATE, cursor.lastrowid, playlist.name)
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Плейлист {playlist.name} уже существует") from None
+            self._ids[playlist] = cursor.lastrowid
+            binding = _Binding(self, cursor.lastrowid, playlist, {})
+            self._bind(playlist, binding)
+            binding.reordered()
+            binding.batch_end()
+
+    def delete(self, playlist):
+        """
+        Удаляет плейлист и его треки из базы.
+
+        Аргументы:
+            playlist (PlayList): Плейлист этого хранилища.
+        """
+        with playlist.lock, self._lock:
+            binding = self._bindings.pop(playlist, None)
+            if binding is not None:
+                playlist.unsubscribe(binding)
+            playlist_id = self._ids.pop(playlist, None)
+            if playlist_id is None:
+                return
+            with self._transaction():
+                self._connection.execute('DELETE FROM tracks WHERE playlist_id = ?', (playlist_id,))
+                self._connection.execute('DELETE FROM playlists WHERE id = ?', (playlist_id,))
+                self._log(DROP, playlist_id)
+
+    def _bind(self, playlist, binding):
+        """
+        Подписывает наблюдателя на правки плейлиста.
+
+        Аргументы:
+            playlist (PlayList): Плейлист.
+            binding (_Binding): Наблюдатель.
+        """
+        self._bindings[playlist] = binding
+        playlist.subscribe(binding)
+
+    def _write(self, binding, positions, deleted):
+        """
+        Записывает правки плейлиста одной транзакцией.
+
+        Аргументы:
+            binding (_Binding): Наблюдатель плейлиста.
+            positions (list): Пары (узел, позиция) добавленных и перемещённых треков.
+            deleted (list): Идентификаторы строк удалённых треков.
+        """
+        rows = binding.rows
+        with self._transaction():
+            execute = self._connection.execute
+            if deleted:
+                self._connection.executemany(
+                    'DELETE FROM tracks WHERE id = ?', ((rowid,) for rowid in deleted))
+            for rowid in deleted:
+                self._log(DELETE, rowid)
+            updates = []
+            for node, position in positions:
+                row = rows.get(node)
+                if row is None:
+                    track = node.data
+                    cursor = execute(
+                        'INSERT INTO tracks (playlist_id, position, title, path, duration) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (binding.playlist_id, position, track.title, track.path, track._duration))
+                    rows[node] = [cursor.lastrowid, position]
+                    self._log(INSERT, cursor.lastrowid, binding.playlist_id, position,
+                              track._duration, track.title, track.path)
+                elif row[1] != position:
+                    row[1] = position
+                    updates.append((position, row[0]))
+                    self._log(MOVE, row[0], position)
+            self._connection.executemany('UPDATE tracks SET position = ? WHERE id = ?', updates)
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Открывает транзакцию базы, операции которой попадают в журнал одной записью.
+
+        Вместе с правками транзакция записывает в базу свой номер LSN,
+        а запись в журнал дописывается после фиксации транзакции.
+        """
+        with self._lock:
+            self._operations = operations = []
+            with self._connection:
+                yield
+                if self.journal is not None and operations:
+                    self._connection.execute(
+                        'UPDATE journal_state SET lsn = ?', (self._lsn + 1,))
+            if self.journal is not None and operations:
+                self._lsn += 1
+                self.journal.append(encode_transaction(self._lsn, operations))
+
+    def _log(self, operation, *fields):
+        """
+        Добавляет операцию в запись журнала открытой транзакции, если журнал ведётся.
+
+        Аргументы:
+            operation (int): Код операции.
+            *fields: Поля операции.
+        """
+        if self.journal is not None:
+            self._operations.append(encode(operation, *fields))
+
+    def _replay(self, records):
+        """
+        Применяет к базе одной транзакцией записи журнала, которых в ней ещё нет.
+
+        Транзакции с номером не больше номера, сохранённого в базе,
+        уже записаны в неё и пропускаются.
+
+        Аргументы:
+            records (iterable): Содержимое записей журнала.
+        """
+        with self._lock, self._connection:
+            execute = self._connection.execute
+            for record in records:
+                lsn, operations = decode_transaction(record)
+                if lsn <= self._lsn:
+                    continue
+                for operation, fields in operations:
+                    self._apply(operation, fields)
+                self._lsn = lsn
+            execute('UPDATE journal_state SET lsn = ?', (self._lsn,))
+
+    def _apply(self, operation, fields):
+        """
+        Применяет к базе операцию из журнала.
+
+        Аргументы:
+            operation (int): Код операции.
+            fields (tuple): Поля операции.
+        """
+        execute = self._connection.execute
+        if operation == CREATE:
+            execute('INSERT OR REPLACE INTO playlists (id, name) VALUES (?, ?)', fields)
+        elif operation == DROP:
+            execute('DELETE FROM tracks WHERE playlist_id = ?', fields)
+            execute('DELETE FROM playlists WHERE id = ?', fields)
+        elif operation == INSERT:
+            execute('INSERT OR REPLACE INTO tracks '
+                    '(id, playlist_id, position, duration, title, path) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', fields)
+        elif operation == DELETE:
+            execute('DELETE FROM tracks WHERE id = ?', fields)
+        elif operation == MOVE:
+            execute('UPDATE tracks SET position = ? WHERE id = ?', fields[::-1])
+
+    def checkpoint(self):
+        """
+        Создаёт контрольную точку: сбрасывает базу на диск и очищает журнал.
+
+        Вызывается при открытии и закрытии хранилища, а также потоком журнала,
+        когда журнал вырастает больше порога.
+        """
+        with self._lock:
+            if self.journal is None:
+                return
+            busy, log, checkpointed = self._connection.execute(
+                'PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+            if busy or checkpointed != log:
+                return  # Не все транзакции попали в файл базы: журнал ещё нужен
+            self.journal.reset()
+
+    def sync(self):
+        """
+        Ждёт, пока все записанные правки будут сброшены на диск.
+        """
+        if self.journal is not None:
+            self.journal.sync()
+
+    def close(self):
+        """
+        Отписывается от плейлистов, создаёт контрольную точку и закрывает
+        журнал и соединение с базой.
+        """
+        with self._lock:
+            for playlist, binding in self._bindings.items():
+                playlist.unsubscribe(binding)
+            self._bindings.clear()
+            self.checkpoint()
+        # Поток журнала может ждать блокировку хранилища ради контрольной точки
+        if self.journal is not None:
+            self.journal.close()
+        with self._lock:
+            self._connection.close()
+
+
+class PlaylistRegistry:
+    """
+    Плейлисты хранилища, доступные по названию.
+
+    Словарь находит плейлист по названию за O(1), а отсортированный список
+    названий даёт их упорядоченный перечень и позицию названия в нём за
+    O(log n). При создании реестра читаются только названия: объект
+    плейлиста создаётся при первом обращении, а треки загружаются при
+    первом открытии, поэтому тысячи плейлистов не замедляют запуск.
+
+    Атрибуты:
+        store (PlaylistStore): Хранилище плейлистов.
+        _playlists (dict): Название -> плейлист или None, пока к нему не обращались.
+        _names (list): Названия в порядке сортировки.
+    """
+
+    def __init__(self, store):
+        """
+        Читает названия плейлистов хранилища.
+
+        Аргументы:
+            store (PlaylistStore): Хранилище плейлистов.
+        """
+        self.store = store
+        self._playlists = dict.fromkeys(store.names())
+        self._names = sorted(self._playlists)
+
+    def __len__(self):
+        """
+        Возвращает количество плейлистов.
+
+        Возвращает:
+            int: Количество плейлистов.
+        """
+        return len(self._names)
+
+    def __contains__(self, name):
+        """
+        Проверяет, есть ли плейлист с названием, за O(1).
+
+        Аргументы:
+            name (str): Название плейлиста.
+
+        Возвращает:
+            bool: True, если плейлист есть.
+        """
+        return name in self._playlists
+
+    def __iter__(self):
+        """
+        Перебирает названия плейлистов в порядке сортировки.
+
+        Возвращает:
+            iterator: Итератор по названиям.
+        """
+        return iter(self._names)
+
+    def names(self):
+        """
+        Возвращает названия плейлистов в порядке сортировки.
+
+        Возвращает:
+            list: Названия плейлистов.
+        """
+        return list(self._names)
+
+    def index(self, name):
+        """
+        Возвращает позицию названия в отсортированном перечне за O(log n).
+
+        Аргументы:
+            name (str): Название плейлиста.
+
+        Возвращает:
+            int: Позиция названия.
+
+        Выбрасывает:
+            KeyError: Если плейлиста с таким названием нет.
+        """
+        if name not in self._playlists:
+            raise KeyError(name)
+        return bisect.bisect_left(self._names, name)
+
+    def get(self, name):
+        """
+        Возвращает плейлист по названию, не загружая его треки.
+
+        Аргументы:
+            name (str): Название плейлиста.
+
+        Возвращает:
+            PlayList: Плейлист.
+
+        Выбрасывает:
+            KeyError: Если плейлиста с таким названием нет.
+        """
+        playlist = self._playlists[name]
+        if playlist is None:
+            playlist = self._playlists[name] = self.store.get(name)
+        return playlist
+
+    def open(self, name):
+        """
+        Возвращает плейлист по названию, загружая его треки при первом открытии.
+
+        Аргументы:
+            name (str): Название плейлиста.
+
+        Возвращает:
+            PlayList: Плейлист с треками.
+
+        Выбрасывает:
+            KeyError: Если плейлиста с таким названием нет.
+        """
+        return self.store.open(self.get(name))
+
+    def add(self, playlist):
+        """
+        Сохраняет новый плейлист и добавляет его название в перечень.
+
+        Аргументы:
+            playlist (PlayList): Плейлист.
+
+        Возвращает:
+            int: Позиция названия в отсортированном перечне.
+
+        Выбрасывает:
+            ValueError: Если плейлист с таким названием уже есть.
+        """
+        if playlist.name in self._playlists:
+            raise ValueError(f"Плейлист {playlist.name} уже существует")
+        self.store.create(playlist)
+        self._playlists[playlist.name] = playlist
+        position = bisect.bisect_left(self._names, playlist.name)
+        self._names.insert(position, playlist.name)
+        return position
+
+    def remove(self, name):
+        """
+        Удаляет плейлист из хранилища и его название из перечня.
+
+        Аргументы:
+            name (str): Название плейлиста.
+
+        Возвращает:
+            int: Позиция, которую занимало название.
+
+        Выбрасывает:
+            KeyError: Если плейлиста с таким названием нет.
+        """
+        position = self.index(name)
+        self.store.delete(self.get(name))
+        del self._playlists[name]
+        del self._names[position]
+        return position
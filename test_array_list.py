@@ -0,0 +1,99 @@
+"""Тесты модуля array_list"""
+
+import random
+import unittest
+
+from array_list import ArrayLinkedList, ArrayListItem  # pylint: disable=E0401
+from linked_list import LinkedList  # pylint: disable=E0401
+from test_linked_list import create_linked_list  # pylint: disable=E0401
+
+
+class TestArrayLinkedList(unittest.TestCase):
+    """Тест-кейс класса ArrayLinkedList"""
+    def test_copy_ring(self):
+        """Тест копирования готового кольца в пул"""
+        linked_list = ArrayLinkedList(create_linked_list([1, 2, 3]).first_item)
+        self.assertEqual([i.data for i in linked_list], [1, 2, 3])
+        self.assertEqual(list(reversed(linked_list)), [3, 2, 1])
+        self.assertEqual(len(linked_list), 3)
+        self.assertEqual(linked_list.last.data, 3)
+        self.assertTrue(isinstance(linked_list.first_item, ArrayListItem))
+        self.assertTrue(linked_list.first_item.previous_item == linked_list.last)
+
+    def test_free_list(self):
+        """Тест повторного использования освобождённых ячеек"""
+        linked_list = ArrayLinkedList()
+        for i in range(5):
+            linked_list.append(i)
+        linked_list.remove(2)
+        linked_list.remove_node(linked_list.first_item)
+        linked_list.append(42)
+        linked_list.append_left(7)
+        self.assertEqual(len(linked_list._pool.data), 5)  # pylint: disable=W0212
+        self.assertEqual([i.data for i in linked_list], [7, 1, 3, 4, 42])
+        self.assertTrue(42 in linked_list)
+        self.assertFalse(2 in linked_list)
+
+    def test_random_operations(self):
+        """Тест совпадения с обычным списком на случайных операциях"""
+        rnd = random.Random(7)
+        for indexed in (False, True):
+            linked_list = ArrayLinkedList(indexed=indexed)
+            linked_list.add_index('data')
+            expected = []
+            with self.subTest(indexed=indexed):
+                for step in range(300):
+                    operation = rnd.randrange(3)
+                    if operation == 0 or not expected:
+                        position = rnd.randint(0, len(expected))
+                        linked_list.insert_at(position, step)
+                        expected.insert(position, step)
+                    elif operation == 1:
+                        position = rnd.randrange(len(expected))
+                        self.assertEqual(linked_list.pop(position), expected.pop(position))
+                    else:
+                        value = rnd.choice(expected)
+                        node = linked_list.find(value)
+                        linked_list.move_node(node)
+                        expected.remove(value)
+                        expected.insert(0, value)
+                self.assertEqual([i.data for i in linked_list], expected)
+                self.assertEqual(list(reversed(linked_list)), expected[::-1])
+                self.assertEqual([linked_list[i] for i in range(len(expected))], expected)
+
+    def test_splice_copies(self):
+        """Тест встраивания списков из разных хранилищ"""
+        linked_list = ArrayLinkedList.from_iterable([1, 2])
+        other = ArrayLinkedList.from_iterable([3, 4])
+        linked_list.splice(other, after=linked_list.last)
+        self.assertEqual([i.data for i in linked_list], [1, 2, 3, 4])
+        self.assertEqual(len(other), 0)
+        plain = LinkedList.from_iterable([0])
+        plain.splice(linked_list, after=plain.first_item)
+        self.assertEqual([i.data for i in plain], [0, 1, 2, 3, 4])
+        self.assertEqual(len(linked_list), 0)
+
+    def test_snapshots(self):
+        """Тест снимков: ячейки удалённых узлов не переиспользуются, пока жив снимок"""
+        rnd = random.Random(11)
+        linked_list = ArrayLinkedList.from_iterable(range(10))
+        snapshot = linked_list.snapshot()
+        for step in range(100):
+            if rnd.randrange(2) and len(linked_list):
+                linked_list.pop(rnd.randrange(len(linked_list)))
+            else:
+                linked_list.insert_at(rnd.randint(0, len(linked_list)), 100 + step)
+        edited = [i.data for i in linked_list]
+        self.assertEqual(list(snapshot), list(range(10)))
+        later = linked_list.snapshot()
+
+        linked_list.restore(snapshot)
+        self.assertEqual([i.data for i in linked_list], list(range(10)))
+        linked_list.clear()
+        self.assertEqual(list(later), edited)
+        linked_list.restore(later)
+        self.assertEqual([i.data for i in linked_list], edited)
+
+        del snapshot, later
+        self.assertFalse(linked_list._retired)  # pylint: disable=W0212
+        self.assertEqual(len(linked_list._pool), len(edited))  # pylint: disable=W0212
@@ -0,0 +1,83 @@
+"""Тесты модуля audio_cache"""
+
+import os
+import tempfile
+import unittest
+
+from audio_cache import AudioCache
+
+
+class TestAudioCache(unittest.TestCase):
+    """Тест-кейс класса AudioCache"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = []
+        for i in range(4):
+            path = os.path.join(directory.name, f'{i}.mp3')
+            with open(path, 'wb') as file:
+                file.write(bytes(10))
+            self.paths.append(path)
+        self.decoded = []
+
+    def decode(self, path):
+        """Декодирование-заглушка: 100 байт на файл"""
+        with open(path, 'rb') as file:
+            data = file.read() * 10
+        self.decoded.append(path)
+        return data
+
+    def test_lru_budget(self):
+        """Тест вытеснения давно не использованных записей"""
+        cache = AudioCache(self.decode, budget=250)
+        first, second, third, fourth = self.paths
+        cache.put(first, self.decode(first))
+        cache.put(second, self.decode(second))
+        self.assertIsNotNone(cache.get(first))
+        cache.put(third, self.decode(third))
+        self.assertEqual(cache.used, 200)
+        self.assertTrue(first in cache)
+        self.assertFalse(second in cache)
+        self.assertIsNone(cache.get(second))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.put(fourth, bytes(300))
+        self.assertFalse(fourth in cache)
+        cache.invalidate(first)
+        self.assertEqual((len(cache), cache.used), (1, 100))
+        cache.clear()
+        self.assertEqual((len(cache), cache.used), (0, 0))
+
+    def test_invalidated_on_change(self):
+        """Тест: изменённый файл не берётся из кэша"""
+        cache = AudioCache(self.decode)
+        path = self.paths[0]
+        cache.put(path, self.decode(path))
+        self.assertIsNotNone(cache.get(path))
+        with open(path, 'wb') as file:
+            file.write(bytes(20))
+        self.assertIsNone(cache.get(path))
+        self.assertEqual(cache.used, 0)
+
+        cache.put(path, self.decode(path))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertFalse(path in cache)
+
+    def test_prefetch(self):
+        """Тест фонового декодирования"""
+        cache = AudioCache(self.decode)
+        for path in self.paths + self.paths:
+            cache.prefetch(path)
+        cache.prefetch('/missing.mp3')
+        cache.wait()
+        self.assertEqual(sorted(self.decoded), sorted(self.paths))
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(cache.get(self.paths[2]), bytes(100))
+        cache.prefetch(self.paths[2])
+        cache.wait()
+        self.assertEqual(len(self.decoded), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Тесты модуля audio_engine"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from audio_engine import AudioEngine, NullBackend
+from playlist import Composition, PlayList
+
+
+def wait_for(condition, timeout=2):
+    """Ожидание выполнения условия, которое проверяет поток воспроизведения"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class TestAudioEngine(unittest.TestCase):
+    """Тест-кейс класса AudioEngine с бэкендом без звука"""
+    def setUp(self):
+        self.engine = AudioEngine(backend='null')
+        self.addCleanup(self.engine.shutdown)
+        self.playlist = PlayList.from_iterable(
+            (Composition(f'track {i}', f'/music/{i}.mp3') for i in range(4)), 'test')
+
+    def test_lazy_start(self):
+        """Тест: устройство и поток создаются только при первом обращении"""
+        self.assertFalse(self.engine.started)
+        self.assertIsNone(self.engine.running_player)
+        self.engine.configure(frequency=22050, buffer=256)
+        player = self.engine.player
+        self.assertTrue(self.engine.started)
+        self.assertIsInstance(player.backend, NullBackend)
+        with self.assertRaises(RuntimeError):
+            self.engine.configure(buffer=1024)
+        self.engine.shutdown()
+        self.assertFalse(player.is_alive())
+        self.engine.configure(buffer=1024)
+        self.assertEqual(self.engine.buffer, 1024)
+        with self.assertRaises(ValueError):
+            self.engine.configure(backend='missing')
+
+    def test_playback_with_queue(self):
+        """Тест: переход к треку из очереди без повторной загрузки"""
+        player = self.engine.player
+        backend = player.backend
+        first, second, _, _ = list(self.playlist)
+        self.playlist.set_current(first)
+        player.play(self.playlist, first)
+        self.assertTrue(wait_for(lambda: backend.queued == '/music/1.mp3'))
+        self.assertEqual(backend.loads, 1)
+
+        backend.finish()
+        self.assertTrue(wait_for(lambda: backend.queued == '/music/2.mp3'))
+        self.assertTrue(player.track_item is second)
+        self.assertEqual(backend.path, '/music/1.mp3')
+        self.assertEqual(backend.loads, 1)
+
+    def test_commands_coalesced(self):
+        """Тест: пачка команд play приводит к одной загрузке"""
+        player = self.engine.player
+        backend = player.backend
+        nodes = list(self.playlist)
+        for node in nodes:
+            player._commands.put(('play', (self.playlist, node)))
+        player._commands.put(('seek', (30,)))
+        backend.wake()
+        self.assertTrue(wait_for(lambda: backend.position == 30))
+        self.assertEqual(backend.path, '/music/3.mp3')
+        self.assertEqual(backend.loads, 1)
+
+    def test_stale_end_ignored(self):
+        """Тест: конец остановленного трека не переключает трек, выбранный в той же пачке"""
+        player = self.engine.player
+        backend = player.backend
+        first, second, _, _ = list(self.playlist)
+        self.playlist.set_current(first)
+        player.play(self.playlist, first)
+        self.assertTrue(wait_for(lambda: backend.queued == '/music/1.mp3'))
+        self.playlist.set_current(second)
+        player._commands.put(('stop', ()))
+        player._commands.put(('play', (self.playlist, second)))
+        backend.wake()
+        self.assertTrue(wait_for(lambda: backend.queued == '/music/2.mp3'))
+        player.seek(5)
+        self.assertTrue(wait_for(lambda: backend.position == 5))
+        self.assertIs(player.track_item, second)
+        self.assertIs(self.playlist._current, second)
+        self.assertEqual(backend.path, '/music/1.mp3')
+
+    def test_recent_track_from_cache(self):
+        """Тест: возврат к недавнему треку загружается из кэша"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        playlist = PlayList('files')
+        for i in range(3):
+            path = os.path.join(directory.name, f'{i}.mp3')
+            with open(path, 'wb') as file:
+                file.write(bytes([i]) * 16)
+            playlist.append(Composition(str(i), path))
+        self.assertIsNone(self.engine.cache)  # Кэш включается только явно
+        self.engine.shutdown()
+        self.engine.configure(cache_budget=2 ** 20)
+        decoded = []
+        decode = NullBackend.decode
+
+        def counting_decode(backend, path):
+            decoded.append(path)
+            return decode(backend, path)
+
+        with mock.patch.object(NullBackend, 'decode', autospec=True, side_effect=counting_decode):
+            player = self.engine.player
+        backend = player.backend
+        first, second, _ = list(playlist)
+        playlist.set_current(first)
+        player.play(playlist, first)
+        self.assertTrue(wait_for(lambda: backend.path == first.data.path))
+        # Следующий трек декодируется и заново ставится в очередь из кэша,
+        # а играющий с диска не декодируется одновременно с воспроизведением
+        self.assertTrue(wait_for(lambda: backend.queued == bytes([1]) * 16))
+        self.assertFalse(first.data.path in self.engine.cache)
+
+        player.play(playlist, second)
+        self.assertTrue(wait_for(lambda: backend.path == bytes([1]) * 16))
+        self.engine.cache.wait()
+        self.assertTrue(first.data.path in self.engine.cache)
+        player.play(playlist, first)
+        self.assertTrue(wait_for(lambda: backend.path == bytes(16)))
+        self.assertEqual(backend.queued, bytes([1]) * 16)
+        self.assertEqual(sorted(decoded), [first.data.path, second.data.path])
+
+
+if __name__ == '__main__':
+    unittest.main()
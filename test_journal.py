@@ -0,0 +1,146 @@
+"""Тесты модуля journal"""
+
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from journal import INSERT, MOVE, Journal, decode, decode_transaction, encode, encode_transaction
+from playlist import Composition, PlayList
+from storage import PlaylistStore
+
+
+class TestJournal(unittest.TestCase):
+    """Тест-кейс класса Journal"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.filename = os.path.join(self.directory, 'playlists.journal')
+
+    def test_encode_decode(self):
+        """Тест кодирования операций"""
+        record = encode(INSERT, 7, 2, 1.5, None, 'Песня', 'песня.mp3')
+        self.assertEqual(decode(record), (INSERT, (7, 2, 1.5, None, 'Песня', 'песня.mp3')))
+        self.assertEqual(decode(encode(MOVE, 7, 0.25)), (MOVE, (7, 0.25)))
+        transaction = encode_transaction(12, [encode(MOVE, 7, 0.25), encode(MOVE, 8, 0.5)])
+        self.assertEqual(decode_transaction(transaction), (12, [(MOVE, (7, 0.25)), (MOVE, (8, 0.5))]))
+
+    def test_group_commit_and_torn_tail(self):
+        """Тест: серия записей сбрасывается на диск за несколько fsync, оборванный хвост отбрасывается"""
+        journal = Journal(self.filename, interval=0.05)
+        payloads = [encode(MOVE, i, i / 2) for i in range(500)]
+        for payload in payloads:
+            journal.append(payload)
+        journal.sync()
+        self.assertLessEqual(journal.flushes, 3)
+        journal.close()
+
+        with open(self.filename, 'ab') as file:
+            file.write(b'\x10\x00\x00\x00\x00\x00')  # Запись, оборванная при сбое
+        journal = Journal(self.filename)
+        self.assertEqual(journal.records(), payloads)
+        self.assertEqual(journal.size(), os.path.getsize(self.filename))
+        journal.close()
+
+    def test_write_error_reported(self):
+        """Тест: ошибка fsync в потоке сброса выбрасывается из sync и append, а не вешает их"""
+        journal = Journal(self.filename)
+        self.addCleanup(journal.close)
+        with mock.patch('os.fsync', side_effect=OSError(errno.ENOSPC, 'No space left on device')):
+            journal.append(encode(MOVE, 1, 0.5))
+            with self.assertRaises(OSError):
+                journal.sync()
+        with self.assertRaises(OSError):
+            journal.append(encode(MOVE, 2, 0.5))
+
+
+class TestJournaledStore(unittest.TestCase):
+    """Тест-кейс хранилища плейлистов с журналом предзаписи"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def paths(self, name):
+        """Файлы базы и журнала в каталоге name"""
+        folder = os.path.join(self.directory, name)
+        return os.path.join(folder, 'playlists.sqlite3'), os.path.join(folder, 'playlists.journal')
+
+    def test_replay_after_crash(self):
+        """Тест: правки после контрольной точки восстанавливаются из журнала"""
+        database, journal = self.paths('live')
+        store = PlaylistStore(database, journal=journal)
+        self.addCleanup(store.close)
+        playlist = PlayList('Рок')
+        playlist.extend(Composition(title, f'{title}.mp3') for title in 'abc')
+        store.create(playlist)
+        store.checkpoint()
+
+        # Контрольная точка — файл базы без несброшенных изменений
+        crashed_database, crashed_journal = self.paths('crashed')
+        os.makedirs(os.path.dirname(crashed_database))
+        shutil.copyfile(database, crashed_database)
+        playlist.move(2, 0)
+        playlist.remove_node(playlist.node_at(1))
+        playlist.append(Composition('d', 'd.mp3', 3.5))
+        store.create(PlayList('Джаз'))
+        store.sync()
+        shutil.copyfile(journal, crashed_journal)
+
+        recovered = PlaylistStore(crashed_database, journal=crashed_journal)
+        self.addCleanup(recovered.close)
+        self.assertEqual(recovered.names(), ['Рок', 'Джаз'])
+        tracks = recovered.load('Рок')
+        self.assertEqual([node.data.title for node in tracks], ['c', 'b', 'd'])
+        self.assertEqual(tracks.node_at(2).data.duration, 3.5)
+        self.assertEqual(recovered.journal.size(), 0)
+
+    def test_database_ahead_of_journal(self):
+        """Тест: транзакции журнала, уже попавшие в базу, не проигрываются повторно"""
+        database, journal = self.paths('ahead')
+        store = PlaylistStore(database, journal=journal)
+        self.addCleanup(store.close)
+        playlist = PlayList('Рок')
+        playlist.extend(Composition(title, f'{title}.mp3') for title in 'abc')
+        store.create(playlist)
+        store.checkpoint()
+        playlist.append(Composition('d', 'd.mp3'))
+        playlist.move(0, 2)
+        store.sync()
+
+        # Журнал отстал от базы: в нём нет удаления d и последнего перемещения
+        crashed_database, crashed_journal = self.paths('crashed')
+        os.makedirs(os.path.dirname(crashed_database))
+        shutil.copyfile(journal, crashed_journal)
+        playlist.remove_node(playlist.last)
+        playlist.move(2, 0)
+        store.checkpoint()
+        shutil.copyfile(database, crashed_database)
+
+        recovered = PlaylistStore(crashed_database, journal=crashed_journal)
+        self.addCleanup(recovered.close)
+        self.assertEqual([node.data.title for node in recovered.load('Рок')], ['a', 'b', 'c'])
+
+    def test_background_compaction(self):
+        """Тест: разросшийся журнал очищается контрольной точкой в фоне"""
+        database, journal = self.paths('compact')
+        store = PlaylistStore(database, journal=journal)
+        store.journal.compact_size = 1
+        playlist = PlayList('Большой')
+        store.create(playlist)
+        playlist.extend(Composition(str(i), f'{i}.mp3') for i in range(200))
+        store.sync()
+        self.assertEqual(store.journal.size(), 0)
+        store.close()
+        store = PlaylistStore(database)
+        self.addCleanup(store.close)
+        self.assertEqual(len(store.load('Большой')), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Тесты модуля library"""
+
+import os
+import tempfile
+import unittest
+
+from library import LibraryImporter, has_audio_signature, import_directory, walk_audio_files
+from playlist import PlayList
+
+
+class TestLibrary(unittest.TestCase):
+    """Тест-кейс импорта библиотеки"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        self.expected = []
+        for folder in ('b', 'a', os.path.join('a', 'nested')):
+            os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+            for i in range(3):
+                self.expected.append(self.write(os.path.join(folder, f'{i}.mp3'), b'ID3\x03'))
+        self.write('song.wav', b'RIFF\x00\x00\x00\x00WAVEfmt ')
+        self.write('frames.MP3', b'\xff\xfb\x90\x00')
+        self.write('cover.jpg', b'\xff\xd8\xff\xe0')
+        self.write('fake.mp3', b'<html></html>')
+        self.write('notes.txt', b'ID3')
+
+    def write(self, name, data):
+        """Запись файла в дерево каталогов"""
+        path = os.path.join(self.root, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def test_walk(self):
+        """Тест отбора файлов по расширению и сигнатуре"""
+        found = [os.path.relpath(path, self.root) for path in walk_audio_files(self.root)]
+        self.assertEqual(found, [
+            'frames.MP3', 'song.wav',
+            os.path.join('a', '0.mp3'), os.path.join('a', '1.mp3'), os.path.join('a', '2.mp3'),
+            os.path.join('a', 'nested', '0.mp3'), os.path.join('a', 'nested', '1.mp3'),
+            os.path.join('a', 'nested', '2.mp3'),
+            os.path.join('b', '0.mp3'), os.path.join('b', '1.mp3'), os.path.join('b', '2.mp3')])
+        self.assertFalse(has_audio_signature(os.path.join(self.root, 'missing.mp3')))
+
+    def test_import_in_batches(self):
+        """Тест импорта пачками без дубликатов"""
+        playlist = PlayList('library')
+        reports = []
+        added = import_directory(playlist, self.root, batch_size=4,
+                                 progress=lambda found, added: reports.append((found, added)))
+        self.assertEqual(added, 11)
+        self.assertEqual(len(playlist), 11)
+        self.assertEqual(reports[-1], (11, 11))
+        self.assertEqual(len(reports), 3)
+        self.assertEqual(playlist[0].title, 'frames')
+        self.assertEqual([node.data.title for node in playlist], [
+            'frames', 'song', '0', '1', '2', '0', '1', '2', '0', '1', '2'])
+        self.assertEqual(import_directory(playlist, self.root), 0)
+        self.assertEqual(len(playlist), 11)
+
+    def test_cancel(self):
+        """Тест отмены импорта"""
+        playlist = PlayList('library')
+        importer = None
+
+        def progress(found, added):
+            importer.cancel()
+
+        importer = LibraryImporter(playlist, self.root, batch_size=2, progress=progress)
+        self.assertEqual(importer.run(), 2)
+        self.assertTrue(importer.cancelled)
+        self.assertEqual(len(playlist), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,11 @@
 """Тесты модуля linked_list"""
 
+import random
+import threading
 import unittest
+from unittest import mock
 
-from linked_list import LinkedListItem, LinkedList  # pylint: disable=E0401
+from linked_list import LinkedListItem, LinkedList, ListObserver, ListSnapshot  # pylint: disable=E0401
 
 
 TEST_LEN = [
@@ -74,6 +77,36 @@ def create_linked_list(nodes_list):
     return LinkedList(first)
 
 
+class Mirror(ListObserver):
+    """Наблюдатель, повторяющий правки списка в обычном list по позициям событий"""
+    def __init__(self, linked_list):
+        """Подписка на правки списка"""
+        self.linked_list = linked_list
+        self.nodes = list(linked_list)
+        linked_list.subscribe(self)
+
+    def inserted(self, node, position):
+        """Вставка узла в копию"""
+        self.nodes.insert(position, node)
+
+    def removed(self, node, position):
+        """Удаление узла из копии"""
+        assert self.nodes.pop(position) is node
+
+    def moved(self, node, source, target):
+        """Перемещение узла в копии"""
+        assert self.nodes.pop(source) is node
+        self.nodes.insert(target, node)
+
+    def reordered(self):
+        """Перечитывание копии после полной перестановки"""
+        self.nodes = list(self.linked_list)
+
+    def cleared(self):
+        """Очистка копии"""
+        self.nodes = []
+
+
 class TestLinkedListItem(unittest.TestCase):
     """Тест-кейс класса LinkedListItem"""
     def test_next_item(self):
@@ -276,4 +309,486 @@ class TestLinkedList(unittest.TestCase):
                 self.assertEqual(
                     [item for item in reversed(linked_list)],
                     list(range(i - 1, -1, -1))
-                )
\ No newline at end of file
+                )
+
+    def test_len_after_mutations(self):
+        """Тест согласованности длины и последнего узла после изменений"""
+        linked_list = create_linked_list([1, 2, 3])
+        linked_list.append(4)
+        linked_list.append_left(0)
+        linked_list.insert(2, 42)
+        linked_list.remove(3)
+        expected = [0, 1, 2, 42, 4]
+        self.assertEqual(len(linked_list), len(expected))
+        self.assertEqual([i.data for i in linked_list], expected)
+        self.assertEqual(linked_list.last.data, expected[-1])
+        for index, value in enumerate(expected):
+            self.assertEqual(linked_list[index], value)
+            self.assertEqual(linked_list[index - len(expected)], value)
+        for value in expected:
+            linked_list.remove(value)
+        self.assertEqual(len(linked_list), 0)
+        self.assertIsNone(linked_list.last)
+
+    def test_node_operations(self):
+        """Тест вставки, удаления и перемещения по ссылке на узел"""
+        linked_list = create_linked_list([1, 2, 3])
+        first = linked_list.first_item
+        middle = linked_list.insert_after(first, 42)
+        head = linked_list.insert_before(first, 0)
+        self.assertTrue(linked_list.first_item is head)
+        self.assertEqual([i.data for i in linked_list], [0, 1, 42, 2, 3])
+
+        linked_list.move_node(head, linked_list.last)
+        self.assertEqual([i.data for i in linked_list], [1, 42, 2, 3, 0])
+        linked_list.move_node(middle)
+        self.assertEqual([i.data for i in linked_list], [42, 1, 2, 3, 0])
+        with self.assertRaises(ValueError):
+            linked_list.move_node(middle, middle)
+
+        self.assertEqual(linked_list.remove_node(middle), 42)
+        self.assertEqual([i.data for i in linked_list], [1, 2, 3, 0])
+        self.assertEqual(list(reversed(linked_list)), [0, 3, 2, 1])
+        self.assertEqual(len(linked_list), 4)
+
+    def test_move_node_duplicates(self):
+        """Тест перемещения конкретного узла среди одинаковых значений"""
+        linked_list = create_linked_list([7, 7, 7])
+        target = linked_list.node_at(2)
+        linked_list.move_node(target)
+        self.assertTrue(linked_list.first_item is target)
+        self.assertEqual(len(linked_list), 3)
+
+    def test_hash_index(self):
+        """Тест поддержки хеш-индексов при изменениях списка"""
+        linked_list = create_linked_list([1, 2, 3, 2])
+        linked_list.add_index('data')
+        parity = linked_list.add_index('parity', key=lambda x: x % 2)
+        self.assertTrue(2 in linked_list)
+        self.assertFalse(5 in linked_list)
+        self.assertEqual(parity.count(0), 2)
+
+        linked_list.append(5)
+        self.assertTrue(5 in linked_list)
+        self.assertTrue(linked_list.find(1, index='parity') is linked_list.first_item)
+
+        linked_list.remove(2)
+        self.assertEqual([i.data for i in linked_list], [1, 3, 2, 5])
+        self.assertTrue(2 in linked_list)
+        linked_list.remove(2)
+        self.assertFalse(2 in linked_list)
+        self.assertEqual(parity.count(0), 0)
+
+        linked_list.insert(3, 4)
+        self.assertEqual([i.data for i in linked_list], [1, 3, 4, 5])
+        self.assertTrue(linked_list.find(4).previous_item.data == 3)
+        linked_list.move_node(linked_list.find(5))
+        self.assertTrue(linked_list.find(5) is linked_list.first_item)
+        with self.assertRaises(ValueError):
+            linked_list.add_index('data')
+
+    def test_order_index(self):
+        """Тест индекса позиций на случайной последовательности операций"""
+        rnd = random.Random(42)
+        for indexed in (False, True):
+            linked_list = LinkedList(indexed=indexed)
+            expected = []
+            with self.subTest(indexed=indexed):
+                for step in range(400):
+                    operation = rnd.randrange(4)
+                    if operation == 0 or not expected:
+                        position = rnd.randint(0, len(expected))
+                        linked_list.insert_at(position, step)
+                        expected.insert(position, step)
+                    elif operation == 1:
+                        position = rnd.randrange(len(expected))
+                        self.assertEqual(linked_list.pop(position), expected.pop(position))
+                    elif operation == 2:
+                        old, new = rnd.randrange(len(expected)), rnd.randrange(len(expected))
+                        node = linked_list.node_at(old)
+                        value = expected.pop(old)
+                        after = None if new == 0 else linked_list.node_at(new - (new <= old))
+                        linked_list.move_node(node, after)
+                        expected.insert(new, value)
+                    else:
+                        position = rnd.randrange(len(expected))
+                        node = linked_list.node_at(position)
+                        self.assertEqual(node.data, expected[position])
+                        self.assertEqual(linked_list.index_of(node), position)
+                self.assertEqual([i.data for i in linked_list], expected)
+                self.assertEqual(list(reversed(linked_list)), expected[::-1])
+                self.assertEqual([linked_list[i] for i in range(len(expected))], expected)
+                with self.assertRaises(IndexError):
+                    _ = linked_list[len(expected)]
+
+    def test_order_index_prebuilt(self):
+        """Тест построения индекса позиций по готовому кольцу"""
+        linked_list = create_linked_list(list(range(10)))
+        indexed = LinkedList(linked_list.first_item, indexed=True)
+        self.assertEqual([indexed[i] for i in range(10)], list(range(10)))
+        del indexed[0]
+        self.assertEqual(indexed.index_of(indexed.first_item), 0)
+        self.assertEqual(indexed[0], 1)
+
+    def test_extend(self):
+        """Тест extend и from_iterable"""
+        for indexed in (False, True):
+            with self.subTest(indexed=indexed):
+                linked_list = LinkedList.from_iterable(range(3), indexed=indexed)
+                linked_list.add_index('data')
+                self.assertEqual(linked_list.extend(iter([3, 4])), 2)
+                self.assertEqual(linked_list.extend(range(5, 20)), 15)
+                self.assertEqual([i.data for i in linked_list], list(range(20)))
+                self.assertEqual(list(reversed(linked_list)), list(range(19, -1, -1)))
+                self.assertEqual(linked_list[17], 17)
+                self.assertTrue(19 in linked_list)
+                self.assertEqual(LinkedList.from_iterable([]).extend([]), 0)
+
+    def test_splice(self):
+        """Тест встраивания одного списка в другой"""
+        for indexed in (False, True):
+            with self.subTest(indexed=indexed):
+                linked_list = LinkedList.from_iterable([1, 2, 3], indexed=indexed)
+                linked_list.add_index('data')
+                other = LinkedList.from_iterable([10, 11], indexed=indexed)
+                first = other.first_item
+                linked_list.splice(other, after=linked_list.first_item)
+                self.assertEqual([i.data for i in linked_list], [1, 10, 11, 2, 3])
+                self.assertTrue(linked_list.node_at(1) is first)
+                self.assertEqual(len(other), 0)
+                self.assertIsNone(other.first_item)
+                self.assertTrue(11 in linked_list)
+
+                linked_list.splice(LinkedList.from_iterable([0]))
+                linked_list.splice(LinkedList.from_iterable([4]), after=linked_list.last)
+                linked_list.splice(LinkedList())
+                self.assertEqual([i.data for i in linked_list], [0, 1, 10, 11, 2, 3, 4])
+                self.assertEqual(list(reversed(linked_list)), [4, 3, 2, 11, 10, 1, 0])
+                self.assertEqual(linked_list[-1], 4)
+
+                empty = LinkedList(indexed=indexed)
+                empty.splice(linked_list)
+                self.assertEqual(len(empty), 7)
+                self.assertEqual(empty.index_of(empty.last), 6)
+                with self.assertRaises(ValueError):
+                    empty.splice(empty)
+
+    def test_reverse(self):
+        """Тест разворота списка на месте"""
+        for length in TEST_LEN:
+            for indexed in (False, True):
+                linked_list = LinkedList.from_iterable(range(length), indexed=indexed)
+                nodes = list(linked_list)
+                with self.subTest(length=length, indexed=indexed):
+                    linked_list.reverse()
+                    self.assertEqual([i.data for i in linked_list], list(range(length))[::-1])
+                    self.assertEqual(list(reversed(linked_list)), list(range(length)))
+                    self.assertEqual(list(linked_list), nodes[::-1])
+                    if length:
+                        self.assertEqual(linked_list[0], length - 1)
+                        self.assertEqual(linked_list.index_of(nodes[0]), length - 1)
+
+    def test_rotate(self):
+        """Тест поворота кольца"""
+        for length in (1, 2, 5, 6):
+            for steps in range(-8, 9):
+                for indexed in (False, True):
+                    linked_list = LinkedList.from_iterable(range(length), indexed=indexed)
+                    expected = list(range(length))
+                    expected = expected[-steps % length:] + expected[:-steps % length]
+                    with self.subTest(length=length, steps=steps, indexed=indexed):
+                        linked_list.rotate(steps)
+                        self.assertEqual([i.data for i in linked_list], expected)
+                        self.assertEqual([linked_list[i] for i in range(length)], expected)
+        linked_list = LinkedList.from_iterable(range(5), indexed=True)
+        node = linked_list.node_at(3)
+        linked_list.rotate_to(node)
+        self.assertEqual([i.data for i in linked_list], [3, 4, 0, 1, 2])
+        self.assertEqual(linked_list.index_of(node), 0)
+        self.assertEqual(linked_list[1], 4)
+
+    def test_sort(self):
+        """Тест устойчивой сортировки на месте"""
+        rnd = random.Random(3)
+        for length in list(TEST_LEN) + [31, 64, 100]:
+            values = [(rnd.randrange(5), i) for i in range(length)]
+            for reverse in (False, True):
+                linked_list = LinkedList.from_iterable(values, indexed=reverse)
+                nodes = {node.data: node for node in linked_list}
+                with self.subTest(length=length, reverse=reverse):
+                    linked_list.sort(key=lambda item: item[0], reverse=reverse)
+                    expected = sorted(values, key=lambda item: item[0], reverse=reverse)
+                    self.assertEqual([i.data for i in linked_list], expected)
+                    self.assertEqual(list(reversed(linked_list)), expected[::-1])
+                    self.assertEqual([linked_list[i] for i in range(length)], expected)
+                    self.assertTrue(all(nodes[node.data] is node for node in linked_list))
+        linked_list = LinkedList.from_iterable([3, 1, 2])
+        linked_list.sort()
+        self.assertEqual([i.data for i in linked_list], [1, 2, 3])
+
+    def test_remove_many(self):
+        """Тест пакетного удаления узлов"""
+        for indexed in (False, True):
+            with self.subTest(indexed=indexed):
+                linked_list = LinkedList.from_iterable(range(10), indexed=indexed)
+                linked_list.add_index('data')
+                self.assertEqual(linked_list.remove_many(lambda x: x % 3 == 0), 4)
+                self.assertEqual([i.data for i in linked_list], [1, 2, 4, 5, 7, 8])
+                nodes = [linked_list.node_at(0), linked_list.node_at(3)]
+                self.assertEqual(linked_list.remove_many(nodes), 2)
+                self.assertEqual([i.data for i in linked_list], [2, 4, 7, 8])
+                node = linked_list.node_at(0)
+                self.assertEqual(linked_list.remove_many([node, node]), 1)
+                linked_list.append_left(2)
+                other = LinkedList.from_iterable([2])
+                with self.assertRaises(ValueError):
+                    linked_list.remove_many([linked_list.node_at(1), other.first_item])
+                with self.assertRaises(ValueError):
+                    linked_list.remove_many([node])  # Уже удалённый узел
+                self.assertEqual([i.data for i in linked_list], [2, 4, 7, 8])
+                self.assertEqual(len(linked_list), 4)
+                self.assertEqual(linked_list.get_index('data').count(4), 1)
+                self.assertEqual(linked_list.keep_if(lambda x: x > 4), 2)
+                self.assertEqual([i.data for i in linked_list], [7, 8])
+                self.assertEqual([linked_list[0], linked_list[1]], [7, 8])
+                self.assertFalse(2 in linked_list)
+                self.assertEqual(linked_list.keep_if(lambda x: False), 2)
+                self.assertEqual(len(linked_list), 0)
+                self.assertIsNone(linked_list.first_item)
+
+    def test_move_block(self):
+        """Тест перемещения блока подряд идущих узлов"""
+        length = 7
+        for indexed in (False, True):
+            for first in range(length):
+                for last in range(first, length):
+                    for target in [None] + [i for i in range(length) if not first <= i <= last]:
+                        linked_list = LinkedList.from_iterable(range(length), indexed=indexed)
+                        expected = list(range(length))
+                        block = expected[first:last + 1]
+                        rest = expected[:first] + expected[last + 1:]
+                        position = 0 if target is None else rest.index(target) + 1
+                        expected = rest[:position] + block + rest[position:]
+                        with self.subTest(indexed=indexed, first=first, last=last, target=target):
+                            linked_list.move_block(
+                                linked_list.node_at(first), linked_list.node_at(last),
+                                None if target is None else linked_list.node_at(target))
+                            self.assertEqual([i.data for i in linked_list], expected)
+                            self.assertEqual(list(reversed(linked_list)), expected[::-1])
+                            self.assertEqual([linked_list[i] for i in range(length)], expected)
+            linked_list = LinkedList.from_iterable(range(length), indexed=indexed)
+            with self.assertRaises(ValueError):
+                linked_list.move_block(linked_list.node_at(1), linked_list.node_at(3),
+                                       linked_list.node_at(2))
+            with self.assertRaises(ValueError):
+                linked_list.move_block(linked_list.node_at(5), linked_list.node_at(1))
+
+    def test_fail_fast_iteration(self):
+        """Тест обнаружения изменения списка во время обхода"""
+        linked_list = LinkedList.from_iterable(range(5))
+        with self.assertRaises(RuntimeError):
+            for node in linked_list:
+                linked_list.remove_node(node)
+        with self.assertRaises(RuntimeError):
+            for _ in reversed(linked_list):
+                linked_list.append(42)
+
+    def test_failed_or_empty_edit_keeps_version(self):
+        """Тест: неудачная или пустая правка не сбивает обход и не вызывает _changed"""
+        linked_list = LinkedList.from_iterable(range(5))
+        other = LinkedList.from_iterable(range(3))
+        with mock.patch.object(linked_list, '_changed') as changed:
+            visited = []
+            for node in linked_list:
+                visited.append(node.data)
+                with self.assertRaises(ValueError):
+                    linked_list.move_node(node, node)
+                with self.assertRaises(ValueError):
+                    linked_list.splice(linked_list)
+                linked_list.rotate(0)
+                linked_list.move_node(linked_list.first_item)
+                linked_list.splice(LinkedList())
+            self.assertEqual(visited, list(range(5)))
+            changed.assert_not_called()
+            linked_list.splice(other)
+            changed.assert_called_once()
+
+    def test_thread_safe_stress(self):
+        """Нагрузочный тест одновременных изменений и чтений из разных потоков"""
+        linked_list = LinkedList.from_iterable(range(200), indexed=True, thread_safe=True)
+        errors = []
+        done = threading.Event()
+
+        def writer():
+            rnd = random.Random(1)
+            for step in range(3000):
+                operation = rnd.randrange(3)
+                if operation == 0 or len(linked_list) < 10:
+                    with linked_list.lock:
+                        linked_list.insert_at(rnd.randint(0, len(linked_list)), step)
+                elif operation == 1:
+                    with linked_list.lock:
+                        linked_list.pop(rnd.randrange(len(linked_list)))
+                else:
+                    with linked_list.lock:
+                        node = linked_list.node_at(rnd.randrange(len(linked_list)))
+                        linked_list.move_node(node, None if rnd.random() < 0.5 else node.next_item)
+            done.set()
+
+        def reader():
+            rnd = random.Random(2)
+            while not done.is_set():
+                with linked_list.lock:
+                    nodes = list(linked_list)
+                    if len(nodes) != len(linked_list):
+                        errors.append('len')
+                    position = rnd.randrange(len(nodes))
+                    if linked_list.index_of(nodes[position]) != position:
+                        errors.append('index_of')
+                try:
+                    for _ in linked_list:
+                        pass
+                except RuntimeError:
+                    pass
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        nodes = list(linked_list)
+        self.assertEqual(len(nodes), len(linked_list))
+        self.assertEqual(list(reversed(linked_list)), [node.data for node in nodes][::-1])
+        self.assertEqual([linked_list.node_at(i) for i in range(len(nodes))], nodes)
+
+    def test_snapshot(self):
+        """Тест снимков на случайной последовательности операций"""
+        rnd = random.Random(5)
+        linked_list = LinkedList.from_iterable(range(20), indexed=True)
+        snapshots = []
+        for step in range(300):
+            if step % 10 == 0:
+                snapshots.append((linked_list.snapshot(), [i.data for i in linked_list]))
+            if len(snapshots) > 8:
+                snapshots.pop(rnd.randrange(len(snapshots)))
+            operation = rnd.randrange(8)
+            size = len(linked_list)
+            if operation == 0 or size < 5:
+                linked_list.insert_at(rnd.randint(0, size), 100 + step)
+            elif operation == 1:
+                linked_list.pop(rnd.randrange(size))
+            elif operation == 2:
+                node = linked_list.node_at(rnd.randrange(size))
+                linked_list.move_node(node, None if rnd.random() < 0.5 else node.next_item)
+            elif operation == 3:
+                linked_list.sort(key=lambda x: -x if step % 2 else x)
+            elif operation == 4:
+                linked_list.reverse()
+            elif operation == 5:
+                linked_list.rotate(rnd.randint(-3, 3))
+            elif operation == 6:
+                linked_list.move_block(linked_list.node_at(0), linked_list.node_at(1), linked_list.last)
+            else:
+                linked_list.remove_many(lambda x: x % 7 == step % 7)
+            for snapshot, expected in snapshots:
+                self.assertEqual(list(snapshot), expected)
+                self.assertEqual(len(snapshot), len(expected))
+        snapshot, expected = snapshots[-1]
+        self.assertTrue(isinstance(snapshot, ListSnapshot))
+        self.assertEqual(list(reversed(snapshot)), expected[::-1])
+        self.assertEqual(snapshot[-1], expected[-1])
+        self.assertTrue(expected[0] in snapshot)
+
+    def test_snapshot_memory(self):
+        """Тест того, что история снимков растёт с числом изменений, а не с длиной списка"""
+        linked_list = LinkedList.from_iterable(range(10000))
+        snapshot = linked_list.snapshot()
+        linked_list.append(42)
+        linked_list.remove_node(linked_list.node_at(5000))
+        self.assertTrue(len(linked_list._history) <= 4)  # pylint: disable=W0212
+        self.assertEqual(len(snapshot), 10000)
+        self.assertEqual(snapshot[5000], 5000)
+        del snapshot
+        self.assertEqual(linked_list._history, {})  # pylint: disable=W0212
+
+    def test_restore(self):
+        """Тест возврата списка к снимку"""
+        linked_list = LinkedList.from_iterable(range(10), indexed=True)
+        linked_list.add_index('data')
+        snapshot = linked_list.snapshot()
+        linked_list.remove_many(lambda x: x % 2)
+        linked_list.reverse()
+        linked_list.append(42)
+        changed = linked_list.snapshot()
+        linked_list.restore(snapshot)
+        self.assertEqual([i.data for i in linked_list], list(range(10)))
+        self.assertEqual(list(reversed(linked_list)), list(range(9, -1, -1)))
+        self.assertEqual(linked_list[3], 3)
+        self.assertTrue(3 in linked_list)
+        self.assertFalse(42 in linked_list)
+        linked_list.restore(changed)
+        self.assertEqual([i.data for i in linked_list], [8, 6, 4, 2, 0, 42])
+        self.assertEqual(list(snapshot), list(range(10)))
+        with self.assertRaises(ValueError):
+            LinkedList().restore(snapshot)
+
+    def test_watcher_positions(self):
+        """Тест позиций в событиях наблюдателя"""
+        for indexed in (False, True):
+            with self.subTest(indexed=indexed):
+                linked_list = LinkedList.from_iterable(range(10), indexed=indexed)
+                mirror = Mirror(linked_list)
+                operations = [
+                    lambda: linked_list.append_left(-1),
+                    lambda: linked_list.insert_at(4, 40),
+                    lambda: linked_list.insert_before(linked_list.node_at(7), 70),
+                    lambda: linked_list.extend([100, 101]),
+                    lambda: linked_list.move_node(linked_list.node_at(2), linked_list.node_at(9)),
+                    lambda: linked_list.move_node(linked_list.node_at(8)),
+                    lambda: linked_list.move_block(linked_list.node_at(1), linked_list.node_at(3),
+                                                   linked_list.node_at(10)),
+                    lambda: linked_list.move_block(linked_list.node_at(6), linked_list.node_at(9),
+                                                   linked_list.node_at(0)),
+                    lambda: linked_list.remove_many(lambda x: x % 3 == 0),
+                    lambda: linked_list.remove_many([linked_list.node_at(0), linked_list.node_at(4)]),
+                    lambda: linked_list.splice(LinkedList.from_iterable([7, 8]), linked_list.node_at(2)),
+                    lambda: linked_list.sort(),
+                    lambda: linked_list.pop(3),
+                    lambda: linked_list.clear(),
+                ]
+                for operation in operations:
+                    operation()
+                    self.assertEqual(mirror.nodes, list(linked_list))
+
+    def test_observer_batches(self):
+        """Тест скобок пакетов правок у наблюдателей"""
+        linked_list = LinkedList.from_iterable(range(5), thread_safe=True)
+        events = []
+
+        class Recorder(ListObserver):
+            def batch_begin(self):
+                events.append('begin')
+
+            def batch_end(self):
+                events.append('end')
+
+            def removed(self, node, position):
+                events.append(('removed', node.data, position))
+
+        recorder = Recorder()
+        linked_list.subscribe(recorder)
+        linked_list.remove(3)
+        self.assertEqual(events, ['begin', ('removed', 3, 3), 'end'])
+        events.clear()
+        with linked_list.batch():
+            linked_list.pop(0)
+            linked_list.append(10)
+            linked_list.remove_many(lambda x: x == 10)
+        self.assertEqual(events, ['begin', ('removed', 0, 0), ('removed', 10, 3), 'end'])
+        linked_list.unsubscribe(recorder)
+        linked_list.clear()
+        self.assertEqual(len(events), 4)
+        with self.assertRaises(ValueError):
+            linked_list.unsubscribe(recorder)
@@ -0,0 +1,135 @@
+"""Тесты модуля metadata"""
+
+import os
+import struct
+import tempfile
+import unittest
+import wave
+
+from metadata import MetadataCache, MetadataScanner, read_metadata
+
+TEST_MP3 = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'музыка', 'test.mp3')
+
+# Кадр MPEG-1 Layer III, 128 кбит/с, 44100 Гц, стерео: 417 байт
+FRAME = b'\xff\xfb\x90\x00' + bytes(413)
+
+
+def id3v2(**fields):
+    """Тег ID3v2.3 с текстовыми кадрами в UTF-8"""
+    names = {'title': 'TIT2', 'artist': 'TPE1', 'album': 'TALB'}
+    body = b''
+    for field, value in fields.items():
+        data = b'\x03' + value.encode('utf-8')
+        body += names[field].encode() + struct.pack('>I', len(data)) + b'\x00\x00' + data
+    size = len(body)
+    syncsafe = bytes((size >> 21 & 0x7F, size >> 14 & 0x7F, size >> 7 & 0x7F, size & 0x7F))
+    return b'ID3\x03\x00\x00' + syncsafe + body
+
+
+def id3v1(title, artist):
+    """Тег ID3v1"""
+    return (b'TAG' + title.encode().ljust(30, b'\x00') + artist.encode().ljust(30, b'\x00')
+            + bytes(30 + 4 + 30 + 1))
+
+
+class TestReadMetadata(unittest.TestCase):
+    """Тест-кейс функции read_metadata"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, data):
+        """Запись файла во временный каталог"""
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def test_cbr_with_tags(self):
+        """Тест CBR-файла с тегами ID3v2 и ID3v1"""
+        path = self.write('cbr.mp3', id3v2(title='Песня', artist='Группа') + FRAME * 100
+                          + id3v1('Old title', 'Old artist'))
+        info = read_metadata(path)
+        self.assertEqual(info['title'], 'Песня')
+        self.assertEqual(info['artist'], 'Группа')
+        self.assertIsNone(info['album'])
+        self.assertEqual(info['bitrate'], 128)
+        self.assertEqual(info['sample_rate'], 44100)
+        self.assertAlmostEqual(info['duration'], 41700 * 8 / 128000)
+
+    def test_id3v1_only(self):
+        """Тест файла только с тегом ID3v1"""
+        path = self.write('v1.mp3', FRAME * 10 + id3v1('Title', 'Artist'))
+        info = read_metadata(path)
+        self.assertEqual((info['title'], info['artist']), ('Title', 'Artist'))
+        self.assertAlmostEqual(info['duration'], 4170 * 8 / 128000)
+
+    def test_xing_vbr(self):
+        """Тест VBR-файла с заголовком Xing"""
+        xing = b'Xing' + struct.pack('>II', 1, 1000)
+        first = FRAME[:4] + bytes(32) + xing + bytes(413 - 32 - len(xing))
+        info = read_metadata(self.write('vbr.mp3', first + FRAME * 20))
+        self.assertAlmostEqual(info['duration'], 1000 * 1152 / 44100)
+
+    def test_real_file(self):
+        """Тест файла из каталога музыки"""
+        info = read_metadata(TEST_MP3)
+        self.assertAlmostEqual(info['duration'], 12.04, places=2)
+        self.assertEqual((info['bitrate'], info['sample_rate']), (64, 44100))
+
+    def test_wav_and_garbage(self):
+        """Тест WAV-файла и файла неизвестного формата"""
+        path = os.path.join(self.directory, 'tone.wav')
+        with wave.open(path, 'wb') as file:
+            file.setnchannels(2)
+            file.setsampwidth(2)
+            file.setframerate(22050)
+            file.writeframes(bytes(4 * 22050))
+        info = read_metadata(path)
+        self.assertEqual((info['duration'], info['bitrate'], info['sample_rate']),
+                         (1.0, 705, 22050))
+        info = read_metadata(self.write('text.mp3', b'not an mp3 at all'))
+        self.assertEqual(set(info.values()), {None})
+        with self.assertRaises(OSError):
+            read_metadata(os.path.join(self.directory, 'missing.mp3'))
+
+
+class TestMetadataScanner(unittest.TestCase):
+    """Тест-кейс класса MetadataScanner"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.paths = []
+        for i in range(40):
+            path = os.path.join(self.directory, f'{i}.mp3')
+            with open(path, 'wb') as file:
+                file.write(id3v2(title=f'track {i}') + FRAME * (i + 1))
+            self.paths.append(path)
+
+    def test_rescan_touches_changed_files(self):
+        """Тест: повторное сканирование читает только изменённые файлы"""
+        filename = os.path.join(self.directory, 'cache', 'metadata.sqlite3')
+        scanner = MetadataScanner(MetadataCache(filename), workers=2, parallel_threshold=8)
+        missing = os.path.join(self.directory, 'missing.mp3')
+        result = scanner.scan(self.paths + [missing])
+        self.assertEqual((scanner.scanned, scanner.cached), (40, 0))
+        self.assertEqual(len(result), 40)
+        self.assertEqual(result[self.paths[3]]['title'], 'track 3')
+        scanner.cache.close()
+
+        with open(self.paths[5], 'ab') as file:
+            file.write(FRAME)
+        scanner = MetadataScanner(MetadataCache(filename))
+        self.assertEqual(scanner.lookup(self.paths[4])['title'], 'track 4')
+        self.assertIsNone(scanner.lookup(self.paths[5]))  # Файл изменился: из кэша не берётся
+        result = scanner.scan(self.paths)
+        self.assertEqual((scanner.scanned, scanner.cached), (1, 39))
+        self.assertAlmostEqual(result[self.paths[5]]['duration'], 7 * 417 * 8 / 128000)
+        self.assertEqual(len(scanner.cache), 40)
+        scanner.cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,306 @@
+"""Тесты модуля playlist"""
+
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import wave
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from audio_engine import get_engine
+from linked_list import ListObserver
+from metadata import MetadataScanner
+from playlist import Composition, PlayList
+
+try:
+    import pygame  # pylint: disable=E0401
+except ImportError:
+    pygame = None
+
+
+def create_playlist(count, name='test'):
+    """Создание плейлиста из count композиций"""
+    return PlayList.from_iterable(
+        (Composition(f'track {i}', f'/music/{i}.mp3') for i in range(count)), name)
+
+
+class TestPlayList(unittest.TestCase):
+    """Тест-кейс класса PlayList"""
+    def setUp(self):
+        # Общий сканер с кэшем в памяти, а не в домашнем каталоге
+        patcher = mock.patch('metadata._scanner', MetadataScanner())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_remove_current(self):
+        """Тест удаления текущего трека"""
+        playlist = create_playlist(3)
+        first, second, third = list(playlist)
+        playlist.set_current(second)
+        playlist.remove_node(second)
+        self.assertTrue(playlist.advance(1) is third)
+        playlist.set_current(third)
+        playlist.remove_node(third)
+        self.assertTrue(playlist.advance(-1) is first)
+        playlist.remove_node(first)
+        with self.assertRaises(ValueError):
+            playlist.advance(1)
+
+    def test_current_changed(self):
+        """Тест событий смены текущего трека"""
+        playlist = create_playlist(3)
+        first, second, third = list(playlist)
+        events = []
+        observer = ListObserver()
+        observer.current_changed = events.append
+        playlist.subscribe(observer)
+        playlist.set_current(first)
+        playlist.set_current(first)
+        playlist.advance(2)
+        playlist.remove_node(third)
+        playlist.clear()
+        self.assertEqual(events, [first, third, first, None])
+
+    def test_changed_once_per_batch(self):
+        """Тест: пакет правок и пакетные операции просят предзагрузку один раз"""
+        playlist = create_playlist(10)
+        with mock.patch.object(PlayList, '_changed') as changed:
+            with playlist.batch():
+                for node in list(playlist)[:3]:
+                    playlist.remove_node(node)
+                playlist.extend(Composition(str(i), f'/music/new{i}.mp3') for i in range(5))
+            self.assertEqual(changed.call_count, 1)
+            playlist.remove_many(list(playlist)[:4])
+            self.assertEqual(changed.call_count, 2)
+            with playlist.batch():
+                pass
+            self.assertEqual(changed.call_count, 2)
+
+    def test_lazy_metadata(self):
+        """Тест ленивого чтения метаданных композиций"""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'музыка', 'test.mp3')
+        track = Composition('test', path)
+        self.assertIsNone(track._metadata)
+        self.assertAlmostEqual(track.duration, 12.04, places=2)
+        self.assertEqual((track.bitrate, track.sample_rate, track.artist), (64, 44100, None))
+        self.assertEqual(Composition('test', path, duration=5).duration, 5)
+        self.assertIsNone(Composition('missing', '/music/missing.mp3').duration)
+
+        playlist = PlayList.from_iterable(
+            [Composition('missing', '/music/missing.mp3'), Composition('test', path),
+             Composition('short', path, duration=1)], 'scan')
+        playlist.sort_by_duration()  # Сортировка не читает файлы
+        self.assertEqual([node.data.title for node in playlist], ['short', 'missing', 'test'])
+        self.assertIsNone(playlist.node_at(2).data._metadata)
+        self.assertEqual(playlist.scan_metadata(), 2)
+        self.assertEqual(playlist.scan_metadata(), 0)
+        playlist.sort_by_duration(reverse=True)
+        self.assertEqual([node.data.title for node in playlist], ['test', 'short', 'missing'])
+
+    def test_concurrent_playback_and_editing(self):
+        """Нагрузочный тест: поток воспроизведения и поток интерфейса одновременно"""
+        playlist = create_playlist(200)
+        playlist.set_current(playlist.first_item)
+        errors = []
+        done = threading.Event()
+
+        def player():
+            rnd = random.Random(1)
+            while not done.is_set():
+                with playlist.lock:
+                    try:
+                        node = playlist.advance(rnd.choice((1, 1, 1, -1)))
+                    except ValueError:
+                        continue
+                    if playlist.index_of(node) < 0:
+                        errors.append(node)
+
+        def editor():
+            rnd = random.Random(2)
+            for step in range(3000):
+                operation = rnd.randrange(4)
+                if operation == 0 or len(playlist) < 10:
+                    playlist.append(Composition(f'new {step}', f'/new/{step}.mp3'))
+                elif operation == 1:
+                    with playlist.lock:
+                        playlist.remove_node(playlist.node_at(rnd.randrange(len(playlist))))
+                elif operation == 2:
+                    with playlist.lock:
+                        playlist.remove_node(playlist._current)  # pylint: disable=W0212
+                else:
+                    with playlist.lock:
+                        size = len(playlist)
+                        playlist.move(rnd.randrange(size), rnd.randrange(size))
+            done.set()
+
+        threads = [threading.Thread(target=player), threading.Thread(target=editor)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        nodes = list(playlist)
+        self.assertEqual(len(nodes), len(playlist))
+        self.assertTrue(playlist.advance(0) in nodes)
+        self.assertEqual([playlist.node_at(i) for i in range(len(nodes))], nodes)
+        self.assertEqual(len(playlist.get_index('path')), len(nodes))
+
+    def test_undo_redo(self):
+        """Тест отмены и повтора правок"""
+        playlist = create_playlist(5)
+        titles = [track.title for track in playlist.snapshot()]
+        playlist.append(Composition('extra', '/music/extra.mp3'))
+        playlist.remove(playlist.node_at(1).data)
+        playlist.move(0, 3)
+        edited = [node.data.title for node in playlist]
+
+        self.assertTrue(playlist.undo())
+        self.assertTrue(playlist.undo())
+        self.assertTrue(playlist.undo())
+        self.assertFalse(playlist.undo())
+        self.assertEqual([node.data.title for node in playlist], titles)
+        self.assertFalse('/music/extra.mp3' in playlist.get_index('path'))
+        self.assertTrue('/music/1.mp3' in playlist.get_index('path'))
+
+        self.assertTrue(playlist.redo())
+        self.assertTrue(playlist.redo())
+        self.assertTrue(playlist.redo())
+        self.assertFalse(playlist.redo())
+        self.assertEqual([node.data.title for node in playlist], edited)
+        self.assertEqual(playlist[3].title, edited[3])
+
+        playlist.undo()
+        playlist.remove_node(playlist.first_item)
+        self.assertFalse(playlist.redo())
+
+    def test_undo_bulk_edits(self):
+        """Тест отмены пакетного добавления, разворота и очистки"""
+        playlist = create_playlist(3)
+        playlist.append(Composition('extra', '/music/extra.mp3'))
+        playlist.extend(Composition(f'new {i}', f'/music/new{i}.mp3') for i in range(3))
+        self.assertEqual(len(playlist), 7)
+
+        self.assertTrue(playlist.undo())
+        self.assertEqual([node.data.title for node in playlist], ['track 0', 'track 1', 'track 2', 'extra'])
+        self.assertFalse('/music/new0.mp3' in playlist.get_index('path'))
+        self.assertTrue(playlist.redo())
+        self.assertEqual(len(playlist), 7)
+
+        playlist.reverse()
+        self.assertEqual(playlist[0].title, 'new 2')
+        self.assertTrue(playlist.undo())
+        self.assertEqual(playlist[0].title, 'track 0')
+        self.assertEqual(playlist[6].title, 'new 2')
+
+        playlist.clear()
+        self.assertTrue(playlist.undo())
+        self.assertEqual(len(playlist), 7)
+        self.assertTrue(playlist.undo())
+        self.assertTrue(playlist.undo())
+        self.assertFalse(playlist.undo())
+        self.assertEqual([node.data.title for node in playlist], ['track 0', 'track 1', 'track 2'])
+
+    @unittest.skipIf(pygame is None, 'pygame не установлен')
+    def test_playback_follows_track_ends(self):
+        """Тест перехода между треками в конце трека и остановки"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        playlist = PlayList('wav')
+        # Два трека по 50 мс тишины и последний на 2 с
+        for i, frames in enumerate((1102, 1102, 44100)):
+            path = os.path.join(directory.name, f'{i}.wav')
+            with wave.open(path, 'wb') as file:
+                file.setnchannels(1)
+                file.setsampwidth(2)
+                file.setframerate(22050)
+                file.writeframes(bytes(2 * frames))
+            playlist.append(Composition(str(i), path))
+        third = playlist.node_at(2)
+
+        playlist.play_all(playlist.first_item)
+        deadline = time.monotonic() + 5
+        while playlist._current is not third and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(playlist._current is third)
+
+        # До конца длинного трека поток воспроизведения не опрашивает микшер
+        with mock.patch('pygame.mixer.music.get_busy', wraps=pygame.mixer.music.get_busy) as busy:
+            time.sleep(0.5)
+        self.assertEqual(busy.call_count, 0)
+
+        playlist.stop()
+        deadline = time.monotonic() + 0.5
+        while get_engine().player.track_item is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(get_engine().player.track_item is None)
+        self.assertTrue(playlist._current is third)
+
+    @unittest.skipIf(pygame is None, 'pygame не установлен')
+    def test_preload_follows_edits(self):
+        """Тест: следующий трек стоит в очереди микшера и меняется при правках"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        playlist = PlayList('wav')
+        for i in range(4):
+            path = os.path.join(directory.name, f'{i}.wav')
+            with wave.open(path, 'wb') as file:
+                file.setnchannels(1)
+                file.setsampwidth(2)
+                file.setframerate(22050)
+                file.writeframes(bytes(2 * 22050))
+            playlist.append(Composition(str(i), path))
+        first, second, third, fourth = list(playlist)
+        player = get_engine().player
+
+        def wait_queued(node):
+            deadline = time.monotonic() + 2
+            while player.queued is not node and time.monotonic() < deadline:
+                time.sleep(0.01)
+            return player.queued
+
+        playlist.play_all(first)
+        self.assertTrue(wait_queued(second) is second)
+        playlist.move(3, 1)
+        self.assertTrue(wait_queued(fourth) is fourth)
+        playlist.remove_node(fourth)
+        self.assertTrue(wait_queued(second) is second)
+        playlist.undo()
+        self.assertTrue(wait_queued(fourth) is fourth)
+        playlist.stop()
+        self.assertTrue(wait_queued(None) is None)
+
+    @unittest.skipIf(pygame is None, 'pygame не установлен')
+    def test_skip_burst_coalesced(self):
+        """Тест: пачка переключений трека приводит к одной загрузке"""
+        playlist = create_playlist(20)
+        playlist.set_current(playlist.first_item)
+        loaded = []
+        release = threading.Event()
+
+        def load(path):
+            loaded.append(path)
+            release.wait(5)
+
+        with mock.patch('pygame.mixer.music.load', load), \
+                mock.patch('pygame.mixer.music.play'), \
+                mock.patch('pygame.mixer.music.queue'), \
+                mock.patch('pygame.mixer.music.stop'):
+            playlist.play_all()
+            deadline = time.monotonic() + 5
+            while not loaded and time.monotonic() < deadline:
+                time.sleep(0.01)
+            for _ in range(10):
+                playlist.next_track()
+            release.set()
+            deadline = time.monotonic() + 5
+            while len(loaded) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            playlist.stop()
+            time.sleep(0.05)
+        self.assertEqual(loaded, ['/music/0.mp3', '/music/10.mp3'])
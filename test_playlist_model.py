@@ -0,0 +1,99 @@
+"""Тесты модуля playlist_model"""
+
+import os
+import threading
+import unittest
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from playlist import Composition, PlayList
+
+try:
+    from PyQt5 import QtCore  # pylint: disable=E0401
+except ImportError:
+    QtCore = None
+else:
+    from playlist_model import PlaylistModel
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+@unittest.skipIf(QtCore is None, 'PyQt5 не установлен')
+class TestPlaylistModel(unittest.TestCase):
+    """Тест-кейс класса PlaylistModel"""
+    def setUp(self):
+        self.playlist = PlayList('Модель')
+        self.playlist.extend(Composition(str(i), f'{i}.mp3') for i in range(5))
+        self.model = PlaylistModel(self.playlist)
+        self.signals = []
+        for name in ('rowsInserted', 'rowsRemoved', 'rowsMoved', 'modelReset'):
+            getattr(self.model, name).connect(lambda *args, name=name: self.signals.append(name))
+
+    def rows(self):
+        """Текст строк модели"""
+        return [self.model.index(row).data() for row in range(self.model.rowCount())]
+
+    def expected(self):
+        """Ожидаемый текст строк по плейлисту"""
+        return [f'{i}) {node.data}' for i, node in enumerate(self.playlist, 1)]
+
+    def test_targeted_signals(self):
+        """Тест: правки плейлиста дают сигналы только о затронутых строках"""
+        self.playlist.append(Composition('new', 'new.mp3'))
+        self.playlist.move(5, 0)
+        self.playlist.move_range(1, 2, 3)
+        self.playlist.remove_many([self.playlist.node_at(1), self.playlist.node_at(2)])
+        self.playlist.extend(Composition(title, title) for title in 'abc')
+        self.assertEqual(self.rows(), self.expected())
+        self.assertEqual(self.signals, ['rowsInserted', 'rowsMoved', 'rowsMoved', 'rowsMoved',
+                                        'rowsRemoved', 'rowsInserted'])
+        self.playlist.undo()
+        self.assertEqual(self.signals[-1], 'modelReset')
+        self.assertEqual(self.rows(), self.expected())
+        self.assertIs(self.model.node(0), self.playlist.first_item)
+
+    def test_batch_and_current(self):
+        """Тест: пакет правок даёт один сигнал, смена текущего трека обновляет строки"""
+        changed = []
+        self.model.dataChanged.connect(
+            lambda first, last, roles: changed.append((first.row(), last.row(), roles)))
+        with self.playlist.batch():
+            for i in range(3):
+                self.playlist.append(Composition(f'batch {i}', f'batch{i}.mp3'))
+            self.assertEqual(self.model.rowCount(), 5)
+        self.assertEqual(self.signals, ['rowsInserted'])
+        self.assertEqual(self.rows(), self.expected())
+        self.playlist.set_current(self.playlist.node_at(2))
+        self.assertEqual(changed[-1], (2, 2, [QtCore.Qt.FontRole]))
+        del changed[:]
+        self.playlist.set_current(self.playlist.node_at(6))
+        self.assertEqual(sorted(changed), [(2, 2, [QtCore.Qt.FontRole]), (6, 6, [QtCore.Qt.FontRole])])
+
+    def test_node_role(self):
+        """Тест: строка модели отдаёт свой узел, по которому плейлист удаляет трек"""
+        node = self.playlist.node_at(3)
+        index = self.model.index(3)
+        self.assertIs(index.data(PlaylistModel.NodeRole), node)
+        self.playlist.remove_many([self.model.index(1).data(PlaylistModel.NodeRole), node])
+        self.assertEqual([node.data.title for node in self.playlist], ['0', '2', '4'])
+        self.assertIs(self.model.index(2).data(PlaylistModel.NodeRole), self.playlist.last)
+
+    def test_edits_from_other_thread(self):
+        """Тест: правки из другого потока применяются в потоке модели пачкой"""
+        thread = threading.Thread(target=lambda: self.playlist.extend(
+            Composition(str(i), f'{i}.mp3') for i in range(5, 100)))
+        thread.start()
+        thread.join()
+        self.assertEqual(self.model.rowCount(), 5)
+        app.processEvents()
+        self.assertEqual(self.rows(), self.expected())
+        self.assertEqual(self.signals, ['rowsInserted'])
+
+        self.model.set_playlist(None)
+        self.assertEqual(self.model.rowCount(), 0)
+        self.playlist.clear()
+        self.assertFalse(self.playlist._observers)
+
+
+if __name__ == '__main__':
+    unittest.main()
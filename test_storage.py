@@ -0,0 +1,141 @@
+"""Тесты модуля storage"""
+
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from playlist import Composition, PlayList
+from storage import PlaylistRegistry, PlaylistStore
+
+
+def titles(playlist):
+    """Названия треков плейлиста"""
+    return [node.data.title for node in playlist]
+
+
+class TestPlaylistStore(unittest.TestCase):
+    """Тест-кейс класса PlaylistStore"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, 'db', 'playlists.sqlite3')
+        self.store = PlaylistStore(self.filename)
+        self.addCleanup(lambda: self.store.close())
+
+    def reopen(self):
+        """Повторное открытие базы"""
+        self.store.close()
+        self.store = PlaylistStore(self.filename)
+
+    def rows(self):
+        """Количество строк треков в базе"""
+        return self.store._connection.execute('SELECT COUNT(*) FROM tracks').fetchone()[0]
+
+    def test_edits_survive_restart(self):
+        """Тест: правки плейлиста сохраняются и загружаются после перезапуска"""
+        playlist = PlayList('Рок')
+        playlist.append(Composition('a', 'a.mp3', 10))
+        self.store.create(playlist)
+        playlist.extend(Composition(title, f'{title}.mp3') for title in 'bcdef')
+        playlist.move(4, 1)
+        playlist.remove_node(playlist.node_at(2))
+        playlist.insert_before(playlist.node_at(0), Composition('z', 'z.mp3'))
+        playlist.move_range(0, 1, 3)
+        playlist.undo()
+        expected = titles(playlist)
+        self.store.create(PlayList('Пустой'))
+        with self.assertRaises(ValueError):
+            self.store.create(PlayList('Рок'))
+
+        self.reopen()
+        self.assertEqual(self.store.names(), ['Рок', 'Пустой'])
+        stubs = self.store.playlists()
+        self.assertEqual(len(stubs[0]), 0)
+        self.assertFalse(self.store.is_loaded(stubs[0]))
+        loaded = self.store.open(stubs[0])
+        self.assertEqual(titles(loaded), expected)
+        stray = self.store.get('Рок')
+        stray.append(Composition('x', 'x.mp3'))
+        with self.assertRaises(ValueError):
+            self.store.open(stray)
+        self.assertEqual(loaded.node_at(1).data.duration, 10)
+        self.assertEqual(self.rows(), len(expected))
+
+        self.store.delete(stubs[1])
+        loaded.clear()
+        self.reopen()
+        self.assertEqual(self.store.names(), ['Рок'])
+        self.assertEqual(len(self.store.load('Рок')), 0)
+        with self.assertRaises(KeyError):
+            self.store.load('Пустой')
+
+    def test_move_writes_one_row(self):
+        """Тест: перемещение трека меняет одну строку базы"""
+        playlist = PlayList('Длинный')
+        playlist.extend(Composition(str(i), f'{i}.mp3') for i in range(100))
+        self.store.create(playlist)
+        changes = self.store._connection.total_changes
+        playlist.move(90, 3)
+        self.assertEqual(self.store._connection.total_changes - changes, 1)
+        for _ in range(60):  # Позиции сжимаются, пока не понадобится пересчёт
+            playlist.move(90, 3)
+        expected = titles(playlist)
+        self.reopen()
+        self.assertEqual(titles(self.store.load('Длинный')), expected)
+
+    def test_sort_and_rotate_renumber(self):
+        """Тест сохранения сортировки и поворота"""
+        playlist = PlayList('Сортировка')
+        self.store.create(playlist)
+        playlist.extend(Composition(title, title) for title in 'dbca')
+        playlist.sort_by_title()
+        playlist.rotate(1)
+        expected = titles(playlist)
+        self.reopen()
+        self.assertEqual(titles(self.store.load('Сортировка')), expected)
+
+
+class TestPlaylistRegistry(unittest.TestCase):
+    """Тест-кейс класса PlaylistRegistry"""
+    def setUp(self):
+        self.store = PlaylistStore()
+        self.addCleanup(self.store.close)
+        for name in ('Рок', 'Джаз', 'Блюз'):
+            playlist = PlayList(name)
+            playlist.append(Composition(name, f'{name}.mp3'))
+            self.store.create(playlist)
+
+    def test_lazy_lookup(self):
+        """Тест: реестр читает названия, а плейлисты и треки загружает при обращении"""
+        registry = PlaylistRegistry(self.store)
+        self.assertEqual(registry.names(), ['Блюз', 'Джаз', 'Рок'])
+        self.assertIn('Джаз', registry)
+        self.assertNotIn('Поп', registry)
+        self.assertEqual(registry.index('Рок'), 2)
+        self.assertIsNone(registry._playlists['Рок'])
+        stub = registry.get('Рок')
+        self.assertFalse(self.store.is_loaded(stub))
+        playlist = registry.open('Рок')
+        self.assertIs(playlist, stub)
+        self.assertEqual(titles(playlist), ['Рок'])
+        with self.assertRaises(KeyError):
+            registry.get('Поп')
+
+    def test_add_and_remove(self):
+        """Тест: добавление и удаление возвращают позицию названия в перечне"""
+        registry = PlaylistRegistry(self.store)
+        self.assertEqual(registry.add(PlayList('Диско')), 2)
+        self.assertEqual(list(registry), ['Блюз', 'Джаз', 'Диско', 'Рок'])
+        with self.assertRaises(ValueError):
+            registry.add(PlayList('Рок'))
+        self.assertEqual(registry.remove('Джаз'), 1)
+        self.assertEqual(len(registry), 3)
+        with self.assertRaises(KeyError):
+            registry.remove('Джаз')
+        self.assertEqual(PlaylistRegistry(self.store).names(), ['Блюз', 'Диско', 'Рок'])
+
+
+if __name__ == '__main__':
+    unittest.main()
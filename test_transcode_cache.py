@@ -0,0 +1,130 @@
+"""Тесты модуля transcode_cache"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import wave
+
+from transcode_cache import TranscodeCache
+
+try:
+    import pygame  # pylint: disable=E0401
+except ImportError:
+    pygame = None
+
+
+def copy_decoder(path, target, frequency):
+    """Перекодирование-заглушка: копирует файл"""
+    shutil.copyfile(path, target)
+
+
+class TestTranscodeCache(unittest.TestCase):
+    """Тест-кейс класса TranscodeCache"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = os.path.join(directory.name, 'music')
+        os.mkdir(self.source)
+        self.cache = TranscodeCache(
+            os.path.join(directory.name, 'cache'), limit=250,
+            decoder=copy_decoder, workers=2)
+        self.addCleanup(self.cache.shutdown)
+
+    def write(self, name, data):
+        """Запись исходного файла"""
+        path = os.path.join(self.source, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def test_keyed_by_content(self):
+        """Тест: одинаковое содержимое перекодируется один раз"""
+        first = self.write('a.mp3', bytes(100))
+        copy = self.write('b.mp3', bytes(100))
+        self.assertIsNone(self.cache.lookup(first))
+        self.assertIsNotNone(self.cache.submit(first))
+        self.cache.wait()
+        self.assertIsNone(self.cache.submit(first))
+        self.assertIsNotNone(self.cache.submit(copy))  # Задание только хеширует копию
+        self.cache.wait()
+        self.assertIsNone(self.cache.submit(copy))
+        self.assertEqual(len(self.cache.entries()), 1)
+        target = self.cache.lookup(first)
+        self.assertEqual(self.cache.lookup(copy), target)
+        with open(target, 'rb') as file:
+            self.assertEqual(file.read(), bytes(100))
+
+        self.write('a.mp3', bytes(101))
+        self.assertIsNone(self.cache.lookup(first))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+        self.assertEqual(self.cache.hit_rate, 0.5)
+        self.assertIn('50%', self.cache.report())
+        self.assertIsNone(self.cache.lookup(os.path.join(self.source, 'missing.mp3')))
+        self.assertIsNone(self.cache.submit(os.path.join(self.source, 'missing.mp3')))
+
+    def test_lookup_does_not_read_file(self):
+        """Тест: поиск в кэше не хеширует файл, это делает задание пула"""
+        path = self.write('a.mp3', bytes(100))
+        with mock.patch('transcode_cache.file_digest') as digest:
+            self.assertIsNone(self.cache.lookup(path))
+            digest.assert_not_called()
+        self.cache.submit(path)
+        self.cache.wait()
+        self.assertIsNotNone(self.cache.lookup(path))
+
+    def test_digests_survive_restart(self):
+        """Тест: после перезапуска тёплый кэш находит файлы без хеширования"""
+        path = self.write('a.mp3', bytes(100))
+        self.cache.submit(path)
+        self.cache.wait()
+        target = self.cache.lookup(path)
+        self.cache.shutdown()
+
+        cache = TranscodeCache(self.cache.directory, decoder=copy_decoder, workers=2)
+        self.addCleanup(cache.shutdown)
+        with mock.patch('transcode_cache.file_digest') as digest:
+            self.assertEqual(cache.lookup(path), target)
+            self.assertIsNone(cache.submit(path))
+            digest.assert_not_called()
+        self.write('a.mp3', bytes(101))
+        self.assertIsNone(cache.lookup(path))
+
+    def test_cleanup_least_recently_used(self):
+        """Тест очистки давно не использованных файлов"""
+        paths = [self.write(f'{i}.mp3', bytes([i]) * 100) for i in range(3)]
+        for i, path in enumerate(paths[:2]):
+            self.cache.submit(path)
+            self.cache.wait()
+            target = self.cache.lookup(path)
+            os.utime(target, ns=(i * 10 ** 9, i * 10 ** 9))
+        self.cache.lookup(paths[0])  # Первый файл использован последним
+        self.cache.submit(paths[2])
+        self.cache.wait()
+        self.cache.cleanup()
+        self.assertIsNotNone(self.cache.lookup(paths[0]))
+        self.assertIsNone(self.cache.lookup(paths[1]))
+        self.assertIsNotNone(self.cache.lookup(paths[2]))
+        self.assertLessEqual(self.cache.size(), 250)
+
+    @unittest.skipIf(pygame is None, 'pygame не установлен')
+    def test_decode_to_wav(self):
+        """Тест перекодирования средствами pygame"""
+        path = os.path.join(self.source, 'tone.wav')
+        with wave.open(path, 'wb') as file:
+            file.setnchannels(1)
+            file.setsampwidth(2)
+            file.setframerate(22050)
+            file.writeframes(bytes(2 * 2205))
+        cache = TranscodeCache(os.path.join(self.source, 'wav'), frequency=44100)
+        self.addCleanup(cache.shutdown)
+        cache.submit(path).result()
+        with wave.open(cache.lookup(path), 'rb') as file:
+            self.assertEqual(file.getframerate(), 44100)
+            self.assertEqual(file.getnchannels(), 2)
+            self.assertAlmostEqual(file.getnframes(), 4410, delta=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
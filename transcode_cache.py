@@ -0,0 +1,369 @@
+"""Кэш перекодированных треков на диске.
+
+Сжатые файлы (MP3, OGG) один раз декодируются в несжатый WAV в формате
+микшера и сохраняются в каталог кэша под именем, равным хешу содержимого
+исходного файла. Плеер загружает WAV из кэша, которому не нужно дорогое
+декодирование. Хеширование и перекодирование выполняются в фоне пулом
+процессов, а поиск в кэше только сверяет время изменения и размер файла
+с уже известными хешами. Известные хеши хранятся в базе SQLite рядом с
+файлами кэша, поэтому после перезапуска файлы заново не хешируются.
+Размер кэша ограничен, давно не использованные файлы удаляются первыми.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+def decode_to_wav(path, target, frequency):
+    """
+    Декодирует файл в WAV средствами pygame.
+
+    Выполняется в процессе пула. Процессы пула запускаются заново (spawn),
+    а не копируют плеер, поэтому микшер здесь открывается впервые, на
+    фиктивном звуковом драйвере, и не занимает звуковую карту.
+
+    Аргументы:
+        path (str): Исходный файл.
+        target (str): Файл WAV, который нужно записать.
+        frequency (int): Частота дискретизации.
+    """
+    import wave
+
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=frequency, size=-16, channels=2)
+    frequency, _, channels = pygame.mixer.get_init()
+    sound = pygame.mixer.Sound(path)
+    with wave.open(target, 'wb') as file:
+        file.setnchannels(channels)
+        file.setsampwidth(2)
+        file.setframerate(frequency)
+        file.writeframes(sound.get_raw())
+
+
+def file_digest(path):
+    """
+    Возвращает хеш содержимого файла.
+
+    Аргументы:
+        path (str): Путь к файлу.
+
+    Возвращает:
+        str: Шестнадцатеричный SHA-1 содержимого.
+
+    Выбрасывает:
+        OSError: Если файл не читается.
+    """
+    sha = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(2 ** 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _transcode(decoder, path, directory, frequency):
+    """
+    Хеширует файл и, если его ещё нет в кэше, перекодирует во временный
+    файл и атомарно переименовывает его.
+
+    Аргументы:
+        decoder (callable): Функция decoder(path, target, frequency).
+        path (str): Исходный файл.
+        directory (str): Каталог кэша.
+        frequency (int): Частота дискретизации.
+
+    Возвращает:
+        tuple: Время изменения и размер исходного файла до хеширования,
+            его хеш и признак того, что файл кэша создан этим заданием.
+    """
+    stat = os.stat(path)
+    digest = file_digest(path)
+    target = os.path.join(directory, f'{digest}.wav')
+    if os.path.exists(target):
+        return stat.st_mtime_ns, stat.st_size, digest, False
+    temporary = f'{target}.{os.getpid()}.tmp'
+    try:
+        decoder(path, temporary, frequency)
+        os.replace(temporary, target)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return stat.st_mtime_ns, stat.st_size, digest, True
+
+
+class TranscodeCache:
+    """
+    Каталог перекодированных треков, адресуемых хешем содержимого.
+
+    Время изменения файла кэша служит отметкой последнего использования:
+    при попадании оно обновляется, а очистка удаляет файлы с самыми старыми
+    отметками, пока суммарный размер не станет меньше лимита. Хеши исходных
+    файлов сохраняются в индексе INDEX_NAME в каталоге кэша и читаются из
+    него при создании кэша.
+
+    Атрибуты:
+        directory (str): Каталог кэша.
+        limit (int): Максимальный суммарный размер файлов кэша в байтах.
+        frequency (int): Частота дискретизации перекодированных файлов.
+        hits (int): Количество попаданий.
+        misses (int): Количество промахов.
+        _decoder (callable): Функция перекодирования, выполняемая в пуле.
+        _workers (int): Количество процессов пула.
+        _executor (ProcessPoolExecutor): Пул процессов или None до первого задания.
+        _digests (dict): Хеши исходных файлов, посчитанные заданиями пула,
+            path -> (mtime_ns, size, digest).
+        _index (sqlite3.Connection): Соединение с индексом хешей.
+        _pending (dict): Задания path -> future.
+        _lock (threading.Condition): Блокировка счётчиков и заданий; оповещает
+            о завершении заданий.
+    """
+
+    INDEX_NAME = 'digests.sqlite3'
+
+    def __init__(self, directory, limit=2 * 2 ** 30, frequency=44100,
+                 decoder=decode_to_wav, workers=None):
+        """
+        Инициализирует кэш в каталоге, создавая его при необходимости,
+        и читает сохранённые хеши исходных файлов.
+
+        Аргументы:
+            directory (str): Каталог кэша.
+            limit (int, опционально): Лимит размера в байтах. По умолчанию 2 ГиБ.
+            frequency (int, опционально): Частота дискретизации. По умолчанию 44100.
+            decoder (callable, опционально): Функция decoder(path, target, frequency),
+                объявленная на уровне модуля, чтобы её можно было передать в процесс.
+                По умолчанию decode_to_wav.
+            workers (int, опционально): Количество процессов пула.
+                По умолчанию по числу процессоров.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.limit = limit
+        self.frequency = frequency
+        self.hits = 0
+        self.misses = 0
+        self._decoder = decoder
+        self._workers = workers
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Condition()
+        self._index = sqlite3.connect(
+            os.path.join(directory, self.INDEX_NAME), check_same_thread=False)
+        with self._index:
+            self._index.execute(
+                'CREATE TABLE IF NOT EXISTS digests ('
+                'path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT)')
+        self._digests = {path: (mtime_ns, size, digest) for path, mtime_ns, size, digest
+                         in self._index.execute('SELECT * FROM digests')}
+
+    def known_digest(self, path):
+        """
+        Возвращает уже посчитанный хеш файла, не читая его содержимое.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Возвращает:
+            str: Хеш или None, если файл ещё не хешировался или изменился
+                с тех пор (по времени изменения и размеру).
+
+        Выбрасывает:
+            OSError: Если файл недоступен.
+        """
+        stat = os.stat(path)
+        with self._lock:
+            known = self._digests.get(path)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+        return None
+
+    def _target(self, digest):
+        """
+        Возвращает путь к файлу кэша для хеша.
+
+        Аргументы:
+            digest (str): Хеш содержимого.
+
+        Возвращает:
+            str: Путь к файлу WAV в каталоге кэша.
+        """
+        return os.path.join(self.directory, f'{digest}.wav')
+
+    def lookup(self, path):
+        """
+        Возвращает перекодированный файл, если он есть в кэше.
+
+        Содержимое исходного файла не читается: если его хеш ещё не
+        посчитан заданием пула, это промах.
+
+        Аргументы:
+            path (str): Исходный файл.
+
+        Возвращает:
+            str: Путь к файлу кэша или None при промахе.
+        """
+        try:
+            digest = self.known_digest(path)
+            if digest is None:
+                raise FileNotFoundError(path)
+            target = self._target(digest)
+            os.utime(target)  # Отметка использования для очистки
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return target
+
+    def submit(self, path):
+        """
+        Ставит файл на хеширование и перекодирование в пуле процессов.
+
+        Файл, содержимое которого уже есть в кэше под другим путём, задание
+        только хеширует.
+
+        Аргументы:
+            path (str): Исходный файл.
+
+        Возвращает:
+            concurrent.futures.Future: Задание или None, если файл уже в кэше
+                или недоступен.
+        """
+        try:
+            digest = self.known_digest(path)
+        except OSError:
+            return None
+        with self._lock:
+            if path in self._pending:
+                return self._pending[path]
+            if digest is not None and os.path.exists(self._target(digest)):
+                return None
+            if self._executor is None:
+                # Процессы пула запускаются заново: копия плеера с открытым
+                # микшером SDL и потоками Qt в дочернем процессе небезопасна
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers, mp_context=multiprocessing.get_context('spawn'))
+            future = self._executor.submit(
+                _transcode, self._decoder, path, self.directory, self.frequency)
+            self._pending[path] = future
+        future.add_done_callback(lambda done: self._finished(path, done))
+        return future
+
+    def _finished(self, path, future):
+        """
+        Завершает задание: запоминает хеш файла, снимает задание с учёта и
+        очищает кэш при превышении лимита.
+
+        Аргументы:
+            path (str): Исходный файл.
+            future (concurrent.futures.Future): Завершённое задание.
+        """
+        if future.exception() is not None:
+            print(f"Не удалось перекодировать трек: {future.exception()}")
+        else:
+            known = future.result()[:3]
+            with self._lock, self._index:
+                self._digests[path] = known
+                self._index.execute(
+                    'INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)', (path, *known))
+            if future.result()[3]:
+                self.cleanup()
+        with self._lock:
+            self._pending.pop(path, None)
+            self._lock.notify_all()
+
+    def entries(self):
+        """
+        Возвращает файлы кэша от давно использованных к недавним.
+
+        Возвращает:
+            list: Кортежи (время использования, размер, путь).
+        """
+        entries = []
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if entry.is_file() and entry.name.endswith('.wav'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+        return entries
+
+    def size(self):
+        """
+        Возвращает суммарный размер файлов кэша.
+
+        Возвращает:
+            int: Размер в байтах.
+        """
+        return sum(size for _, size, _ in self.entries())
+
+    def cleanup(self):
+        """
+        Удаляет давно не использованные файлы, пока размер кэша больше лимита.
+
+        Возвращает:
+            int: Количество удалённых файлов.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def wait(self):
+        """
+        Ждёт завершения всех поставленных заданий и учёта их результатов.
+        """
+        with self._lock:
+            while self._pending:
+                self._lock.wait()
+
+    def shutdown(self):
+        """
+        Дожидается заданий, завершает пул процессов и закрывает индекс хешей.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._lock:
+            self._index.close()
+
+    @property
+    def hit_rate(self):
+        """
+        Возвращает долю попаданий.
+
+        Возвращает:
+            float: Доля попаданий от 0 до 1, 0 если обращений не было.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self):
+        """
+        Возвращает отчёт о работе кэша.
+
+        Возвращает:
+            str: Попадания, промахи, доля попаданий, число и размер файлов.
+        """
+        entries = self.entries()
+        size = sum(size for _, size, _ in entries)
+        return (f"Кэш перекодирования: попаданий {self.hits}, промахов {self.misses} "
+                f"({self.hit_rate:.0%}), файлов {len(entries)}, "
+                f"{size / 2 ** 20:.1f} из {self.limit / 2 ** 20:.0f} МиБ")